@@ -32,18 +32,28 @@ import rospy
 import tf2_ros
 import moveit_commander as mc
 
+from ariac_example.order_manager import OrderManager
+from ariac_example.scheduler import ExecutionScheduler, WorkspaceManager
+from ariac_example.trajectory_cache import TrajectoryCache
 from geometry_msgs.msg import TransformStamped
 from nist_gear.msg import Order, Model, LogicalCameraImage, VacuumGripperState
 
+from std_msgs.msg import String
 from std_srvs.srv import Trigger
-from nist_gear.srv import AGVControl, AGVToAssemblyStation, GetMaterialLocations, VacuumGripperControl
+from nist_gear.srv import AGVControl, AGVToAssemblyStation, AssemblyStationSubmitShipment, \
+    DetectAssemblyShipment, GetMaterialLocations, VacuumGripperControl
 
+import os
 import sys
 import copy
 import yaml
 import re
 from math import pi, sqrt
 
+AGVS = ['agv1', 'agv2', 'agv3', 'agv4']
+# Kitting station each AGV starts at
+KITTING_STATIONS = {'agv1': 'ks1', 'agv2': 'ks2', 'agv3': 'ks3', 'agv4': 'ks4'}
+
 
 def start_competition():
     """ Start the competition through ROS service call """
@@ -88,6 +98,56 @@ def get_order():
     return order
 
 
+def get_briefcase_content(assembly_station):
+    """ ROS service call to get the products in the briefcase of an assembly station
+
+    Args:
+    assembly_station (str): The name of the assembly station, e.g. 'as1'
+
+    Returns:
+    list: DetectedProduct messages of the products in the briefcase
+    """
+
+    service_name = '/ariac/briefcase_' + assembly_station[2:] + '/get_content'
+    rospy.wait_for_service(service_name)
+    return rospy.ServiceProxy(service_name, DetectAssemblyShipment)().shipment.products
+
+
+def briefcase_matches(shipment):
+    """ Whether the briefcase of the shipment's station holds exactly the
+    product types of the shipment, none of them faulty """
+
+    content = get_briefcase_content(shipment.station_id)
+    if any(product.is_faulty for product in content):
+        return False
+    return sorted(p.type for p in content) == sorted(p.type for p in shipment.products)
+
+
+class CompetitionMonitor():
+    """ Latest competition state and station of each AGV """
+
+    def __init__(self, agvs):
+        self.state = None
+        # AGV -> station it last reported, the kitting station until then
+        self.agv_stations = dict((agv, KITTING_STATIONS.get(agv)) for agv in agvs)
+        rospy.Subscriber('/ariac/competition_state', String, self.state_callback)
+        for agv in agvs:
+            rospy.Subscriber('/ariac/' + agv + '/station', String, self.station_callback, agv)
+
+    def state_callback(self, msg):
+        self.state = msg.data
+
+    def station_callback(self, msg, agv):
+        self.agv_stations[agv] = msg.data
+
+    def is_done(self):
+        return self.state == 'done'
+
+    def agv_at(self, station):
+        """ Whether an AGV reported having reached station """
+        return station in self.agv_stations.values()
+
+
 def get_part_type_location(part):
     """ Get vessels where a specific part type can be found. This function will not work in competition mode. """
 
@@ -209,10 +269,23 @@ def get_target_world_pose(target, agv):
 
 class MoveitRunner():
 
-    def __init__(self, group_names, node_name='ariac_moveit_example', ns='', robot_description='robot_description'):
+    def __init__(self, group_names, robot_type, node_name='ariac_moveit_example', ns='',
+                 robot_description='robot_description', trajectory_cache_file=None, workspace=None):
         mc.roscpp_initialize(sys.argv)
         rospy.init_node(node_name, anonymous=True)
 
+        # 'kitting_robot' or 'gantry_robot', the robot moved by default
+        self.robot_type = robot_type
+
+        # Regions shared with the other robot, reserved before moving into them
+        self.workspace = workspace or WorkspaceManager()
+
+        # Plans between preset locations are reused across pick cycles and,
+        # when a file is given, across runs
+        self.trajectory_cache = TrajectoryCache(trajectory_cache_file)
+        # Name of the preset location each group is known to be at, if any
+        self.current_locations = {}
+
         self.robot = mc.RobotCommander(ns+'/'+robot_description, ns)
         self.scene = mc.PlanningSceneInterface(ns)
         self.groups = {}
@@ -226,7 +299,7 @@ class MoveitRunner():
             self.groups[group_name] = group
 
         self.set_preset_location()
-        self.goto_preset_location('start')
+        self.goto_preset_location('home')
 
     def set_preset_location(self):
         '''
@@ -269,51 +342,93 @@ class MoveitRunner():
         kitting_arm = [1.3458887656258813, -0.5601138939850792, -0.2804510290896989, 0, -0.8072468824120538, 1.5385783777411373, 0.8298981409931709]
         gantry_torso = [-2.48400006879773, -1.6336322021423504, 0, 3.4200004668605506]
         gantry_arm = [0.0, -pi/4, pi/2, -pi/4, pi/2, 0]
-        locations[name] = (kitting)
+        locations[name] = (kitting_arm, gantry_torso, gantry_arm)
 
         name = 'standby'
         kitting_arm = [2.70, 3.141594222190707, -1.01, 1.88, 3.77, -1.55, 0]
         gantry_torso = [0, 0, 0]
         gantry_arm = [0.0, -pi/4, pi/2, -pi/4, pi/2, 0]
-        locations[name] = (kitting)
+        locations[name] = (kitting_arm, gantry_torso, gantry_arm)
 
         name = 'agv4'
         kitting_arm = [1.50, 3.141594222190707, -1.01, 1.88, 3.77, -1.55, 0]
         gantry_torso = [0, 0, 0]
         gantry_arm = [0.0, -pi/4, pi/2, -pi/4, pi/2, 0]
-        locations[name] = (kitting)
+        locations[name] = (kitting_arm, gantry_torso, gantry_arm)
 
         self.locations = locations
 
-    def goto_preset_location(self, location_name, robot_type):
+    def goto_preset_location(self, location_name, robot_type=None):
 
-        group = None
+        robot_type = robot_type or self.robot_type
         if robot_type == 'kitting_robot':
-            group = self.groups['kitting_arm']
+            group_name = 'kitting_arm'
         elif robot_type == 'gantry_robot':
-            group = self.groups['gantry_full']
+            group_name = 'gantry_full'
+        else:
+            raise ValueError("Unknown robot type '%s'" % robot_type)
+        if location_name not in self.locations:
+            raise ValueError("Unknown preset location '%s', expected one of %s" %
+                             (location_name, ', '.join(sorted(self.locations))))
+        group = self.groups[group_name]
 
         kitting_arm, gantry_torso, gantry_arm = self.locations[location_name]
         location_pose = group.get_current_joint_values()
 
-        if kitting:
-            location_pose[:] = kitting
-            print("Location Pose:", location_pose)
+        if group_name == 'kitting_arm':
+            preset = kitting_arm
+        else:
+            preset = gantry_torso + gantry_arm
+        if len(preset) != len(location_pose):
+            raise ValueError("Preset location '%s' has %d joint values, group %s has %d joints" %
+                             (location_name, len(preset), group_name, len(location_pose)))
+        location_pose[:] = preset
+        print("Location Pose:", location_pose)
+
+        # Moves between presets always start and end at the same joint
+        # values, so replay the previous plan if we are still at its start
+        start_location = self.current_locations.get(group_name)
+        current_joints = dict(zip(group.get_active_joints(), group.get_current_joint_values()))
+        plan = self.trajectory_cache.get(group_name, start_location, location_name, current_joints)
+        if plan is not None:
+            if group.execute(plan, wait=True):
+                self.current_locations[group_name] = location_name
+                return
+            self.trajectory_cache.invalidate(group_name, start_location, location_name)
 
         # If the robot controller reports a path tolerance violation,
         # this will automatically re-attempt the motion
         MAX_ATTEMPTS = 5
         attempts = 0
-        while not group.go(location_pose, wait=True):
+        while True:
+            plan = self.plan_joint_goal(group, location_pose)
+            if plan is not None and group.execute(plan, wait=True):
+                break
             attempts += 1
             assert(attempts < MAX_ATTEMPTS)
 
-    def move_part(self, part, target, part_location, agv, robot_type):
+        self.trajectory_cache.put(group_name, start_location, location_name, plan)
+        self.current_locations[group_name] = location_name
+
+    def plan_joint_goal(self, group, joint_goal):
+        """ Plan a motion to the given joint values, returns None on failure """
+        plan = group.plan(joint_goal)
+        # MoveIt >= 1.0 returns (success, trajectory, planning_time, error_code)
+        if isinstance(plan, tuple):
+            if not plan[0]:
+                return None
+            plan = plan[1]
+        if not plan.joint_trajectory.points:
+            return None
+        return plan
+
+    def move_part(self, part, target, part_location, agv, robot_type, station=None):
         """
         Pick a part from a bin and place it in the tray of an AGV
         Args:
         part (str): The name of the assembly station where the shipment should be delivered
         target (str): Type of shipment, which is retrieved from the topic /ariac/orders
+        station (str): Station the AGV is parked at, reserved while placing the part
 
         Returns:
         bool: status of the service call
@@ -333,7 +448,7 @@ class MoveitRunner():
 
         print("part_pose: ", part)
         print("near_pick_pose: ", near_pick_pose.position.z)
-        self.goto_preset_location(part_location)
+        self.goto_preset_location(part_location, robot_type)
         gm.activate_gripper()
 
         path = [near_pick_pose, pick_pose]
@@ -346,21 +461,24 @@ class MoveitRunner():
             rospy.sleep(0.1)
 
         if not gm.is_object_attached():
-            self.goto_preset_location(part_location)
-            self.goto_preset_location('standby')
-            self.goto_preset_location('start')
+            self.goto_preset_location(part_location, robot_type)
+            self.goto_preset_location('standby', robot_type)
+            self.goto_preset_location('home', robot_type)
             return False
 
-        self.goto_preset_location('standby')
-        self.goto_preset_location(agv)
+        self.goto_preset_location('standby', robot_type)
 
-        path = [place_pose]
-        self.cartesian_move(group, path)
+        with self.workspace.reserve(station or KITTING_STATIONS.get(agv)):
+            self.goto_preset_location(agv, robot_type)
+
+            path = [place_pose]
+            self.cartesian_move(group, path)
 
-        gm.deactivate_gripper()
+            gm.deactivate_gripper()
 
-        self.goto_preset_location('standby')
-        self.goto_preset_location('start')
+            self.goto_preset_location('standby', robot_type)
+
+        self.goto_preset_location('home', robot_type)
         return True
 
     def cartesian_move(self, group, waypoints):
@@ -368,6 +486,12 @@ class MoveitRunner():
         (plan, fraction) = group.compute_cartesian_path(waypoints, 0.01, 0.0)
         group.execute(plan, wait=True)
 
+        # The group has left its preset location, so the next preset move
+        # cannot start from a cached trajectory
+        for group_name, g in self.groups.items():
+            if g is group:
+                self.current_locations.pop(group_name, None)
+
 
 class GripperManager():
     def __init__(self, ns):
@@ -386,68 +510,195 @@ class GripperManager():
         return status.attached
 
 
+def fill_kitting_shipment(moveit_runner, task, all_known_parts, order_manager, monitor):
+    """ Place the products of a kitting shipment on its AGV, then submit it
+
+    Args:
+    moveit_runner (MoveitRunner): Runner of the kitting robot
+    task (ShipmentTask): Kitting shipment taken from the order manager
+    all_known_parts (list): Parts seen by the cameras; used parts are removed
+    order_manager (OrderManager): Queue of the shipments announced so far
+    monitor (CompetitionMonitor): Stations the AGVs are at
+
+    Returns:
+    bool: True if the shipment was submitted, False if it was put on hold
+        for a more important shipment
+    """
+
+    shipment = task.shipment
+    # a shipment for any AGV must not use one holding a shipment on hold
+    active_agv = order_manager.assign_agv(task, AGVS)
+    if active_agv is None:
+        raise RuntimeError("No free AGV for shipment %s" % shipment.shipment_type)
+
+    # products already placed before the shipment was put on hold are kept
+    agv_state = task.progress
+
+    while True:
+        # check between two parts whether a high-priority order arrived
+        if order_manager.should_preempt(task, kinds=('kitting',)):
+            order_manager.preempt(task)
+            return False
+
+        valid_products = task.remaining_products()
+
+        candidate_moves = []
+        for part in all_known_parts:
+            for product in valid_products:
+                if part.type == product.type:
+                    candidate_moves.append((part, product))
+
+        if candidate_moves:
+            part, target = candidate_moves[0]
+
+            world_target = get_target_world_pose(target, active_agv)
+            part_location = get_part_type_location(part)
+
+            print("world_target: ", world_target)
+            print("part_location: ", part_location)
+
+            move_successful = moveit_runner.move_part(
+                part,
+                world_target,
+                part_location,
+                active_agv,
+                'kitting_robot',
+                monitor.agv_stations.get(active_agv)
+            )
+            if move_successful:
+                all_known_parts.remove(part)
+                agv_state.append(target)
+        else:
+            break
+
+    # The AGV leaves its station for the assembly station, so nobody may be
+    # reaching into either of them
+    with moveit_runner.workspace.reserve(monitor.agv_stations.get(active_agv), shipment.station_id):
+        submit_kitting_shipment(active_agv, shipment.station_id, shipment.shipment_type)
+    order_manager.complete(task)
+    return True
+
+
+def run_kitting_orders(moveit_runner, order_manager, all_known_parts, monitor, poll_period=1.0):
+    """ Work on kitting shipments, most important first, until the competition is done
+
+    Args:
+    monitor (CompetitionMonitor): Competition state and stations of the AGVs
+    poll_period (float): Seconds between checks of the competition state
+        while the queue is empty
+    """
+
+    while not monitor.is_done():
+        task = order_manager.next_shipment(kinds=('kitting',), timeout=poll_period)
+        if task is None:
+            continue
+        print("Working on shipment: ", task)
+        fill_kitting_shipment(moveit_runner, task, all_known_parts, order_manager, monitor)
+
+
+def fill_assembly_shipment(moveit_runner, task, order_manager, monitor, poll_period=1.0):
+    """ Submit an assembly shipment once its briefcase holds the products
+
+    The shipment is only submitted after a kitting AGV has reached its
+    station and the briefcase holds the products of the shipment, since
+    submitting it earlier uses it up for a score of 0. Moving the products
+    from the AGV to the briefcase is left to the competitor, so with this
+    example alone assembly shipments are left unsubmitted.
+
+    Args:
+    moveit_runner (MoveitRunner): Runner of the gantry robot
+    task (ShipmentTask): Assembly shipment taken from the order manager
+    order_manager (OrderManager): Queue of the shipments announced so far
+    monitor (CompetitionMonitor): Competition state and stations of the AGVs
+    poll_period (float): Seconds between checks of the station and briefcase
+
+    Returns:
+    bool: True if the shipment was submitted, False if it was put on hold
+        for a more important shipment or the competition ended first
+    """
+
+    shipment = task.shipment
+    while not monitor.is_done():
+        if order_manager.should_preempt(task, kinds=('assembly',)):
+            order_manager.preempt(task)
+            return False
+        if monitor.agv_at(shipment.station_id) and briefcase_matches(shipment):
+            with moveit_runner.workspace.reserve(shipment.station_id):
+                moveit_runner.goto_preset_location('home')
+                submit_assembly_shipment(shipment.station_id, shipment.shipment_type)
+            order_manager.complete(task)
+            return True
+        rospy.sleep(poll_period)
+    rospy.loginfo("Assembly shipment %s left unsubmitted" % shipment.shipment_type)
+    return False
+
+
+def run_assembly_orders(moveit_runner, order_manager, monitor, poll_period=1.0):
+    """ Work on assembly shipments, most important first, until the competition is done
+
+    Args:
+    monitor (CompetitionMonitor): Competition state and stations of the AGVs
+    poll_period (float): Seconds between checks of the competition state
+        while the queue is empty
+    """
+
+    while not monitor.is_done():
+        task = order_manager.next_shipment(kinds=('assembly',), timeout=poll_period)
+        if task is None:
+            continue
+        print("Working on shipment: ", task)
+        fill_assembly_shipment(moveit_runner, task, order_manager, monitor, poll_period)
+
+
 if __name__ == '__main__':
 
     # all moveit groups defined for both robots
     kitting_group_names = ['kitting_arm']
     gantry_group_names = ['gantry_full', 'gantry_arm', 'gantry_torso']
 
+    # stations both robots can reach; a robot reserves one before moving into
+    # it or sending an AGV to it
+    workspace = WorkspaceManager(sorted(KITTING_STATIONS.values()) + ['as1', 'as2', 'as3', 'as4'])
+
     # an instance of MoveitRunner for the kitting robot
-    moveit_runner_kitting = MoveitRunner(kitting_group_names, ns='/ariac/kitting')
+    moveit_runner_kitting = MoveitRunner(
+        kitting_group_names, 'kitting_robot', ns='/ariac/kitting',
+        trajectory_cache_file=os.path.expanduser('~/.ariac/trajectory_cache/kitting.pkl'),
+        workspace=workspace)
     # an instance of MoveitRunner for the gantry robot
-    moveit_runner_gantry = MoveitRunner(gantry_group_names, ns='/ariac/gantry')
+    moveit_runner_gantry = MoveitRunner(
+        gantry_group_names, 'gantry_robot', ns='/ariac/gantry',
+        trajectory_cache_file=os.path.expanduser('~/.ariac/trajectory_cache/gantry.pkl'),
+        workspace=workspace)
+
+    # each robot works through its own task queue, concurrently with the other
+    scheduler = ExecutionScheduler(['kitting_robot', 'gantry_robot'], workspace)
+
+    # shipments of all announced orders, most important first
+    order_manager = OrderManager()
+    rospy.Subscriber('/ariac/orders', Order, order_manager.order_callback)
+
+    # competition state and the station each AGV is at
+    monitor = CompetitionMonitor(AGVS)
 
     start_competition()
-    order = get_order()
-    # print(order)
-    agv_states = {'agv1': [], 'agv2': [], 'agv3': [], 'agv4': []}
 
     all_known_parts = get_parts_from_cameras()
     # print(all_known_parts)
 
-    for shipment in order.shipments:
-        if shipment.agv_id == 'any':
-            active_agv = 'agv1'
-        else:
-            active_agv = shipment.agv_id
+    scheduler.submit('kitting_robot', run_kitting_orders,
+                     moveit_runner_kitting, order_manager, all_known_parts, monitor)
 
-        agv_state = agv_states[active_agv]
+    scheduler.submit('gantry_robot', run_assembly_orders,
+                     moveit_runner_gantry, order_manager, monitor)
 
-        while True:
-            valid_products = []
-            for product in shipment.products:
-                if product not in agv_state:
-                    valid_products.append(product)
-
-            candidate_moves = []
-            for part in all_known_parts:
-                for product in valid_products:
-                    if part.type == product.type:
-                        candidate_moves.append((part, product))
-
-            if candidate_moves:
-                part, target = candidate_moves[0]
-
-                world_target = get_target_world_pose(target, active_agv)
-                part_location = get_part_type_location(part)
-
-                print("world_target: ", world_target)
-                print("part_location: ", part_location)
-
-                move_successful = moveit_runner.move_part(
-                    part,
-                    world_target,
-                    part_location,
-                    active_agv
-                )
-                if move_successful:
-                    all_known_parts.remove(part)
-                    agv_state.append(target)
-            else:
-                break
+    scheduler.wait()
+    scheduler.shutdown()
 
-        submit_shipment(active_agv, shipment.shipment_type)
-        agv_states[active_agv] = []
+    for order_id, metrics in sorted(order_manager.metrics().items()):
+        print("Order %s: %s" % (order_id, metrics))
 
+    moveit_runner_kitting.trajectory_cache.save()
+    moveit_runner_gantry.trajectory_cache.save()
     end_competition()
     print('Done')
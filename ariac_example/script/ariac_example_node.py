@@ -20,19 +20,19 @@ import rospy
 def main():
     rospy.init_node("ariac_example_node")
 
-    comp_class = ariac_example.MyCompetitionClass()
+    # The robots and AGVs come from the trial configuration given in ~config,
+    # or the defaults of the 2021 world without it
+    config = ariac_example.load_client_config(rospy.get_param('~config', None))
+    comp_class = ariac_example.CompetitionClient(config)
     ariac_example.connect_callbacks(comp_class)
 
     rospy.loginfo("Setup complete.")
     ariac_example.start_competition()
 
-    if not comp_class.arm_1_has_been_zeroed:
-        comp_class.send_arm_to_state([0] * len(comp_class.arm_joint_names), comp_class.arm_1_joint_trajectory_publisher)
-        comp_class.arm_1_has_been_zeroed = True
-
-    if not comp_class.arm_2_has_been_zeroed:
-        comp_class.send_arm_to_state([0] * len(comp_class.arm_joint_names), comp_class.arm_2_joint_trajectory_publisher)
-        comp_class.arm_2_has_been_zeroed = True
+    for name, robot in comp_class.robots.items():
+        if not robot.has_been_zeroed:
+            comp_class.send_to_state(name, [0] * len(robot.joint_names))
+            robot.has_been_zeroed = True
 
     rospy.spin()
 
@@ -18,10 +18,14 @@ from __future__ import print_function
 import time
 
 import rospy
+import yaml
 
+from ariac_example.order_manager import OrderManager
+from ariac_example.telemetry import TelemetryRecorder
 from nist_gear.msg import Order
 from nist_gear.msg import VacuumGripperState
 from nist_gear.srv import AGVControl
+from nist_gear.srv import AGVToAssemblyStation
 from nist_gear.srv import ConveyorBeltControl
 from nist_gear.srv import DroneControl
 from nist_gear.srv import SubmitShipment
@@ -52,55 +56,225 @@ def start_competition():
     return response.success
 
 
-def control_gripper(enabled, arm):
-    if arm not in (1, 2):
-        raise ValueError('Only two arms (1 or 2)')
-    rospy.loginfo("Waiting for gripper control to be ready...")
-    service_name = '/ariac/arm{}/gripper/control'.format(arm)
-    rospy.wait_for_service(service_name)
-    rospy.loginfo("Gripper control is now ready.")
-    rospy.loginfo("Requesting gripper control...")
+# Joint names of the robots, in the order used for trajectory commands
+KITTING_ARM_JOINT_NAMES = [
+    'linear_arm_actuator_joint',
+    'shoulder_pan_joint',
+    'shoulder_lift_joint',
+    'elbow_joint',
+    'wrist_1_joint',
+    'wrist_2_joint',
+    'wrist_3_joint'
+]
+GANTRY_ARM_JOINT_NAMES = [
+    'gantry_arm_shoulder_pan_joint',
+    'gantry_arm_shoulder_lift_joint',
+    'gantry_arm_elbow_joint',
+    'gantry_arm_wrist_1_joint',
+    'gantry_arm_wrist_2_joint',
+    'gantry_arm_wrist_3_joint'
+]
+# Joint names of arm1 and arm2 in the worlds before 2021
+ARM_JOINT_NAMES = [
+    'shoulder_pan_joint',
+    'shoulder_lift_joint',
+    'elbow_joint',
+    'wrist_1_joint',
+    'wrist_2_joint',
+    'wrist_3_joint',
+    'linear_arm_actuator_joint'
+]
 
-    try:
-        gripper_control = rospy.ServiceProxy(service_name, VacuumGripperControl)
-        response = gripper_control(enabled)
-    except rospy.ServiceException as exc:
-        rospy.logerr("Failed to control the gripper: %s" % exc)
-        return False
-    if not response.success:
-        rospy.logerr("Failed to control the gripper: %s" % response)
-    else:
-        rospy.loginfo("Gripper controlled successfully")
-    return response.success
+# Topic and service names of each robot and AGV; '{name}' is replaced by the
+# name of the robot or AGV
+DEFAULT_ROBOT_CONFIG = {
+    'joint_names': [],
+    'command_topic': '/ariac/{name}/{name}_arm_controller/command',
+    'joint_state_topic': '/ariac/{name}/joint_states',
+    'gripper_state_topic': '/ariac/{name}/arm/gripper/state',
+    'gripper_control_service': '/ariac/{name}/arm/gripper/control',
+}
+DEFAULT_AGV_CONFIG = {
+    'state_topic': '/ariac/{name}/state',
+    'station_topic': '/ariac/{name}/station',
+    'control_service': '/ariac/{name}',
+    'submit_shipment_service': '/ariac/{name}/submit_shipment',
+    'tray_frame': 'kit_tray_{index}',
+}
+DEFAULT_CLIENT_CONFIG = {
+    'robots': {
+        'kitting': {'joint_names': KITTING_ARM_JOINT_NAMES},
+        'gantry': {'joint_names': GANTRY_ARM_JOINT_NAMES},
+    },
+    'agvs': ['agv1', 'agv2', 'agv3', 'agv4'],
+}
+# The two arms of the worlds before 2021, used by MyCompetitionClass
+LEGACY_ARM_CONFIG = {
+    'joint_names': ARM_JOINT_NAMES,
+    'command_topic': '/ariac/{name}/arm/command',
+    'gripper_state_topic': '/ariac/{name}/gripper/state',
+    'gripper_control_service': '/ariac/{name}/gripper/control',
+}
+LEGACY_CLIENT_CONFIG = {
+    'robots': {'arm1': LEGACY_ARM_CONFIG, 'arm2': LEGACY_ARM_CONFIG},
+    'agvs': DEFAULT_CLIENT_CONFIG['agvs'],
+}
+
+
+def load_client_config(path=None):
+    """ Build the client configuration from a competition configuration file
+
+    The AGVs are taken from the 'agv_infos' entry of the trial configuration
+    given to gear.py, and the robots from an optional 'robots' entry. Either
+    entry may be a list of names or a dict of name -> overrides of
+    DEFAULT_ROBOT_CONFIG / DEFAULT_AGV_CONFIG. Without a file the client
+    drives the kitting and gantry robots of the 2021 world.
+    """
+    config = dict(DEFAULT_CLIENT_CONFIG)
+    if path is None:
+        return config
+    with open(path, 'r') as f:
+        data = yaml.safe_load(f) or {}
+    if 'agv_infos' in data:
+        config['agvs'] = sorted(data['agv_infos'])
+    if 'robots' in data:
+        robots = data['robots']
+        if not isinstance(robots, dict):
+            # Names alone keep the joint names known for the 2021 robots
+            robots = dict((name, DEFAULT_CLIENT_CONFIG['robots'].get(name, {})) for name in robots)
+        config['robots'] = robots
+    return config
+
+
+def _expand_entities(entries, defaults):
+    """ Turn a list of names or a dict of overrides into name -> settings """
+    if not isinstance(entries, dict):
+        entries = dict((name, {}) for name in entries)
+    expanded = {}
+    for name, overrides in entries.items():
+        settings = dict(defaults)
+        settings.update(overrides or {})
+        index = ''.join(c for c in name if c.isdigit())
+        for key, value in settings.items():
+            if isinstance(value, str):
+                settings[key] = value.format(name=name, index=index)
+        expanded[name] = settings
+    return expanded
+
+
+class RobotSlot(object):
+    """ Subscriptions, publisher and latest state of one robot """
+
+    def __init__(self, name, settings, telemetry):
+        self.name = name
+        self.settings = settings
+        self.joint_names = list(settings['joint_names'])
+        self.telemetry = telemetry
+        self.joint_state = None
+        self.gripper_state = None
+        self.has_been_zeroed = False
+        self.publisher = rospy.Publisher(settings['command_topic'], JointTrajectory, queue_size=10)
+        self._joint_stream = name + '/joint_states'
+        self._gripper_stream = name + '/gripper/state'
+        self.last_joint_state_print = time.time()
+        self.last_gripper_state_print = time.time()
+        self.subscribers = []
+
+    def subscribe(self):
+        self.subscribers = [
+            rospy.Subscriber(self.settings['joint_state_topic'], JointState, self.joint_state_callback),
+            rospy.Subscriber(self.settings['gripper_state_topic'], VacuumGripperState,
+                             self.gripper_state_callback),
+        ]
+
+    def joint_state_callback(self, msg):
+        self.telemetry.record_joint_state(self._joint_stream, msg)
+        now = time.time()
+        if now - self.last_joint_state_print >= 10:
+            rospy.loginfo("Current %s Joint States (throttled to 0.1 Hz):\n%s" % (self.name, msg))
+            self.last_joint_state_print = now
+        self.joint_state = msg
+
+    def gripper_state_callback(self, msg):
+        self.telemetry.record_gripper_state(self._gripper_stream, msg)
+        now = time.time()
+        if now - self.last_gripper_state_print >= 10:
+            rospy.loginfo("Current %s gripper state (throttled to 0.1 Hz):\n%s" % (self.name, msg))
+            self.last_gripper_state_print = now
+        self.gripper_state = msg
+
+    def make_trajectory(self, waypoints, durations):
+        """ Build one JointTrajectory through all waypoints
+
+        Args:
+        waypoints (list): Joint positions, one list per point
+        durations (list): Time from the start of the trajectory to each point
+        """
+        msg = JointTrajectory()
+        msg.joint_names = self.joint_names
+        for positions, duration in zip(waypoints, durations):
+            point = JointTrajectoryPoint()
+            point.positions = positions
+            point.time_from_start = rospy.Duration(duration)
+            msg.points.append(point)
+        return msg
+
+
+class AgvSlot(object):
+    """ Subscriptions and latest state of one AGV """
+
+    def __init__(self, name, settings):
+        self.name = name
+        self.settings = settings
+        self.tray_frame = settings['tray_frame']
+        self.state = None
+        self.station = None
+        self.subscribers = []
+
+    def subscribe(self):
+        self.subscribers = [
+            rospy.Subscriber(self.settings['state_topic'], String, self.state_callback),
+            rospy.Subscriber(self.settings['station_topic'], String, self.station_callback),
+        ]
+
+    def state_callback(self, msg):
+        self.state = msg.data
+
+    def station_callback(self, msg):
+        self.station = msg.data
 
 
-class MyCompetitionClass:
-    def __init__(self):
-        self.arm_1_joint_trajectory_publisher = \
-            rospy.Publisher("/ariac/arm1/arm/command", JointTrajectory, queue_size=10)
-        self.arm_2_joint_trajectory_publisher = \
-            rospy.Publisher("/ariac/arm2/arm/command", JointTrajectory, queue_size=10)
+class CompetitionClient(object):
+    """ Competition interface for any number of robots and AGVs
+
+    One RobotSlot per robot and one AgvSlot per AGV are created from the
+    configuration (see load_client_config), so every incoming message goes
+    straight to the slot it belongs to.
+    """
+
+    def __init__(self, config=None, telemetry=None, order_manager=None):
+        config = config or DEFAULT_CLIENT_CONFIG
         self.current_comp_state = None
         self.received_orders = []
-        self.arm_1_current_joint_state = None
-        self.arm_2_current_joint_state = None
-        self.arm_1_current_gripper_state = None
-        self.arm_2_current_gripper_state = None
-        self.last_arm_1_joint_state_print = time.time()
-        self.last_arm_2_joint_state_print = time.time()
-        self.last_arm_1_gripper_state_print = time.time()
-        self.last_arm_2_gripper_state_print = time.time()
-        self.arm_1_has_been_zeroed = False
-        self.arm_2_has_been_zeroed = False
-        self.arm_joint_names = [
-            'shoulder_pan_joint',
-            'shoulder_lift_joint',
-            'elbow_joint',
-            'wrist_1_joint',
-            'wrist_2_joint',
-            'wrist_3_joint',
-            'linear_arm_actuator_joint'
+        # Shipments of the received orders ranked by priority
+        self.order_manager = order_manager or OrderManager()
+        # Full-rate history of the joint and gripper states
+        self.telemetry = telemetry or TelemetryRecorder()
+        self.robots = {}
+        for name, settings in _expand_entities(config['robots'], DEFAULT_ROBOT_CONFIG).items():
+            self.robots[name] = RobotSlot(name, settings, self.telemetry)
+        self.agvs = {}
+        for name, settings in _expand_entities(config['agvs'], DEFAULT_AGV_CONFIG).items():
+            self.agvs[name] = AgvSlot(name, settings)
+        self.subscribers = []
+
+    def connect(self):
+        self.subscribers = [
+            rospy.Subscriber("/ariac/competition_state", String, self.comp_state_callback),
+            rospy.Subscriber("/ariac/orders", Order, self.order_callback),
         ]
+        for slot in list(self.robots.values()) + list(self.agvs.values()):
+            slot.subscribe()
 
     def comp_state_callback(self, msg):
         if self.current_comp_state != msg.data:
@@ -110,103 +284,115 @@ class MyCompetitionClass:
     def order_callback(self, msg):
         rospy.loginfo("Received order:\n" + str(msg))
         self.received_orders.append(msg)
+        self.order_manager.order_callback(msg)
+
+    def send_trajectory(self, robot, waypoints, durations):
+        """ Publish all waypoints to a robot as a single trajectory command """
+        msg = self.robots[robot].make_trajectory(waypoints, durations)
+        rospy.loginfo("Sending %d point trajectory to %s" % (len(msg.points), robot))
+        self.robots[robot].publisher.publish(msg)
+
+    def send_to_state(self, robot, positions, duration=1.0):
+        self.send_trajectory(robot, [positions], [duration])
+
+    def send_all_to_state(self, positions, duration=1.0):
+        """ Command every robot to the same joint positions """
+        for robot in self.robots:
+            self.send_to_state(robot, positions, duration)
+
+    def _robot(self, robot):
+        if robot not in self.robots:
+            raise ValueError('robot must be one of {}'.format(sorted(self.robots)))
+        return self.robots[robot]
+
+    def _agv(self, agv):
+        if agv not in self.agvs:
+            raise ValueError('agv must be one of {}'.format(sorted(self.agvs)))
+        return self.agvs[agv]
+
+    def control_gripper(self, robot, enabled):
+        return call_service(self._robot(robot).settings['gripper_control_service'],
+                            VacuumGripperControl, "control the gripper", enabled)
+
+    def control_agv(self, agv, shipment_type):
+        return call_service(self._agv(agv).settings['control_service'],
+                            AGVControl, "control the agv", shipment_type)
+
+    def submit_kitting_shipment(self, agv, assembly_station, shipment_type):
+        return call_service(self._agv(agv).settings['submit_shipment_service'],
+                            AGVToAssemblyStation, "submit the kitting shipment",
+                            assembly_station, shipment_type)
+
+    def submit_shipment(self, agv, shipment_type):
+        """ Submit a shipment through the legacy /ariac/submit_shipment service """
+        destination_id = ''.join(c for c in self._agv(agv).name if c.isdigit())
+        return call_service('/ariac/submit_shipment', SubmitShipment, "submit the shipment",
+                            destination_id, shipment_type, '')
+
+
+class MyCompetitionClass(CompetitionClient):
+    """ CompetitionClient for the arm1/arm2 worlds, with their attribute names """
 
-    def arm_1_joint_state_callback(self, msg):
-        if time.time() - self.last_arm_1_joint_state_print >= 10:
-            rospy.loginfo("Current Arm 1 Joint States (throttled to 0.1 Hz):\n" + str(msg))
-            self.last_arm_1_joint_state_print = time.time()
-        self.arm_1_current_joint_state = msg
-
-    def arm_2_joint_state_callback(self, msg):
-        if time.time() - self.last_arm_2_joint_state_print >= 10:
-            rospy.loginfo("Current Arm 2 Joint States (throttled to 0.1 Hz):\n" + str(msg))
-            self.last_arm_2_joint_state_print = time.time()
-        self.arm_2_current_joint_state = msg
-
-    def arm_1_gripper_state_callback(self, msg):
-        if time.time() - self.last_arm_1_gripper_state_print >= 10:
-            rospy.loginfo("Current Arm 1 gripper state (throttled to 0.1 Hz):\n" + str(msg))
-            self.last_arm_1_gripper_state_print = time.time()
-        self.arm_1_current_gripper_state = msg
-
-    def arm_2_gripper_state_callback(self, msg):
-        if time.time() - self.last_arm_2_gripper_state_print >= 10:
-            rospy.loginfo("Current Arm 2 gripper state (throttled to 0.1 Hz):\n" + str(msg))
-            self.last_arm_2_gripper_state_print = time.time()
-        self.arm_2_current_gripper_state = msg
+    def __init__(self, telemetry=None, order_manager=None, config=None):
+        CompetitionClient.__init__(self, config or LEGACY_CLIENT_CONFIG, telemetry, order_manager)
+        self.arm_joint_names = ARM_JOINT_NAMES
+
+    arm_1_joint_trajectory_publisher = property(lambda self: self.robots['arm1'].publisher)
+    arm_2_joint_trajectory_publisher = property(lambda self: self.robots['arm2'].publisher)
+    arm_1_current_joint_state = property(lambda self: self.robots['arm1'].joint_state)
+    arm_2_current_joint_state = property(lambda self: self.robots['arm2'].joint_state)
+    arm_1_current_gripper_state = property(lambda self: self.robots['arm1'].gripper_state)
+    arm_2_current_gripper_state = property(lambda self: self.robots['arm2'].gripper_state)
+
+    @property
+    def arm_1_has_been_zeroed(self):
+        return self.robots['arm1'].has_been_zeroed
+
+    @arm_1_has_been_zeroed.setter
+    def arm_1_has_been_zeroed(self, value):
+        self.robots['arm1'].has_been_zeroed = value
+
+    @property
+    def arm_2_has_been_zeroed(self):
+        return self.robots['arm2'].has_been_zeroed
+
+    @arm_2_has_been_zeroed.setter
+    def arm_2_has_been_zeroed(self, value):
+        self.robots['arm2'].has_been_zeroed = value
 
     def send_arm_to_state(self, positions, publisher):
-        msg = JointTrajectory()
-        msg.joint_names = self.arm_joint_names
-        point = JointTrajectoryPoint()
-        point.positions = positions
-        point.time_from_start = rospy.Duration(1.0)
-        msg.points = [point]
-        rospy.loginfo("Sending command:\n" + str(msg))
-        publisher.publish(msg)
+        for name, slot in self.robots.items():
+            if slot.publisher is publisher:
+                return self.send_to_state(name, positions)
 
     def send_arm1_to_state(self, positions):
-        return self.send_arm_to_state(positions, self.arm_1_joint_trajectory_publisher)
+        return self.send_to_state('arm1', positions)
 
     def send_arm2_to_state(self, positions):
-        return self.send_arm_to_state(positions, self.arm_2_joint_trajectory_publisher)
+        return self.send_to_state('arm2', positions)
 
 
 def connect_callbacks(comp_class):
-    comp_state_sub = rospy.Subscriber(
-        "/ariac/competition_state", String, comp_class.comp_state_callback)
-    order_sub = rospy.Subscriber("/ariac/orders", Order, comp_class.order_callback)
-    joint_state_sub = rospy.Subscriber(
-        "/ariac/arm1/joint_states", JointState, comp_class.arm_1_joint_state_callback)
-    joint_state_sub = rospy.Subscriber(
-        "/ariac/arm2/joint_states", JointState, comp_class.arm_2_joint_state_callback)
-    gripper1_state_sub = rospy.Subscriber(
-        "/ariac/arm1/gripper/state", VacuumGripperState, comp_class.arm_1_gripper_state_callback)
-    gripper2_state_sub = rospy.Subscriber(
-        "/ariac/arm2/gripper/state", VacuumGripperState, comp_class.arm_2_gripper_state_callback)
-
-
-def control_agv(shipment_type, agv_num):
-    if agv_num not in (1,2):
-        raise ValueError('agv_num must be 1 or 2')
-
-    rospy.loginfo("Waiting for agv{} control to be ready...".format(agv_num))
-    name = '/ariac/agv{}'.format(agv_num)
-    rospy.wait_for_service(name)
-    rospy.loginfo("agv{} control is now ready.".format(agv_num))
-    rospy.loginfo("Requesting agv control...")
-
-    try:
-        agv_control = rospy.ServiceProxy(name, AGVControl)
-        response = agv_control(shipment_type)
-    except rospy.ServiceException as exc:
-        rospy.logerr("Failed to control the agv: %s" % exc)
-        return False
-    if not response.success:
-        rospy.logerr("Failed to control the agv: %s" % response)
-    else:
-        rospy.loginfo("agv controlled successfully")
-    return response.success
+    comp_class.connect()
 
 
-def submit_shipment(shipment_type, agv_num):
-    if agv_num not in (1,2):
-        raise ValueError('agv_num must be 1 or 2')
+def call_service(name, service_class, description, *args):
+    """ Wait for a service and call it, logging the outcome
 
-    rospy.loginfo("Waiting for submit shipment to be ready...".format(agv_num))
-    name = '/ariac/submit_shipment'
+    Returns:
+    bool: the success field of the response, False if the call failed
+    """
+    rospy.loginfo("Waiting for %s to be ready..." % name)
     rospy.wait_for_service(name)
-    rospy.loginfo("submit_shipment is now ready.")
-    rospy.loginfo("Requesting shipment")
+    rospy.loginfo("Requesting to %s..." % description)
 
     try:
-        submit_shipment = rospy.ServiceProxy(name, SubmitShipment)
-        response = submit_shipment(destination_id=str(agv_num), shipment_type=shipment_type)
+        response = rospy.ServiceProxy(name, service_class)(*args)
     except rospy.ServiceException as exc:
-        rospy.logerr("Failed to submit shipment: %s" % exc)
+        rospy.logerr("Failed to %s: %s" % (description, exc))
         return False
     if not response.success:
-        rospy.logerr("Failed to submit shipment: %s" % response)
+        rospy.logerr("Failed to %s: %s" % (description, response))
     else:
-        rospy.loginfo("shipment submitted successfully")
+        rospy.loginfo("Succeeded to %s" % description)
     return response.success
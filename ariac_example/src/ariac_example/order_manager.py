@@ -0,0 +1,252 @@
+"""Priority queue of the shipments announced on /ariac/orders.
+
+The task manager announces a high-priority order while another one is still
+in progress, and announces updated orders as '<order_id>_update'.  The
+OrderManager keeps every unfinished shipment in a heap ordered by priority and
+announcement time, tells the competitor when the shipment it is working on
+should be put on hold for a more important one, and keeps the progress of the
+preempted shipment so it can be resumed later.  It also records per-order
+latencies in sim time.
+"""
+
+from __future__ import print_function
+
+import heapq
+import itertools
+import threading
+
+import rospy
+
+# Priority the task manager gives to orders that interrupt another order
+HIGH_PRIORITY = 3
+DEFAULT_PRIORITY = 1
+
+
+class ShipmentTask(object):
+    """ A kitting or assembly shipment and the work already done on it """
+
+    def __init__(self, order_id, shipment, kind, priority, received_time):
+        self.order_id = order_id
+        self.shipment = shipment
+        # 'kitting' or 'assembly'
+        self.kind = kind
+        self.priority = priority
+        self.received_time = received_time
+        self.started_time = None
+        self.completed_time = None
+        # Products already placed, kept when the shipment is preempted
+        self.progress = []
+        self.preemptions = 0
+        # AGV the products are placed on, chosen when work on the shipment starts
+        self.agv = None
+
+    @property
+    def shipment_type(self):
+        return self.shipment.shipment_type
+
+    def remaining_products(self):
+        return [p for p in self.shipment.products if p not in self.progress]
+
+    def __repr__(self):
+        return 'ShipmentTask(%s, %s, priority=%d)' % (self.shipment_type, self.kind, self.priority)
+
+
+class OrderManager(object):
+
+    def __init__(self, priority_fn=None):
+        """
+        Args:
+        priority_fn (callable): Called as priority_fn(order, orders_in_progress)
+            to rank a new order. By default an order announced while another
+            one is unfinished is high priority, unless it only has assembly
+            shipments (those follow an AGV reaching its station).
+        """
+        self.priority_fn = priority_fn or self.default_priority
+        self._lock = threading.Condition()
+        self._heap = []
+        self._counter = itertools.count()
+        self.tasks = {}
+        # Shipment being worked on, by kind, as each robot works on one kind
+        self.current = {}
+        self.order_received_times = {}
+        self.order_completed_times = {}
+
+    @staticmethod
+    def default_priority(order, orders_in_progress):
+        if orders_in_progress and order.kitting_shipments:
+            return HIGH_PRIORITY
+        return DEFAULT_PRIORITY
+
+    def order_callback(self, msg):
+        """ Subscriber callback for /ariac/orders """
+        self.add_order(msg, rospy.get_time())
+
+    def add_order(self, order, stamp):
+        with self._lock:
+            if '_update' in order.order_id:
+                self._update_order(order, stamp)
+            else:
+                in_progress = [o for o in self.order_received_times if o not in self.order_completed_times]
+                priority = self.priority_fn(order, in_progress)
+                rospy.loginfo("Order %s received with priority %d" % (order.order_id, priority))
+                self.order_received_times[order.order_id] = stamp
+                self._add_shipments(order.order_id, order, priority, stamp)
+            self._lock.notify_all()
+
+    def _add_shipments(self, order_id, order, priority, stamp, previous=None):
+        previous = previous or {}
+        for kind, shipments in (('kitting', order.kitting_shipments),
+                                ('assembly', order.assembly_shipments)):
+            for shipment in shipments:
+                task = ShipmentTask(order_id, shipment, kind, priority, stamp)
+                old_task = previous.get(shipment.shipment_type)
+                if old_task is not None:
+                    # Keep the products already placed that are still wanted.
+                    # The list is shared rather than copied, so that a product
+                    # the robot is still placing for old_task counts for task too.
+                    old_task.progress[:] = [p for p in old_task.progress if p in shipment.products]
+                    task.progress = old_task.progress
+                    task.started_time = old_task.started_time
+                    task.preemptions = old_task.preemptions
+                    task.agv = old_task.agv
+                self.tasks[shipment.shipment_type] = task
+                self._push(task)
+
+    def _update_order(self, order, stamp):
+        order_id = order.order_id[:order.order_id.find('_update')]
+        rospy.loginfo("Order %s updated" % order_id)
+        priority = DEFAULT_PRIORITY
+        previous = {}
+        for shipment_type, task in list(self.tasks.items()):
+            if task.order_id != order_id:
+                continue
+            priority = task.priority
+            if task.completed_time is None:
+                # Drop the outdated shipment; its heap entry is skipped from now on
+                previous[shipment_type] = self.tasks.pop(shipment_type)
+                if self.current.get(task.kind) is task:
+                    del self.current[task.kind]
+        self._add_shipments(order_id, order, priority, stamp, previous)
+
+    def _push(self, task):
+        heapq.heappush(self._heap, (-task.priority, task.received_time, next(self._counter), task))
+
+    def _peek(self, kinds):
+        """ Highest priority pending task of one of the given kinds, or None """
+        for entry in sorted(self._heap):
+            task = entry[-1]
+            if self._is_pending(task) and task.kind in kinds:
+                return entry
+        return None
+
+    def _is_pending(self, task):
+        return self.tasks.get(task.shipment_type) is task and task.completed_time is None
+
+    def next_shipment(self, kinds=('kitting', 'assembly'), timeout=None):
+        """ Pop the most important pending shipment and make it current
+
+        Blocks for up to timeout seconds of sim time (forever if None) when
+        nothing is pending. Returns None on timeout.
+        """
+        deadline = None if timeout is None else rospy.get_time() + timeout
+        with self._lock:
+            entry = self._peek(kinds)
+            # Wake-ups can be spurious or for an order of another kind
+            while entry is None:
+                remaining = None if deadline is None else deadline - rospy.get_time()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._lock.wait(remaining)
+                entry = self._peek(kinds)
+            self._heap.remove(entry)
+            heapq.heapify(self._heap)
+            task = entry[-1]
+            if task.started_time is None:
+                task.started_time = rospy.get_time()
+            self.current[task.kind] = task
+            return task
+
+    def assign_agv(self, task, agvs):
+        """ Choose the AGV the products of a kitting shipment are placed on
+
+        A shipment keeps its AGV when it is resumed after being put on hold.
+        A shipment that accepts any AGV gets one that does not hold the
+        products of another unfinished shipment.
+
+        Args:
+        task (ShipmentTask): Kitting shipment about to be worked on
+        agvs (list): AGVs the robot can place products on, in order of preference
+
+        Returns:
+        str: the AGV, or None if all of them are in use
+        """
+        with self._lock:
+            if task.agv is None:
+                if task.shipment.agv_id != 'any':
+                    task.agv = task.shipment.agv_id
+                else:
+                    in_use = set(t.agv for t in self.tasks.values()
+                                 if t is not task and t.completed_time is None)
+                    free = [agv for agv in agvs if agv not in in_use]
+                    task.agv = free[0] if free else None
+            return task.agv
+
+    def should_preempt(self, task, kinds=('kitting', 'assembly')):
+        """ Whether work on task should stop
+
+        This is the case when a pending shipment outranks it, or when its
+        order was updated and task no longer describes the shipment.
+        """
+        with self._lock:
+            if self.current.get(task.kind) is not task:
+                return True
+            entry = self._peek(kinds)
+            return entry is not None and entry[-1].priority > task.priority
+
+    def preempt(self, task):
+        """ Put a shipment back in the queue, keeping its progress """
+        with self._lock:
+            rospy.loginfo("Putting shipment %s on hold" % task.shipment_type)
+            task.preemptions += 1
+            if self.current.get(task.kind) is task:
+                del self.current[task.kind]
+            if self._is_pending(task):
+                self._push(task)
+
+    def complete(self, task):
+        """ Mark a shipment as submitted """
+        with self._lock:
+            task.completed_time = rospy.get_time()
+            if self.current.get(task.kind) is task:
+                del self.current[task.kind]
+            remaining = [t for t in self.tasks.values()
+                         if t.order_id == task.order_id and t.completed_time is None]
+            if not remaining:
+                self.order_completed_times[task.order_id] = task.completed_time
+
+    def has_pending(self, kinds=('kitting', 'assembly')):
+        with self._lock:
+            return self._peek(kinds) is not None
+
+    def metrics(self):
+        """ Per-order latencies in seconds of sim time
+
+        Returns:
+        dict: order_id -> dict with the received and completed times, the
+            latency from announcement to the last submitted shipment, and the
+            number of times its shipments were preempted
+        """
+        with self._lock:
+            result = {}
+            for order_id, received in self.order_received_times.items():
+                completed = self.order_completed_times.get(order_id)
+                tasks = [t for t in self.tasks.values() if t.order_id == order_id]
+                started = [t.started_time for t in tasks if t.started_time is not None]
+                result[order_id] = {
+                    'received': received,
+                    'started': min(started) if started else None,
+                    'completed': completed,
+                    'latency': completed - received if completed is not None else None,
+                    'preemptions': sum(t.preemptions for t in tasks),
+                }
+            return result
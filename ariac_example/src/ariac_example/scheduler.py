@@ -0,0 +1,114 @@
+"""Run the task queues of several robots concurrently.
+
+Each robot gets a single worker thread, so its own tasks still execute in
+order, while tasks of different robots overlap.  Regions that both robots can
+reach (the AGVs, the assembly stations) are guarded by named locks: a task
+reserves the regions it needs before moving into them.
+"""
+
+from __future__ import print_function
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+import rospy
+
+
+class WorkspaceManager(object):
+    """ Named locks around workspace regions shared by several robots """
+
+    def __init__(self, regions=()):
+        self._guard = threading.Lock()
+        self._locks = {}
+        self._owners = {}
+        for region in regions:
+            self._lock_for(region)
+
+    def _lock_for(self, region):
+        with self._guard:
+            if region not in self._locks:
+                self._locks[region] = threading.RLock()
+            return self._locks[region]
+
+    @contextmanager
+    def reserve(self, *regions):
+        """ Block until all regions are free and hold them for the with-block
+
+        Reservations are re-entrant, so a task may reserve a region it
+        already holds.
+
+        Regions are always acquired in sorted order so that two tasks
+        reserving overlapping sets of regions cannot deadlock.
+        """
+        regions = sorted(set(r for r in regions if r))
+        owner = threading.current_thread().name
+        acquired = []
+        try:
+            for region in regions:
+                lock = self._lock_for(region)
+                if not lock.acquire(False):
+                    rospy.loginfo("%s waiting for %s (held by %s)" % (
+                        owner, region, self._owners.get(region)))
+                    lock.acquire()
+                self._owners[region] = owner
+                acquired.append(region)
+            yield
+        finally:
+            for region in reversed(acquired):
+                self._owners.pop(region, None)
+                self._locks[region].release()
+
+    def owner(self, region):
+        """ Name of the thread currently holding region, or None """
+        return self._owners.get(region)
+
+
+class ExecutionScheduler(object):
+    """ One task queue per robot, all queues running at the same time """
+
+    def __init__(self, robot_names, workspace=None):
+        self.workspace = workspace or WorkspaceManager()
+        self.executors = {}
+        for name in robot_names:
+            self.executors[name] = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=name)
+        self.futures = []
+
+    def submit(self, robot_name, func, *args, **kwargs):
+        """ Queue func(*args, **kwargs) on the given robot
+
+        Pass regions=[...] to hold those workspace regions for the whole task.
+        Tasks that only need a region for part of their motion should reserve
+        it themselves through self.workspace.reserve().
+
+        Returns:
+        concurrent.futures.Future: resolves to the return value of func
+        """
+        regions = kwargs.pop('regions', ())
+        executor = self.executors[robot_name]
+
+        def task():
+            with self.workspace.reserve(*regions):
+                return func(*args, **kwargs)
+
+        future = executor.submit(task)
+        self.futures.append(future)
+        return future
+
+    def wait(self, futures=None, timeout=None):
+        """ Block until the given tasks (by default all submitted tasks) finish
+
+        Exceptions raised by a task are re-raised here.
+        """
+        futures = self.futures if futures is None else futures
+        done, not_done = wait(futures, timeout=timeout)
+        for future in done:
+            future.result()
+        if futures is self.futures:
+            self.futures = list(not_done)
+        return not not_done
+
+    def shutdown(self, wait=True):
+        for executor in self.executors.values():
+            executor.shutdown(wait=wait)
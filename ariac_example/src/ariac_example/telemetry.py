@@ -0,0 +1,222 @@
+"""Record joint and gripper state streams at full topic rate.
+
+Every message is appended to a preallocated NumPy ring buffer, so recording
+costs a few array writes per message and never allocates.  The recorded
+history can be snapshotted, exported to an .npz file, or queried for the
+state at a given time, which is enough to analyse motion and cycle times
+without recording a rosbag.
+"""
+
+from __future__ import print_function
+
+import os
+import threading
+
+import numpy as np
+import rospy
+
+
+class RingBuffer(object):
+    """ Fixed-size buffer of timestamped rows, overwriting the oldest row """
+
+    def __init__(self, capacity, width, filename=None):
+        """
+        Args:
+        capacity (int): Number of rows kept before the oldest are overwritten
+        width (int): Number of values per row
+        filename (str): If given, the rows are kept in a memory-mapped file
+            with the time in the first column
+        """
+        self.capacity = capacity
+        self.width = width
+        self.filename = filename
+        if filename:
+            self._buffer = np.memmap(filename, dtype=np.float64, mode='w+',
+                                     shape=(capacity, width + 1))
+        else:
+            self._buffer = np.zeros((capacity, width + 1))
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def append(self, stamp, *parts):
+        """ Write one row; the parts are sequences filling the row in order """
+        with self._lock:
+            row = self._buffer[self._count % self.capacity]
+            row[0] = stamp
+            column = 1
+            for part in parts:
+                row[column:column + len(part)] = part
+                column += len(part)
+            self._count += 1
+
+    def snapshot(self):
+        """ Return (times, values) copies ordered from oldest to newest """
+        with self._lock:
+            count = self._count
+            if count <= self.capacity:
+                rows = self._buffer[:count].copy()
+            else:
+                start = count % self.capacity
+                rows = np.concatenate((self._buffer[start:], self._buffer[:start]))
+        return rows[:, 0], rows[:, 1:]
+
+    def at(self, stamp):
+        """ Return (time, values) of the last row recorded at or before stamp
+
+        Returns None if nothing was recorded before stamp, or if that part of
+        the history has already been overwritten.
+        """
+        with self._lock:
+            size = min(self._count, self.capacity)
+            # Once full, the oldest row is the one written next
+            start = self._count % self.capacity if self._count > self.capacity else 0
+            # Binary search in place over the rows in time order; the i-th
+            # oldest row is at (start + i) % capacity
+            low, high = 0, size
+            while low < high:
+                middle = (low + high) // 2
+                if self._buffer[(start + middle) % self.capacity, 0] <= stamp:
+                    low = middle + 1
+                else:
+                    high = middle
+            if low == 0:
+                return None
+            row = self._buffer[(start + low - 1) % self.capacity]
+            return float(row[0]), row[1:].copy()
+
+    def flush(self):
+        if self.filename:
+            self._buffer.flush()
+
+
+class TelemetryRecorder(object):
+    """ Ring buffers of joint and gripper states, one per named stream """
+
+    GRIPPER_COLUMNS = ['enabled', 'attached']
+
+    def __init__(self, capacity=60000, directory=None):
+        """
+        Args:
+        capacity (int): Rows kept per stream; 60000 is 10 minutes at 100 Hz
+        directory (str): If given, streams are memory-mapped into files in
+            this directory instead of being kept in RAM
+        """
+        self.capacity = capacity
+        self.directory = directory
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.buffers = {}
+        self.columns = {}
+        # Joint names of each joint state stream, in the order of its columns
+        self.joint_names = {}
+        # (stream, joint names of a message) -> indices putting them in the
+        # stream's order, or None if the message has other joints
+        self._joint_orders = {}
+        # Stand-in for messages that carry no velocities
+        self._zeros = np.zeros(64)
+
+    def _buffer_for(self, name, columns):
+        buff = self.buffers.get(name)
+        if buff is None:
+            filename = None
+            if self.directory:
+                filename = os.path.join(self.directory, name.strip('/').replace('/', '_') + '.dat')
+            buff = RingBuffer(self.capacity, len(columns), filename)
+            self.columns[name] = columns
+            self.buffers[name] = buff
+        return buff
+
+    def record_joint_state(self, name, msg):
+        """ Append the positions and velocities of a sensor_msgs/JointState
+
+        The columns follow the joint order of the first message of the
+        stream; later messages listing the same joints in another order are
+        reordered to it.
+        """
+        joint_names = self.joint_names.get(name)
+        if joint_names is None:
+            joint_names = list(msg.name)
+            self.joint_names[name] = joint_names
+            columns = [j + '/position' for j in joint_names] + [j + '/velocity' for j in joint_names]
+            self._buffer_for(name, columns)
+        buff = self.buffers[name]
+        num_joints = len(msg.position)
+        if num_joints != len(msg.name):
+            rospy.logwarn_once("Joint state stream %s has names and positions of different lengths, "
+                               "dropping messages" % name)
+            return
+        position = msg.position
+        velocity = msg.velocity
+        if len(velocity) != num_joints:
+            if num_joints > len(self._zeros):
+                self._zeros = np.zeros(num_joints)
+            velocity = self._zeros[:num_joints]
+        if msg.name != joint_names:
+            order = self._joint_order(name, msg.name)
+            if order is None:
+                # The set of joints in the message changed; keep the old stream intact
+                rospy.logwarn_once("Joint state stream %s changed joints, dropping messages" % name)
+                return
+            position = np.asarray(position)[order]
+            velocity = np.asarray(velocity)[order]
+        buff.append(self._stamp(msg), position, velocity)
+
+    def _joint_order(self, name, msg_joint_names):
+        """ Indices putting the joints of a message in the order of stream name """
+        key = (name, tuple(msg_joint_names))
+        if key not in self._joint_orders:
+            joint_names = self.joint_names[name]
+            order = None
+            if sorted(msg_joint_names) == sorted(joint_names):
+                index = dict((joint, i) for i, joint in enumerate(msg_joint_names))
+                order = np.array([index[joint] for joint in joint_names])
+            self._joint_orders[key] = order
+        return self._joint_orders[key]
+
+    def record_gripper_state(self, name, msg):
+        """ Append the flags of a nist_gear/VacuumGripperState """
+        buff = self._buffer_for(name, self.GRIPPER_COLUMNS)
+        buff.append(rospy.get_time(), (msg.enabled, msg.attached))
+
+    def state_at(self, name, stamp):
+        """ Return a dict of column -> value for stream name at time stamp """
+        result = self.buffers[name].at(stamp)
+        if result is None:
+            return None
+        _, values = result
+        return dict(zip(self.columns[name], values))
+
+    def snapshot(self, name):
+        """ Return (times, values, columns) of stream name """
+        times, values = self.buffers[name].snapshot()
+        return times, values, self.columns[name]
+
+    def export(self, path):
+        """ Write all streams to an .npz file
+
+        For each stream <name> the file holds the arrays <name>/time,
+        <name>/values and <name>/columns.
+        """
+        arrays = {}
+        for name in self.buffers:
+            times, values, columns = self.snapshot(name)
+            key = name.strip('/')
+            arrays[key + '/time'] = times
+            arrays[key + '/values'] = values
+            arrays[key + '/columns'] = np.array(columns)
+        np.savez_compressed(path, **arrays)
+        rospy.loginfo("Exported %d telemetry streams to %s" % (len(self.buffers), path))
+
+    def flush(self):
+        for buff in self.buffers.values():
+            buff.flush()
+
+    @staticmethod
+    def _stamp(msg):
+        stamp = msg.header.stamp
+        if stamp.secs == 0 and stamp.nsecs == 0:
+            return rospy.get_time()
+        return stamp.to_sec()
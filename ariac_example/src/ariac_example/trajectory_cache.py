@@ -0,0 +1,111 @@
+"""Cache of planned trajectories between named preset locations.
+
+Moving between two presets ('home', 'standby', a bin, an AGV) always starts
+and ends at the same joint configuration, so the plan MoveIt computes for one
+pick cycle can be replayed on the next one.  Trajectories are keyed on
+(group, start preset, goal preset) and are only reused when the current joint
+state still matches the first point of the cached trajectory.
+"""
+
+from __future__ import print_function
+
+import os
+import pickle
+from io import BytesIO
+
+import rospy
+from moveit_msgs.msg import RobotTrajectory
+
+
+class TrajectoryCache(object):
+
+    def __init__(self, path=None, tolerance=0.01):
+        """
+        Args:
+        path (str): File used to persist the cache across runs. Nothing is
+            loaded or saved when this is None.
+        tolerance (float): Maximum per-joint difference (rad or m) between the
+            current joint state and the start of a cached trajectory.
+        """
+        self.path = path
+        self.tolerance = tolerance
+        self.trajectories = {}
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def get(self, group_name, start, goal, current_joints):
+        """ Return the cached trajectory from start to goal, or None
+
+        Args:
+        group_name (str): Name of the MoveIt group the trajectory was planned for
+        start (str): Name of the preset the robot is currently at
+        goal (str): Name of the preset to move to
+        current_joints (dict): Current joint positions keyed by joint name
+
+        Returns:
+        RobotTrajectory: the cached plan, if one exists and starts at the
+            current joint state
+        """
+        trajectory = self.trajectories.get((group_name, start, goal))
+        if trajectory is None or not self._starts_at(trajectory, current_joints):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return trajectory
+
+    def put(self, group_name, start, goal, trajectory):
+        """ Store a successfully executed trajectory from start to goal """
+        if start is None or not trajectory.joint_trajectory.points:
+            return
+        self.trajectories[(group_name, start, goal)] = trajectory
+
+    def invalidate(self, group_name, start, goal):
+        """ Drop a cached trajectory, e.g. after it failed to execute """
+        self.trajectories.pop((group_name, start, goal), None)
+
+    def clear(self):
+        self.trajectories.clear()
+
+    def save(self, path=None):
+        """ Write the cache to disk as serialized RobotTrajectory messages """
+        path = path or self.path
+        if not path:
+            return
+        serialized = {}
+        for key, trajectory in self.trajectories.items():
+            buff = BytesIO()
+            trajectory.serialize(buff)
+            serialized[key] = buff.getvalue()
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(path, 'wb') as f:
+            pickle.dump(serialized, f, protocol=2)
+        rospy.loginfo("Saved %d cached trajectories to %s" % (len(serialized), path))
+
+    def load(self, path=None):
+        """ Read a cache previously written by save() """
+        path = path or self.path
+        try:
+            with open(path, 'rb') as f:
+                serialized = pickle.load(f)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError) as exc:
+            rospy.logwarn("Failed to load trajectory cache %s: %s" % (path, exc))
+            return
+        for key, data in serialized.items():
+            trajectory = RobotTrajectory()
+            trajectory.deserialize(data)
+            self.trajectories[tuple(key)] = trajectory
+        rospy.loginfo("Loaded %d cached trajectories from %s" % (len(serialized), path))
+
+    def _starts_at(self, trajectory, current_joints):
+        joint_names = trajectory.joint_trajectory.joint_names
+        first_point = trajectory.joint_trajectory.points[0]
+        for name, position in zip(joint_names, first_point.positions):
+            if name not in current_joints:
+                return False
+            if abs(current_joints[name] - position) > self.tolerance:
+                return False
+        return True
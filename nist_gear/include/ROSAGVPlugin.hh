@@ -51,6 +51,10 @@ namespace gazebo
   public:
     void Load(physics::ModelPtr _parent, sdf::ElementPtr _sdf);
 
+    /// \brief Stop any delivery in progress when the world is reset.
+  public:
+    virtual void Reset();
+
     /**
      * @brief Provides the service for controlling a AGV
      * 
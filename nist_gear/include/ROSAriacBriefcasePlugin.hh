@@ -21,6 +21,8 @@
 #ifndef _GAZEBO_BRIEFCASE_PLUGIN_HH_
 #define _GAZEBO_BRIEFCASE_PLUGIN_HH_
 
+#include <memory>
+#include <set>
 #include <string>
 
 #include <ros/ros.h>
@@ -76,6 +78,9 @@ namespace gazebo
     /// \brief Publish the Assembly ROS message
     protected: void PublishAssemblyMsg();
 
+    /// \brief Whether the assembly changed since the last published message
+    protected: bool AssemblyChanged();
+
     /// \brief Service for locking the models to the briefcase and disabling updates
     protected: void HandleLockModelsRequest(ConstGzStringPtr &_msg);
 
@@ -92,6 +97,19 @@ namespace gazebo
     /// \brief Assembly which is currently in the briefcase
     protected: ariac::Assembly current_assembly;
 
+    /// \brief Assembly as last published
+    protected: ariac::Assembly published_assembly;
+
+    /// \brief A product moving less than this (m, rad) does not cause a new message
+    protected: double position_tolerance = 0.001;
+    protected: double orientation_tolerance = 0.005;
+
+    /// \brief Sim time between two messages when nothing changes (0: every update)
+    protected: double heartbeat_period = 1.0;
+
+    /// \brief Sim time of the last heartbeat
+    protected: common::Time last_heartbeat_time;
+
     /// \brief ID of briefcase
     protected: std::string briefcase_id;
 
@@ -136,7 +154,10 @@ namespace gazebo
     /// \brief Parts to ignore (will be published as faulty in briefcase msgs)
     /// The namespace of the part (e.g. bin7) is ignored.
     /// e.g. if model_name1 is faulty, either bin7|model_name1 or bin6|model_name1 will be considered faulty
-    protected: std::vector<std::string> faulty_part_names;
+    protected: std::set<std::string> faulty_part_names;
+
+    /// \brief Types of the models seen and whether they are faulty
+    protected: std::shared_ptr<ariac::ModelNameCache> model_name_cache;
 
     /// \brief Gazebo subscriber to the lock models topic
     protected: transport::SubscriberPtr lock_models_sub;
@@ -21,6 +21,8 @@
 #ifndef _GAZEBO_GANTRY_TRAY_PLUGIN_HH_
 #define _GAZEBO_GANTRY_TRAY_PLUGIN_HH_
 
+#include <memory>
+#include <set>
 #include <string>
 
 #include <ros/ros.h>
@@ -151,7 +153,11 @@ namespace gazebo
         /// The namespace of the part (e.g. bin7) is ignored.
         /// e.g. if model_name1 is faulty, either bin7|model_name1 or bin6|model_name1 will be considered faulty
     protected:
-        std::vector<std::string> faultyPartNames;
+        std::set<std::string> faultyPartNames;
+
+        /// \brief Types of the models seen and whether they are faulty
+    protected:
+        std::shared_ptr<ariac::ModelNameCache> modelNameCache;
 
         /// \brief Gazebo subscriber to the lock models topic
     // protected:
@@ -21,6 +21,8 @@
 #ifndef _GAZEBO_KIT_TRAY_PLUGIN_HH_
 #define _GAZEBO_KIT_TRAY_PLUGIN_HH_
 
+#include <memory>
+#include <set>
 #include <string>
 
 #include <ros/ros.h>
@@ -77,6 +79,12 @@ namespace gazebo
     /// \brief Publish the Kit ROS message
     protected: void PublishKitMsg();
 
+    /// \brief Station where the AGV carrying the tray currently is
+    protected: std::string CurrentStation();
+
+    /// \brief Whether the kit or the station changed since the last published message
+    protected: bool KitChanged();
+
     /// \brief Service for locking the models to the tray and disabling updates
     protected: void HandleLockModelsRequest(ConstGzStringPtr &_msg);
 
@@ -93,6 +101,20 @@ namespace gazebo
     /// \brief Kit which is currently on the tray
     protected: ariac::Kit currentKit;
 
+    /// \brief Kit and station as last published
+    protected: ariac::Kit publishedKit;
+    protected: std::string publishedStation;
+
+    /// \brief A product moving less than this (m, rad) does not cause a new message
+    protected: double positionTolerance = 0.001;
+    protected: double orientationTolerance = 0.005;
+
+    /// \brief Sim time between two messages when nothing changes (0: every update)
+    protected: double heartbeatPeriod = 1.0;
+
+    /// \brief Sim time of the last heartbeat
+    protected: common::Time lastHeartbeatTime;
+
     /// \brief ID of tray
     protected: std::string trayID;
 
@@ -136,23 +158,20 @@ namespace gazebo
     /// \brief Parts to ignore (will be published as faulty in tray msgs)
     /// The namespace of the part (e.g. bin7) is ignored.
     /// e.g. if model_name1 is faulty, either bin7|model_name1 or bin6|model_name1 will be considered faulty
-    protected: std::vector<std::string> faultyPartNames;
+    protected: std::set<std::string> faultyPartNames;
+
+    /// \brief Types of the models seen and whether they are faulty
+    protected: std::shared_ptr<ariac::ModelNameCache> modelNameCache;
 
     /// \brief Gazebo subscriber to the lock models topic
     protected: transport::SubscriberPtr lockModelsSub;
 
-    ros::Subscriber agv1LocationSubscriber;
-    ros::Subscriber agv2LocationSubscriber;
-    ros::Subscriber agv3LocationSubscriber;
-    ros::Subscriber agv4LocationSubscriber;
-    std::string agv1CurrentStation;
-    std::string agv2CurrentStation;
-    std::string agv3CurrentStation;
-    std::string agv4CurrentStation;
-    void OnAGV1Location(std_msgs::String::ConstPtr msg);
-    void OnAGV2Location(std_msgs::String::ConstPtr msg);
-    void OnAGV3Location(std_msgs::String::ConstPtr msg);
-    void OnAGV4Location(std_msgs::String::ConstPtr msg);
+    /// \brief Subscriber to the station of the AGV carrying the tray
+    ros::Subscriber agvLocationSubscriber;
+    /// \brief Last station received for the AGV carrying the tray
+    std::string agvCurrentStation;
+    /// \brief Callback for the station of the AGV carrying the tray
+    void OnAGVLocation(std_msgs::String::ConstPtr msg);
   };
 }
 #endif
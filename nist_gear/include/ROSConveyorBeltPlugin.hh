@@ -25,6 +25,8 @@
 
 // ROS
 #include <nist_gear/ConveyorBeltControl.h>
+#include <nist_gear/ConveyorBeltState.h>
+#include <nist_gear/SnapshotPublisher.hh>
 #include <ros/ros.h>
 
 namespace gazebo
@@ -62,8 +64,10 @@ namespace gazebo
     /// \brief Receives service calls to control the conveyor belt.
     public: ros::ServiceServer controlService_;
 
-    /// \brief Publishes the state of the conveyor.
-    public: ros::Publisher statePub;
+    /// \brief Publishes the state of the conveyor. Mutable because it is
+    /// updated from Publish(), which is const.
+    private: mutable ariac::SnapshotPublisher<nist_gear::ConveyorBeltState>
+      statePublisher;
   };
 }
 #endif
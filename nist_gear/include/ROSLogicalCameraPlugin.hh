@@ -18,6 +18,10 @@
 #ifndef _ROS_LOGICAL_CAMERA_PLUGIN_HH_
 #define _ROS_LOGICAL_CAMERA_PLUGIN_HH_
 
+#include <map>
+#include <memory>
+#include <mutex>
+#include <set>
 #include <string>
 #include <vector>
 
@@ -33,6 +37,8 @@
 #include "gazebo/transport/TransportTypes.hh"
 #include <ignition/math/Pose3.hh>
 
+#include "nist_gear/ARIAC.hh"
+
 // ROS
 #include "nist_gear/LogicalCameraImage.h"
 #include <ros/ros.h>
@@ -78,7 +84,17 @@ namespace gazebo
     public: void OnImage(ConstLogicalCameraImagePtr &_msg);
 
     /// \brief Determine if the model is one that should be published
-    protected: bool ModelToPublish(const std::string & modelName, const std::string & modelType);
+    protected: bool ModelToPublish(const ariac::ModelNameInfo & modelInfo);
+
+    /// \brief Models nested in a model, from the cache when possible
+    /// \param[in] modelName Name of the model in the world
+    protected: physics::Model_V NestedModels(const std::string & modelName);
+
+    /// \brief Forget the cached nested models, called when models are added or removed
+    protected: void ClearNestedModels(const std::string & entityName);
+
+    /// \brief True if ROS debug messages of this plugin are printed
+    protected: static bool DebugLoggingEnabled();
 
     /// \brief Add noise to a model pose
     protected: void AddNoise(ignition::math::Pose3d & pose);
@@ -123,11 +139,24 @@ namespace gazebo
     protected: bool onlyPublishKnownModels;
 
     /// \brief Whitelist of the known model types to detect
-    protected: std::vector<std::string> knownModelTypes;
+    protected: std::set<std::string> knownModelTypes;
 
     /// \brief Whitelist of known models by name (independent of the namespace (e.g. bin7)).
     /// e.g. if model_name1 is whitelisted, both bin7|model_name1 and bin6|model_name1 will be published
-    protected: std::vector<std::string> knownModelNames;
+    protected: std::set<std::string> knownModelNames;
+
+    /// \brief Types and ids of the models seen and whether they are published
+    protected: std::shared_ptr<ariac::ModelNameCache> modelNameCache;
+
+    /// \brief Nested models of the models seen, by model name
+    protected: std::map<std::string, physics::Model_V> nestedModelsCache;
+
+    /// \brief Protects nestedModelsCache, used by the image and world threads
+    protected: std::mutex nestedModelsMutex;
+
+    /// \brief Connections to the model insertion and deletion events
+    protected: event::ConnectionPtr addEntityConnection;
+    protected: event::ConnectionPtr deleteEntityConnection;
 
     /// \brief If true, detected model type will be anonymized
     protected: bool anonymizeModels;
@@ -17,12 +17,20 @@
 #ifndef _ARIAC_HH_
 #define _ARIAC_HH_
 
+#include <algorithm>
+#include <cmath>
+#include <functional>
 #include <ostream>
 #include <map>
+#include <memory>
+#include <mutex>
 #include <string>
+#include <unordered_map>
 #include <vector>
 
 #include <gazebo/gazebo.hh>
+#include <gazebo/physics/PhysicsIface.hh>
+#include <gazebo/physics/World.hh>
 #include <ignition/math/Pose3.hh>
 
 namespace ariac
@@ -557,6 +565,277 @@ namespace ariac
     return modelId;
   }
 
+  /// \brief What TrimNamespace, DetermineModelType and DetermineModelId
+  /// return for a model name, and how the plugin owning the cache treats it.
+  struct ModelNameInfo
+  {
+    /// \brief Model name without namespace
+    std::string trimmedName;
+    /// \brief Model type, e.g. "pulley_part_red"
+    std::string type;
+    /// \brief Model id, the number at the end of the name
+    std::string id;
+    /// \brief True if the model is one of the faulty parts of the plugin
+    bool faulty = false;
+    /// \brief True if the plugin publishes the model
+    bool publish = true;
+  };
+
+  /////////////////////////////////////////////////////////////
+  /// \brief Cache of the information derived from model names.
+  ///
+  /// Plugins that look at many models on every update (logical cameras,
+  /// trays) parse each name once instead of every time they see the model,
+  /// and decide once whether the model is faulty or published.  Each plugin
+  /// owns its cache, since those decisions depend on the plugin's own
+  /// configuration; an entry is dropped when a model with its name is
+  /// inserted or deleted.
+  /////////////////////////////////////////////////////////////
+  class ModelNameCache
+  {
+    /// \brief Fills the faulty and publish flags of a parsed model name.
+  public:
+    using Classifier = std::function<void(ModelNameInfo &)>;
+
+    /// \brief Constructor.
+    /// \param[in] _classifier Called once per model name, after the name is
+    /// parsed. The flags keep their defaults when it is empty.
+  public:
+    explicit ModelNameCache(Classifier _classifier = Classifier())
+      : classifier(_classifier)
+    {
+      auto invalidate = [this](const std::string &_name) { this->Invalidate(_name); };
+      this->addEntityConnection = event::Events::ConnectAddEntity(invalidate);
+      this->deleteEntityConnection = event::Events::ConnectDeleteEntity(invalidate);
+    }
+
+    /// \brief Get the information about a model name, parsing it if needed.
+    /// \param[in] _modelName Model name, possibly with namespace.
+    /// \return The information, valid even after the entry is dropped.
+  public:
+    std::shared_ptr<const ModelNameInfo> Resolve(const std::string &_modelName)
+    {
+      std::lock_guard<std::mutex> lock(this->mutex);
+      auto it = this->entries.find(_modelName);
+      if (it != this->entries.end())
+      {
+        return it->second;
+      }
+      std::shared_ptr<ModelNameInfo> info(new ModelNameInfo());
+      info->trimmedName = TrimNamespace(_modelName);
+      info->type = DetermineModelType(_modelName);
+      info->id = DetermineModelId(_modelName);
+      if (this->classifier)
+      {
+        this->classifier(*info);
+      }
+      this->entries[_modelName] = info;
+      return info;
+    }
+
+    /// \brief Drop the entry of a model name.
+    /// \param[in] _modelName Model name, as given to Resolve().
+  public:
+    void Invalidate(const std::string &_modelName)
+    {
+      std::lock_guard<std::mutex> lock(this->mutex);
+      this->entries.erase(_modelName);
+    }
+
+    /// \brief Fills the flags of new entries.
+  private:
+    Classifier classifier;
+
+    /// \brief Protects entries.
+  private:
+    std::mutex mutex;
+
+    /// \brief Parsed information, by model name.
+  private:
+    std::map<std::string, std::shared_ptr<const ModelNameInfo>> entries;
+
+    /// \brief Connections to the model insertion and deletion events.
+  private:
+    event::ConnectionPtr addEntityConnection;
+    event::ConnectionPtr deleteEntityConnection;
+  };
+
+  /// \brief Whether a pose moved away from another one by more than a tolerance
+  /// \param[in] _pose The new pose.
+  /// \param[in] _previous The pose to compare with.
+  /// \param[in] _positionTolerance Distance in meters.
+  /// \param[in] _orientationTolerance Angle in radians.
+  inline bool PoseChanged(const ignition::math::Pose3d &_pose, const ignition::math::Pose3d &_previous,
+                          double _positionTolerance, double _orientationTolerance)
+  {
+    if (_pose.Pos().Distance(_previous.Pos()) > _positionTolerance)
+    {
+      return true;
+    }
+    // Angle of the rotation from one orientation to the other
+    double dot = std::min(1.0, std::abs(_pose.Rot().Dot(_previous.Rot())));
+    return 2 * std::acos(dot) > _orientationTolerance;
+  }
+
+  /// \brief What the plugins need to know about an AGV.
+  class AgvInfo
+  {
+    /// \brief Index of the AGV, starting at 1.
+  public:
+    int id = 0;
+
+    /// \brief Name of the AGV model, e.g. "agv1".
+  public:
+    std::string name;
+
+    /// \brief Topic on which the station of the AGV is published.
+  public:
+    std::string stationTopic;
+
+    /// \brief Name of the kit tray carried by the AGV, e.g. "kit_tray_1".
+  public:
+    std::string kitTray;
+
+    /// \brief TF frame of the kit tray, without prefix.
+  public:
+    std::string kitTrayFrame;
+
+    /// \brief Assembly stations the AGV can go to, e.g. {"as1", "as2"}.
+  public:
+    std::vector<std::string> assemblyStations;
+  };
+
+  /// \brief Name of the assembly station an AGV element has an animation
+  /// service for, e.g. "as1" for <to_as1_name>.
+  /// \param[in] _elementName Name of a child element of an <agv> element.
+  /// \return The station, or an empty string for other elements.
+  inline std::string AnimatedAssemblyStation(const std::string &_elementName)
+  {
+    const std::string prefix = "to_";
+    const std::string suffix = "_name";
+    if (_elementName.size() <= prefix.size() + suffix.size() ||
+        _elementName.compare(0, prefix.size(), prefix) != 0 ||
+        _elementName.compare(_elementName.size() - suffix.size(), suffix.size(), suffix) != 0)
+    {
+      return "";
+    }
+    return _elementName.substr(prefix.size(), _elementName.size() - prefix.size() - suffix.size());
+  }
+
+  /// \brief Table of the AGVs, shared by all the plugins.
+  ///
+  /// The AGVs are those of the <agv> elements of the world plugins, e.g. the
+  /// task manager, that have an <agv_location_topic>.
+  class AgvRegistry
+  {
+    /// \brief The registry of the AGVs of the world, read on first use.
+  public:
+    static const AgvRegistry &Instance()
+    {
+      static const AgvRegistry registry(WorldSdf());
+      return registry;
+    }
+
+    /// \brief Get an AGV by index.
+    /// \param[in] _id Index of the AGV, starting at 1.
+    /// \return The AGV, or null if there is none with this index.
+  public:
+    const AgvInfo *Find(int _id) const
+    {
+      auto it = this->agvs.find(_id);
+      if (it == this->agvs.end())
+      {
+        return nullptr;
+      }
+      return &it->second;
+    }
+
+    /// \brief Get an AGV by the name of its model or of its kit tray.
+    /// \param[in] _name e.g. "agv1" or "kit_tray_1".
+    /// \return The AGV, or null if no AGV has this name.
+  public:
+    const AgvInfo *Find(const std::string &_name) const
+    {
+      auto it = this->byName.find(_name);
+      if (it == this->byName.end())
+      {
+        return nullptr;
+      }
+      return this->Find(it->second);
+    }
+
+    /// \brief All the AGVs, by index.
+  public:
+    const std::map<int, AgvInfo> &Agvs() const
+    {
+      return this->agvs;
+    }
+
+    /// \brief SDF of the loaded world.
+    /// \return The SDF, or null if no world is loaded.
+  private:
+    static sdf::ElementPtr WorldSdf()
+    {
+      auto world = physics::get_world();
+      if (!world)
+      {
+        return nullptr;
+      }
+      return world->SDF();
+    }
+
+    /// \brief Constructor, use Instance() instead.
+    /// \param[in] _worldSdf SDF of the world, may be null.
+  private:
+    explicit AgvRegistry(sdf::ElementPtr _worldSdf)
+    {
+      if (!_worldSdf || !_worldSdf->HasElement("plugin"))
+      {
+        return;
+      }
+      for (auto pluginElem = _worldSdf->GetElement("plugin"); pluginElem;
+           pluginElem = pluginElem->GetNextElement("plugin"))
+      {
+        if (!pluginElem->HasElement("agv"))
+        {
+          continue;
+        }
+        for (auto agvElem = pluginElem->GetElement("agv"); agvElem; agvElem = agvElem->GetNextElement("agv"))
+        {
+          if (!agvElem->HasElement("agv_location_topic"))
+          {
+            continue;
+          }
+          AgvInfo agv;
+          agv.id = agvElem->Get<int>("index");
+          agv.name = "agv" + std::to_string(agv.id);
+          agv.stationTopic = agvElem->Get<std::string>("agv_location_topic");
+          agv.kitTray = "kit_tray_" + std::to_string(agv.id);
+          agv.kitTrayFrame = agv.kitTray + "_frame";
+          for (auto elem = agvElem->GetFirstElement(); elem; elem = elem->GetNextElement())
+          {
+            std::string station = AnimatedAssemblyStation(elem->GetName());
+            if (!station.empty())
+            {
+              agv.assemblyStations.push_back(station);
+            }
+          }
+          this->byName[agv.name] = agv.id;
+          this->byName[agv.kitTray] = agv.id;
+          this->agvs[agv.id] = agv;
+        }
+      }
+    }
+
+    /// \brief The AGVs, by index.
+  private:
+    std::map<int, AgvInfo> agvs;
+
+    /// \brief Index of the AGVs, by AGV and kit tray name.
+  private:
+    std::unordered_map<std::string, int> byName;
+  };
+
   /////////////////////////////////////////////////////////////
   /// \brief Class to store information about each product contained in a shipment.
   /////////////////////////////////////////////////////////////
@@ -136,11 +136,23 @@ public:
 public:
   void NotifyArmArmCollision(gazebo::common::Time time);
 
+  /// \brief Forget all orders, shipments and collisions
+public:
+  void Reset();
+
   /// \brief Get the current score.
+  /// The score is only computed again after an event that could change it,
+  /// see GetScoreVersion().
   /// \return The score for the game.
 public:
   ariac::GameScore GetGameScore(int penalty);
 
+  /// \brief Number of events that could have changed the score so far.
+  /// Callers polling the score only need to call GetGameScore() when this
+  /// (or the penalty) changed since their last call.
+public:
+  uint64_t GetScoreVersion() const;
+
   /// \brief Score a single shipment
   /// \return The score for the game.
 public:
@@ -174,6 +186,17 @@ protected:
   /// \brief True if the arms collided with each other
   bool arm_arm_collision = false;
 
+  /// \brief Incremented by every event that could change the score
+protected:
+  uint64_t score_version = 0;
+
+  /// \brief Score computed by the last call to GetGameScore, and its inputs
+protected:
+  ariac::GameScore cached_game_score;
+  uint64_t cached_score_version = 0;
+  int cached_penalty = 0;
+  bool has_cached_game_score = false;
+
   
 };
 
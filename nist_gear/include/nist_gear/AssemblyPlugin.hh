@@ -36,6 +36,11 @@ namespace gazebo
     /// \param[in] _msg Message that contains contact information.
     private: void OnContacts(ConstContactsPtr &_msg);
 
+    /// \brief Find a collision of the world by its scoped name.
+    /// \param[in] _name Scoped name of the collision.
+    /// \return The collision, or null if there is none with that name.
+    private: physics::CollisionPtr FindCollision(const std::string &_name);
+
     /// \brief Determine if the colliding model is sufficiently in contact with the assembly.
     /// \return True if the colliding model is sufficiently in contact with the assembly.
     private: bool CheckModelContact();
@@ -163,6 +163,11 @@ namespace gazebo
     bool HandleEndService(
         std_srvs::Trigger::Request &req, std_srvs::Trigger::Response &res);
 
+    /// \brief Callback received when a test session resets the world between cases.
+  public:
+    bool HandleResetService(
+        std_srvs::Trigger::Request &req, std_srvs::Trigger::Response &res);
+
     /// \brief Callback for when a kitting shipment is submitted for inspection.
   public:
     bool HandleSubmitKittingShipmentService(
@@ -212,14 +217,9 @@ namespace gazebo
     /// \brief Stop scoring the current order and assign the next order on stack.
   protected:
     void StopCurrentOrder();
+    /// \brief Callback that receives the current station of an AGV
   protected:
-    void OnAGV1Location(std_msgs::String::ConstPtr msg);
-  protected:
-    void OnAGV2Location(std_msgs::String::ConstPtr msg);
-  protected:
-    void OnAGV3Location(std_msgs::String::ConstPtr msg);
-  protected:
-    void OnAGV4Location(std_msgs::String::ConstPtr msg);
+    void OnAGVLocation(std_msgs::String::ConstPtr msg, int agvId);
   /// \brief Callback that receives the status of the robots
   protected:
     void OnRobotHealthContent(nist_gear::RobotHealth _msg);
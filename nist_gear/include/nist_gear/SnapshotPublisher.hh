@@ -0,0 +1,174 @@
+/*
+ * Copyright (C) 2021 Open Source Robotics Foundation
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ *
+*/
+#ifndef _ARIAC_SNAPSHOT_PUBLISHER_HH_
+#define _ARIAC_SNAPSHOT_PUBLISHER_HH_
+
+#include <algorithm>
+#include <array>
+#include <atomic>
+#include <string>
+#include <thread>
+#include <vector>
+#include <ros/ros.h>
+#include <ros/serialization.h>
+#include <sdf/sdf.hh>
+
+namespace ariac
+{
+  /// \brief Publishes the state of a plugin on a ROS topic from its own
+  /// thread, so that the physics thread only copies the state.
+  ///
+  /// The physics thread calls Update() with the latest state. The publishing
+  /// thread wakes up at the publish rate and publishes the latest state if it
+  /// changed. An unchanged state is published again at the heartbeat rate, so
+  /// that new subscribers receive it.
+  ///
+  /// The state is handed over through three buffers: Update() writes into one,
+  /// the publishing thread reads from another, and the third holds the latest
+  /// state not taken yet. Neither thread ever waits for the other.
+  /// States are compared by their serialized bytes, so any message type
+  /// can be used.
+  ///
+  /// The rates are read from these optional SDF elements of the plugin:
+  ///   <state_publish_rate> Wakeups per second of the thread. Default 50.
+  ///   <state_heartbeat_rate> Republications per second of an unchanged
+  ///                          state. Default 10.
+  template <typename M>
+  class SnapshotPublisher
+  {
+    /// \brief Destructor. Stops the publishing thread.
+    public: ~SnapshotPublisher()
+    {
+      this->Stop();
+    }
+
+    /// \brief Advertise the topic and start the publishing thread.
+    /// \param[in] _nh Node handle to advertise the topic with.
+    /// \param[in] _topic Name of the topic.
+    /// \param[in] _sdf SDF element of the plugin, for the rates.
+    public: void Start(ros::NodeHandle &_nh, const std::string &_topic,
+                       sdf::ElementPtr _sdf)
+    {
+      double publishRate = 50.0;
+      if (_sdf->HasElement("state_publish_rate"))
+        publishRate = _sdf->Get<double>("state_publish_rate");
+      double heartbeatRate = 10.0;
+      if (_sdf->HasElement("state_heartbeat_rate"))
+        heartbeatRate = _sdf->Get<double>("state_heartbeat_rate");
+
+      this->publisher = _nh.advertise<M>(_topic, 1000);
+      this->period = ros::WallDuration(1.0 / std::max(publishRate, 1.0));
+      this->heartbeatPeriod =
+        ros::WallDuration(1.0 / std::max(heartbeatRate, 0.1));
+      this->running = true;
+      this->thread = std::thread(&SnapshotPublisher::Run, this);
+    }
+
+    /// \brief Stop the publishing thread.
+    public: void Stop()
+    {
+      this->running = false;
+      if (this->thread.joinable())
+        this->thread.join();
+    }
+
+    /// \brief Hand the latest state over to the publishing thread.
+    /// Called from the physics thread.
+    /// \param[in] _msg The state.
+    public: void Update(const M &_msg)
+    {
+      this->buffers[this->back] = _msg;
+      this->back = this->middle.exchange(this->back | kFresh) & kIndex;
+    }
+
+    /// \brief Loop of the publishing thread.
+    private: void Run()
+    {
+      bool published = false;
+      ros::WallTime lastPublishTime;
+      while (this->running && ros::ok())
+      {
+        if (this->middle.load() & kFresh)
+        {
+          this->front = this->middle.exchange(this->front) & kIndex;
+          const auto &msg = this->buffers[this->front];
+          auto now = ros::WallTime::now();
+          this->Serialize(msg, this->serialized);
+          if (!published || this->serialized != this->lastPublished ||
+              now - lastPublishTime >= this->heartbeatPeriod)
+          {
+            this->publisher.publish(msg);
+            this->lastPublished.swap(this->serialized);
+            lastPublishTime = now;
+            published = true;
+          }
+        }
+        this->period.sleep();
+      }
+    }
+
+    /// \brief Serialize a state, reusing the storage of the output.
+    /// \param[in] _msg The state.
+    /// \param[out] _bytes The serialized state.
+    private: static void Serialize(const M &_msg, std::vector<uint8_t> &_bytes)
+    {
+      _bytes.resize(ros::serialization::serializationLength(_msg));
+      ros::serialization::OStream stream(_bytes.data(), _bytes.size());
+      ros::serialization::serialize(stream, _msg);
+    }
+
+    /// \brief Flag set in middle when it holds a state not taken yet.
+    private: static constexpr int kFresh = 4;
+
+    /// \brief Mask of the buffer index in middle.
+    private: static constexpr int kIndex = 3;
+
+    /// \brief The three buffers.
+    private: std::array<M, 3> buffers;
+
+    /// \brief Buffer written by Update(). Only used by the physics thread.
+    private: int back = 0;
+
+    /// \brief Buffer holding the latest state, and the kFresh flag.
+    private: std::atomic<int> middle{1};
+
+    /// \brief Buffer read by the publishing thread. Only used by it.
+    private: int front = 2;
+
+    /// \brief Serialized last published state, to detect identical states.
+    private: std::vector<uint8_t> lastPublished;
+
+    /// \brief Serialized state being considered for publication.
+    private: std::vector<uint8_t> serialized;
+
+    /// \brief Publisher of the state topic.
+    private: ros::Publisher publisher;
+
+    /// \brief Time between two wakeups of the publishing thread.
+    private: ros::WallDuration period;
+
+    /// \brief Time after which an unchanged state is published again.
+    private: ros::WallDuration heartbeatPeriod;
+
+    /// \brief False when the publishing thread has to stop.
+    private: std::atomic<bool> running{false};
+
+    /// \brief The publishing thread.
+    private: std::thread thread;
+  };
+}
+#endif
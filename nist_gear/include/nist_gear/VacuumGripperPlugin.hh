@@ -71,6 +71,11 @@ namespace gazebo
     /// \brief Callback used when the gripper contacts an object.
     /// \param[in] _msg Message that contains contact information.
     private: void OnContacts(ConstContactsPtr &_msg);
+
+    /// \brief Find a collision of the world by its scoped name.
+    /// \param[in] _name Scoped name of the collision.
+    /// \return The collision, or null if there is none with that name.
+    private: physics::CollisionPtr FindCollision(const std::string &_name);
     private:
       void OnDropObjectContent(nist_gear::DropProducts::ConstPtr drop_object);
 
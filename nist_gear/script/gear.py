@@ -269,6 +269,7 @@ configurable_options = {
     'disable_shadows': False,
     'belt_population_cycles': 0,
     'gazebo_state_logging': False,
+    'gazebo_state_logging_profile': 'full',
     'spawn_extra_models': False,
     'unthrottled_physics_update': False,
     'model_type_aliases': {
@@ -278,6 +279,18 @@ configurable_options = {
     'visualize_sensor_views': False,
     'visualize_drop_regions': False,
 }
+# Models that move during a trial: robots, AGVs, trays, briefcases and parts
+moving_models_filter = \
+    '(gantry|kitting|agv[1-4]|kit_tray_[1-4]|.*briefcase.*|.*assembly_(battery|pump|regulator|sensor)_.*)'
+# gzserver recording arguments of each gazebo_state_logging_profile
+state_logging_profiles = {
+    # every model at 100 Hz
+    'full': {'period': 0.01, 'encoding': 'zlib', 'filter': None},
+    # only the models that move, at 20 Hz
+    'moving': {'period': 0.05, 'encoding': 'zlib', 'filter': moving_models_filter},
+    # only the models that move, at 10 Hz, with the stronger (but slower) bz2 compression
+    'compact': {'period': 0.1, 'encoding': 'bz2', 'filter': moving_models_filter},
+}
 default_time_limit = 500  # seconds
 max_count_per_model = 30  # limit on the number of instances of each model type
 
@@ -350,8 +363,9 @@ def prepare_arguments(parser):
         help='print generated files to stdout, but do not write them to disk')
     add('-v', '--verbose', action='store_true', default=False,
         help='output additional logging to console')
-    add('-o', '--output', default='/tmp/ariac/',
-        help='directory in which to output the generated files')
+    add('-o', '--output', default=os.environ.get('ARIAC_OUTPUT_DIR', '/tmp/ariac/'),
+        help='directory in which to output the generated files '
+             '(default: $ARIAC_OUTPUT_DIR or /tmp/ariac/)')
     add('--development-mode', '-d', action='store_true', default=False,
         help='if true the competition mode environment variable will not be set (default false)')
     add('--no-gui', action='store_true', default=False,
@@ -739,6 +753,8 @@ def create_models_over_agvs_infos(agv_yaml_dict):
                     scoped_model_name = agv_name_yaml + '|tray_' + agv_id + "|" + \
                     model_info.type + '_' + str(get_next_model_id(model_type))
                     model_info.agv = agv_name_yaml
+                    # pose in the frame of the kit tray, as given in the config
+                    model_info.tray_pose = create_pose_info(part_pose_type['pose'])
                     models_to_spawn_infos[scoped_model_name] = model_info
     return models_to_spawn_infos
 
@@ -981,6 +997,22 @@ def create_options_info(options_dict):
     return options
 
 
+def create_state_logging_args(options):
+    if not options['gazebo_state_logging']:
+        return ''
+    profile_name = options['gazebo_state_logging_profile']
+    if profile_name not in state_logging_profiles:
+        print("Error: given gazebo_state_logging_profile '{0}' is not one of the known profiles: {1}"
+              .format(profile_name, ', '.join(sorted(state_logging_profiles))), file=sys.stderr)
+        sys.exit(1)
+    profile = state_logging_profiles[profile_name]
+    state_logging_args = '-r --record_period {0} --record_encoding {1}'.format(
+        profile['period'], profile['encoding'])
+    if profile['filter']:
+        state_logging_args += ' --record_filter {0}'.format(profile['filter'])
+    return state_logging_args
+
+
 def prepare_template_data(config_dict, args):
     template_data = {
         'arms': [create_arm_info(name, conf) for name, conf in arm_configs.items()],
@@ -1009,6 +1041,7 @@ def prepare_template_data(config_dict, args):
         template_data['options']['gazebo_state_logging'] = args.state_logging
     if args.visualize_sensor_views:
         template_data['options']['visualize_sensor_views'] = True
+    template_data['state_logging_args'] = create_state_logging_args(template_data['options'])
 
     models_over_bins = {}
     models_over_belt = {}
@@ -1106,11 +1139,11 @@ def generate_files(template_data):
     return files
 
 
-def main(sysargv=None):
-    parser = argparse.ArgumentParser(
-        description='Prepares and then executes a gazebo simulation based on configurations.')
-    prepare_arguments(parser)
-    args = parser.parse_args(sysargv)
+def load_config(args):
+    """Read, merge and expand the configuration given on the command line.
+
+    Also seeds the model ids, so this must be called before prepare_template_data().
+    """
     config_data = args.config or ''
     if args.file is not None:
         for file in args.file:
@@ -1124,7 +1157,15 @@ def main(sysargv=None):
 
     random_seed = expanded_dict_config.pop('random_seed', None)
     initialize_model_id_mappings(random_seed)
+    return expanded_dict_config
 
+
+def main(sysargv=None):
+    parser = argparse.ArgumentParser(
+        description='Prepares and then executes a gazebo simulation based on configurations.')
+    prepare_arguments(parser)
+    args = parser.parse_args(sysargv)
+    expanded_dict_config = load_config(args)
     template_data = prepare_template_data(expanded_dict_config, args)
     files = generate_files(template_data)
     if not args.dry_run and not os.path.isdir(args.output):
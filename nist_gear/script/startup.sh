@@ -5,11 +5,14 @@ log_dir="$HOME/.ariac/log"
 mkdir -p "$log_dir"
 
 scoring_log_file="$log_dir/performance.log"
-gazebo_log_file="$HOME/.gazebo/server-11345/default.log"
+# Gazebo names its log directory after the master port
+gazebo_master_uri="${GAZEBO_MASTER_URI:-http://localhost:11345}"
+gazebo_port="${gazebo_master_uri##*:}"
+gazebo_log_file="$HOME/.gazebo/server-${gazebo_port}/default.log"
 
 if [ ! \( -e "${scoring_log_file}" \) ] ; then
   echo "File doesn't exist - symlinking $scoring_log_file to $gazebo_log_file"
-  ln -sf ~/.gazebo/server-11345/default.log $scoring_log_file
+  ln -sf "$gazebo_log_file" "$scoring_log_file"
 else
   echo "File already exists: $scoring_log_file"
 fi
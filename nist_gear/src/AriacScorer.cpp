@@ -58,6 +58,7 @@ void AriacScorer::NotifyOrderStarted(gazebo::common::Time time, const nist_gear:
   }
 
   this->orders[order.order_id] = orderInfo;
+  ++this->score_version;
 }
 
 /////////////////////////////////////////////////
@@ -80,6 +81,7 @@ void AriacScorer::NotifyOrderUpdated(
   }
 
   this->order_updates.push_back(updateInfo);
+  ++this->score_version;
 }
 
 void AriacScorer::NotifyKittingShipmentReceived(gazebo::common::Time time,
@@ -99,6 +101,7 @@ void AriacScorer::NotifyKittingShipmentReceived(gazebo::common::Time time,
 
   boost::mutex::scoped_lock mutexLock(this->mutex);
   this->received_kitting_shipments_vec.push_back(submitted_shipment_info);
+  ++this->score_version;
 }
 
 void AriacScorer::NotifyAssemblyShipmentReceived(gazebo::common::Time time,
@@ -117,6 +120,7 @@ void AriacScorer::NotifyAssemblyShipmentReceived(gazebo::common::Time time,
 
   boost::mutex::scoped_lock mutexLock(this->mutex);
   this->received_assembly_shipments_vec.push_back(submitted_shipment_info);
+  ++this->score_version;
 }
 
 /////////////////////////////////////////////////
@@ -124,6 +128,27 @@ void AriacScorer::NotifyArmArmCollision(gazebo::common::Time /*time*/)
 {
   boost::mutex::scoped_lock mutexLock(this->mutex);
   this->arm_arm_collision = true;
+  ++this->score_version;
+}
+
+/////////////////////////////////////////////////
+void AriacScorer::Reset()
+{
+  boost::mutex::scoped_lock mutexLock(this->mutex);
+  this->orders.clear();
+  this->order_updates.clear();
+  this->received_kitting_shipments_vec.clear();
+  this->received_assembly_shipments_vec.clear();
+  this->arm_arm_collision = false;
+  this->has_cached_game_score = false;
+  ++this->score_version;
+}
+
+/////////////////////////////////////////////////
+uint64_t AriacScorer::GetScoreVersion() const
+{
+  boost::mutex::scoped_lock mutexLock(this->mutex);
+  return this->score_version;
 }
 
 /////////////////////////////////////////////////
@@ -132,6 +157,13 @@ ariac::GameScore AriacScorer::GetGameScore(int penalty)
   // gzdbg << "GetGameScore\n";
   boost::mutex::scoped_lock mutexLock(this->mutex);
 
+  // Nothing that the score depends on happened since the last call
+  if (this->has_cached_game_score && this->cached_score_version == this->score_version &&
+      this->cached_penalty == penalty)
+  {
+    return this->cached_game_score;
+  }
+
   ariac::GameScore game_score;
   game_score.penalty = penalty;
 
@@ -328,6 +360,11 @@ ariac::GameScore AriacScorer::GetGameScore(int penalty)
     }
     game_score.order_scores_map[order_id] = order_score;
   }
+
+  this->cached_game_score = game_score;
+  this->cached_score_version = this->score_version;
+  this->cached_penalty = penalty;
+  this->has_cached_game_score = true;
   return game_score;
 }
 
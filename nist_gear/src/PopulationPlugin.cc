@@ -81,13 +81,14 @@ namespace gazebo
               public: ignition::math::Pose3d pose;
             };
 
-    /// \brief Collection of objects to be spawned.
-    public: std::vector<Object> objects;
-
-    /// \brief Contains the entire collection of objects. This is used for
-    /// inserting the objects in a cyclic way.
+    /// \brief Contains the entire collection of objects, sorted by time.
+    /// It is not modified after Load(); nextObject walks through it and goes
+    /// back to the start to insert the objects in a cyclic way.
     public: std::vector<Object> initialObjects;
 
+    /// \brief Index in initialObjects of the next object to be spawned.
+    public: size_t nextObject = 0;
+
     /// \brief Connection event.
     public: event::ConnectionPtr connection;
 
@@ -329,7 +330,7 @@ void PopulationPlugin::Restart()
   this->dataPtr->enabled = true;
   this->dataPtr->elapsedEquivalentTime = 0;
   this->dataPtr->startTime = this->dataPtr->world->SimTime();
-  this->dataPtr->objects = this->dataPtr->initialObjects;
+  this->dataPtr->nextObject = 0;
 
   gzdbg << "Object population restarted" << std::endl;
 }
@@ -352,9 +353,9 @@ void PopulationPlugin::OnUpdate()
     return;
   }
 
-  if (this->dataPtr->objects.empty())
+  if (this->dataPtr->nextObject >= this->dataPtr->initialObjects.size())
   {
-    if (this->dataPtr->loopForever)
+    if (this->dataPtr->loopForever && !this->dataPtr->initialObjects.empty())
     {
       // gzdbg << "Restarting belt"
       //       << "\n";
@@ -378,9 +379,10 @@ void PopulationPlugin::OnUpdate()
   this->dataPtr->elapsedEquivalentTime += elapsedTime.Double() * this->dataPtr->rateModifier;
 
   // gzdbg << "[OnUpdate] elapsedEquivalentTime " << this->dataPtr->elapsedEquivalentTime << std::endl;
-  if (this->dataPtr->elapsedEquivalentTime >= this->dataPtr->objects.front().time)
+  if (this->dataPtr->elapsedEquivalentTime >=
+      this->dataPtr->initialObjects[this->dataPtr->nextObject].time)
   {
-    auto obj = this->dataPtr->objects.front();
+    auto obj = this->dataPtr->initialObjects[this->dataPtr->nextObject];
     if (this->dataPtr->frame)
     {
       auto framePose = this->dataPtr->frame->WorldPose();
@@ -425,7 +427,7 @@ void PopulationPlugin::OnUpdate()
       gzdbg << "Object [" << modelName << "] on belt" << std::endl;
     }
 
-    this->dataPtr->objects.erase(this->dataPtr->objects.begin());
+    ++this->dataPtr->nextObject;
     this->dataPtr->elapsedEquivalentTime = 0.0;
   }
     this->dataPtr->lastUpdateTime = this->dataPtr->world->SimTime();
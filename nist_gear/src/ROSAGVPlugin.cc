@@ -360,6 +360,17 @@ void ROSAGVPlugin::Load(physics::ModelPtr _parent, sdf::ElementPtr _sdf)
         boost::bind(&ROSAGVPlugin::OnUpdate, this, _1));
 }
 
+/////////////////////////////////////////////////
+void ROSAGVPlugin::Reset()
+{
+    std::lock_guard<std::mutex> lock(this->dataPtr->mutex);
+    // The model pose is reset by the world; the station is published again
+    // by the task manager.
+    this->dataPtr->model->StopAnimation();
+    this->dataPtr->goToAssemblyStationTriggered = false;
+    this->dataPtr->currentState = "ready_to_deliver";
+}
+
 void ROSAGVPlugin::OnAGVLocation(std_msgs::String::ConstPtr _msg)
 {
     std::lock_guard<std::mutex> lock(this->dataPtr->mutex);
@@ -56,11 +56,14 @@ void BriefcasePlugin::Load(physics::ModelPtr _model, sdf::ElementPtr _sdf)
         std::string faultyPartName = faultyPartElem->Get<std::string>();
 
         ROS_DEBUG_STREAM("Ignoring part: " << faultyPartName);
-        this->faulty_part_names.push_back(faultyPartName);
+        this->faulty_part_names.insert(faultyPartName);
         faultyPartElem = faultyPartElem->GetNextElement("name");
       }
     }
   }
+  this->model_name_cache.reset(new ariac::ModelNameCache([this](ariac::ModelNameInfo &_info) {
+    _info.faulty = this->faulty_part_names.count(_info.trimmedName) > 0;
+  }));
 
   if (this->updateRate > 0)
     gzdbg << "BriefcasePlugin running at " << this->updateRate << " Hz\n";
@@ -69,6 +72,17 @@ void BriefcasePlugin::Load(physics::ModelPtr _model, sdf::ElementPtr _sdf)
 
   this->briefcase_id = this->parentLink->GetScopedName();
 
+  // Contents are only published when they change, and at this rate otherwise
+  if (_sdf->HasElement("content_position_tolerance"))
+    this->position_tolerance = _sdf->Get<double>("content_position_tolerance");
+  if (_sdf->HasElement("content_orientation_tolerance"))
+    this->orientation_tolerance = _sdf->Get<double>("content_orientation_tolerance");
+  if (_sdf->HasElement("heartbeat_rate"))
+  {
+    double heartbeat_rate = _sdf->Get<double>("heartbeat_rate");
+    this->heartbeat_period = heartbeat_rate > 0 ? 1.0 / heartbeat_rate : 0.0;
+  }
+
   // Make sure the ROS node for Gazebo has already been initialized
   if (!ros::isInitialized())
   {
@@ -154,13 +168,46 @@ void BriefcasePlugin::OnUpdate(const common::UpdateInfo & _info)
   }
 
   this->ProcessContactingModels();
-  if (this->is_publishing_enabled)
+
+  // Only publish the assembly when it changed, and at the heartbeat rate
+  // otherwise so that late subscribers still get it.
+  bool heartbeat = (_info.simTime - this->last_heartbeat_time).Double() >= this->heartbeat_period;
+  if (heartbeat)
+  {
+    this->last_heartbeat_time = _info.simTime;
+  }
+  if (this->is_publishing_enabled && (heartbeat || this->AssemblyChanged()))
   {
     this->PublishAssemblyMsg();
   }
+  // The frame is sent on every update, so that TF lookups at recent stamps
+  // can always be interpolated.
   this->PublishTFTransform(_info.simTime);
 }
 
+/////////////////////////////////////////////////
+bool BriefcasePlugin::AssemblyChanged()
+{
+  if (this->current_assembly.objects.size() != this->published_assembly.objects.size())
+  {
+    return true;
+  }
+  // Contacting models are kept in a set, so unchanged content is in the same order
+  for (size_t i = 0; i < this->current_assembly.objects.size(); ++i)
+  {
+    const auto &current = this->current_assembly.objects[i];
+    const auto &published = this->published_assembly.objects[i];
+    if (current.productType != published.productType ||
+        current.isProductFaulty != published.isProductFaulty ||
+        ariac::PoseChanged(current.productPose, published.productPose,
+                           this->position_tolerance, this->orientation_tolerance))
+    {
+      return true;
+    }
+  }
+  return false;
+}
+
 /////////////////////////////////////////////////
 void BriefcasePlugin::ProcessContactingModels()
 {
@@ -180,12 +227,11 @@ void BriefcasePlugin::ProcessContactingModels()
       ariac::BriefcaseProduct object;
 
       // Determine the object type
-      object.productType = ariac::DetermineModelType(model->GetName());
+      auto model_info = this->model_name_cache->Resolve(model->GetName());
+      object.productType = model_info->type;
 
       // Determine if the object is faulty
-      auto modelName = ariac::TrimNamespace(model->GetName());
-      auto it = std::find(this->faulty_part_names.begin(), this->faulty_part_names.end(), modelName);
-      object.isProductFaulty = it != this->faulty_part_names.end();
+      object.isProductFaulty = model_info->faulty;
 
       // Determine the pose of the object in the frame of the tray
       ignition::math::Pose3d objectPose = model->WorldPose();
@@ -243,6 +289,7 @@ void BriefcasePlugin::PublishAssemblyMsg()
     assembly_msg.products.push_back(msgObj);
   }
   this->assembly_state_publisher.publish(assembly_msg);
+  this->published_assembly = this->current_assembly;
 }
 
 /////////////////////////////////////////////////
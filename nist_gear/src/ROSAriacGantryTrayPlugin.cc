@@ -40,6 +40,9 @@ GantryTrayPlugin::~GantryTrayPlugin()
 void GantryTrayPlugin::Load(physics::ModelPtr _model, sdf::ElementPtr _sdf)
 {
   SideContactPlugin::Load(_model, _sdf);
+  this->modelNameCache.reset(new ariac::ModelNameCache([this](ariac::ModelNameInfo &_info) {
+    _info.faulty = this->faultyPartNames.count(_info.trimmedName) > 0;
+  }));
 
 
   if (this->updateRate > 0)
@@ -159,12 +162,11 @@ void GantryTrayPlugin::ProcessContactingModels()
       ariac::KitObject object;
 
       // Determine the object type
-      object.type = ariac::DetermineModelType(model->GetName());
+      auto modelInfo = this->modelNameCache->Resolve(model->GetName());
+      object.type = modelInfo->type;
 
       // Determine if the object is faulty
-      auto modelName = ariac::TrimNamespace(model->GetName());
-      auto it = std::find(this->faultyPartNames.begin(), this->faultyPartNames.end(), modelName);
-      object.isFaulty = it != this->faultyPartNames.end();
+      object.isFaulty = modelInfo->faulty;
 
       // Determine the pose of the object in the frame of the tray
       ignition::math::Pose3d objectPose = model->WorldPose();
@@ -55,11 +55,14 @@ void KitTrayPlugin::Load(physics::ModelPtr _model, sdf::ElementPtr _sdf)
         std::string faultyPartName = faultyPartElem->Get<std::string>();
 
         ROS_DEBUG_STREAM("Ignoring part: " << faultyPartName);
-        this->faultyPartNames.push_back(faultyPartName);
+        this->faultyPartNames.insert(faultyPartName);
         faultyPartElem = faultyPartElem->GetNextElement("name");
       }
     }
   }
+  this->modelNameCache.reset(new ariac::ModelNameCache([this](ariac::ModelNameInfo &_info) {
+    _info.faulty = this->faultyPartNames.count(_info.trimmedName) > 0;
+  }));
 
   if (this->updateRate > 0)
     gzdbg << "KitTrayPlugin running at " << this->updateRate << " Hz\n";
@@ -67,6 +70,17 @@ void KitTrayPlugin::Load(physics::ModelPtr _model, sdf::ElementPtr _sdf)
     gzdbg << "KitTrayPlugin running at the default update rate\n";
 
   this->trayID = this->parentLink->GetScopedName();
+
+  // Contents are only published when they change, and at this rate otherwise
+  if (_sdf->HasElement("content_position_tolerance"))
+    this->positionTolerance = _sdf->Get<double>("content_position_tolerance");
+  if (_sdf->HasElement("content_orientation_tolerance"))
+    this->orientationTolerance = _sdf->Get<double>("content_orientation_tolerance");
+  if (_sdf->HasElement("heartbeat_rate"))
+  {
+    double heartbeatRate = _sdf->Get<double>("heartbeat_rate");
+    this->heartbeatPeriod = heartbeatRate > 0 ? 1.0 / heartbeatRate : 0.0;
+  }
   
   
 
@@ -84,18 +98,19 @@ void KitTrayPlugin::Load(physics::ModelPtr _model, sdf::ElementPtr _sdf)
     "/ariac/trays", 1000, boost::bind(&KitTrayPlugin::OnSubscriberConnect, this, _1));
   this->publishingEnabled = true;
 
-  this->agv1LocationSubscriber =
-      this->rosNode->subscribe("/ariac/agv1/station",
-                               1000, &KitTrayPlugin::OnAGV1Location, this);
-  this->agv2LocationSubscriber =
-      this->rosNode->subscribe("/ariac/agv2/station",
-                               1000, &KitTrayPlugin::OnAGV2Location, this);
-  this->agv3LocationSubscriber =
-      this->rosNode->subscribe("/ariac/agv3/station",
-                               1000, &KitTrayPlugin::OnAGV3Location, this);
-  this->agv4LocationSubscriber =
-      this->rosNode->subscribe("/ariac/agv4/station",
-                               1000, &KitTrayPlugin::OnAGV4Location, this);
+  // Only the station of the AGV carrying this tray is needed. The tray ID
+  // is scoped with the name of the AGV, e.g. agv1::kit_tray_1::...
+  auto agv = ariac::AgvRegistry::Instance().Find(this->trayID.substr(0, this->trayID.find("::")));
+  if (agv)
+  {
+    this->agvLocationSubscriber =
+        this->rosNode->subscribe(agv->stationTopic,
+                                 1000, &KitTrayPlugin::OnAGVLocation, this);
+  }
+  else
+  {
+    gzerr << "No AGV carries the kit tray [" << this->trayID << "]" << std::endl;
+  }
 
   this->tf_frame_name = "kit_tray_frame";
   if (_sdf->HasElement("tf_frame_name"))
@@ -130,32 +145,9 @@ void KitTrayPlugin::Load(physics::ModelPtr _model, sdf::ElementPtr _sdf)
  
 }
 
-void KitTrayPlugin::OnAGV1Location(std_msgs::String::ConstPtr _msg)
-{
-    // std::lock_guard<std::mutex> lock(this->dataPtr->mutex);
-    this->agv1CurrentStation = _msg->data;
-    // gzdbg << "current_station: "<< this->dataPtr->current_station << "\n";
-}
-
-void KitTrayPlugin::OnAGV2Location(std_msgs::String::ConstPtr _msg)
-{
-    // std::lock_guard<std::mutex> lock(this->dataPtr->mutex);
-    this->agv2CurrentStation = _msg->data;
-    // gzdbg << "current_station: "<< this->dataPtr->current_station << "\n";
-}
-
-void KitTrayPlugin::OnAGV3Location(std_msgs::String::ConstPtr _msg)
+void KitTrayPlugin::OnAGVLocation(std_msgs::String::ConstPtr _msg)
 {
-    // std::lock_guard<std::mutex> lock(this->dataPtr->mutex);
-    this->agv3CurrentStation = _msg->data;
-    // gzdbg << "current_station: "<< this->dataPtr->current_station << "\n";
-}
-
-void KitTrayPlugin::OnAGV4Location(std_msgs::String::ConstPtr _msg)
-{
-    // std::lock_guard<std::mutex> lock(this->dataPtr->mutex);
-    this->agv4CurrentStation = _msg->data;
-    // gzdbg << "current_station: "<< this->dataPtr->current_station << "\n";
+    this->agvCurrentStation = _msg->data;
 }
 /////////////////////////////////////////////////
 void KitTrayPlugin::OnUpdate(const common::UpdateInfo & _info)
@@ -194,13 +186,46 @@ void KitTrayPlugin::OnUpdate(const common::UpdateInfo & _info)
   }
 
   this->ProcessContactingModels();
-  if (this->publishingEnabled)
+
+  // Only publish the kit when it changed, and at the heartbeat rate otherwise
+  // so that late subscribers still get it.
+  bool heartbeat = (_info.simTime - this->lastHeartbeatTime).Double() >= this->heartbeatPeriod;
+  if (heartbeat)
+  {
+    this->lastHeartbeatTime = _info.simTime;
+  }
+  if (this->publishingEnabled && (heartbeat || this->KitChanged()))
   {
     this->PublishKitMsg();
   }
+  // The frame is sent on every update, so that TF lookups at recent stamps
+  // can always be interpolated.
   this->PublishTFTransform(_info.simTime);
 }
 
+/////////////////////////////////////////////////
+bool KitTrayPlugin::KitChanged()
+{
+  if (this->CurrentStation() != this->publishedStation ||
+      this->currentKit.objects.size() != this->publishedKit.objects.size())
+  {
+    return true;
+  }
+  // Contacting models are kept in a set, so unchanged content is in the same order
+  for (size_t i = 0; i < this->currentKit.objects.size(); ++i)
+  {
+    const auto &current = this->currentKit.objects[i];
+    const auto &published = this->publishedKit.objects[i];
+    if (current.type != published.type || current.isFaulty != published.isFaulty ||
+        ariac::PoseChanged(current.pose, published.pose,
+                           this->positionTolerance, this->orientationTolerance))
+    {
+      return true;
+    }
+  }
+  return false;
+}
+
 /////////////////////////////////////////////////
 void KitTrayPlugin::ProcessContactingModels()
 {
@@ -220,12 +245,11 @@ void KitTrayPlugin::ProcessContactingModels()
       ariac::KitObject object;
 
       // Determine the object type
-      object.type = ariac::DetermineModelType(model->GetName());
+      auto modelInfo = this->modelNameCache->Resolve(model->GetName());
+      object.type = modelInfo->type;
 
       // Determine if the object is faulty
-      auto modelName = ariac::TrimNamespace(model->GetName());
-      auto it = std::find(this->faultyPartNames.begin(), this->faultyPartNames.end(), modelName);
-      object.isFaulty = it != this->faultyPartNames.end();
+      object.isFaulty = modelInfo->faulty;
 
       // Determine the pose of the object in the frame of the tray
       ignition::math::Pose3d objectPose = model->WorldPose();
@@ -259,29 +283,15 @@ void KitTrayPlugin::OnSubscriberConnect(const ros::SingleSubscriberPublisher& pu
 }
 
 /////////////////////////////////////////////////
-void KitTrayPlugin::PublishKitMsg()
+std::string KitTrayPlugin::CurrentStation()
 {
-  int agv_id = std::stoi(this->trayID.substr(3,1)); //--get the id of the agv
-  // std::string agv_name = this->trayID.substr(3,1);
+  return this->agvCurrentStation;
+}
 
-  std::string current_station{};
-  if (agv_id == 1)
-  {
-    current_station = this->agv1CurrentStation;
-  }
-  if (agv_id == 2)
-  {
-    current_station = this->agv2CurrentStation;
-  }
-  if (agv_id == 3)
-  {
-    current_station = this->agv3CurrentStation;
-  }
-  if (agv_id == 4)
-  {
-    current_station = this->agv4CurrentStation;
-  }
-  this->station_name = current_station;
+/////////////////////////////////////////////////
+void KitTrayPlugin::PublishKitMsg()
+{
+  this->station_name = this->CurrentStation();
   
   // ROS_WARN_STREAM("this->trayID " << this->trayID);
   // ROS_WARN_STREAM("agv_id " << agv_id);
@@ -308,6 +318,8 @@ void KitTrayPlugin::PublishKitMsg()
     kitTrayMsg.products.push_back(msgObj);
   }
   this->currentKitPub.publish(kitTrayMsg);
+  this->publishedKit = this->currentKit;
+  this->publishedStation = this->station_name;
 }
 
 
@@ -518,27 +530,7 @@ bool KitTrayPlugin::HandleGetContentService(
     return true;
   }
 
-  int agv_id = std::stoi(this->trayID.substr(3,1)); //--get the id of the agv
-  // std::string agv_name = this->trayID.substr(3,1);
-
-  std::string current_station{};
-  if (agv_id == 1)
-  {
-    current_station = this->agv1CurrentStation;
-  }
-  if (agv_id == 2)
-  {
-    current_station = this->agv2CurrentStation;
-  }
-  if (agv_id == 3)
-  {
-    current_station = this->agv3CurrentStation;
-  }
-  if (agv_id == 4)
-  {
-    current_station = this->agv4CurrentStation;
-  }
-  this->station_name = current_station;
+  this->station_name = this->CurrentStation();
   // ROS_WARN_STREAM("station " << this->station_name);
 
   nist_gear::DetectedKittingShipment kitTrayMsg;
@@ -568,10 +560,7 @@ bool KitTrayPlugin::HandleGetContentService(
 
 void KitTrayPlugin::PublishTFTransform(const common::Time sim_time)
 {
-  // gzdbg << "PublishTFTransform: " << this->agv1CurrentStation
-  // << ", " << this->agv2CurrentStation
-  // << ", " <<this->agv3CurrentStation
-  // << ", " <<this->agv4CurrentStation
+  // gzdbg << "PublishTFTransform: " << this->agvCurrentStation
   // << ", " << "\n";
 
   // gzdbg << "AGV: " << this->tf_frame_name << "\n";
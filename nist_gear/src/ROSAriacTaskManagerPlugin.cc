@@ -16,6 +16,7 @@
 */
 
 #include <algorithm>
+#include <cctype>
 #include <chrono>
 #include <cstdlib>
 #include <limits>
@@ -68,6 +69,8 @@ namespace gazebo
     sdf::ElementPtr sdf;
     /*!< Collection of orders to announce. */
     std::vector<ariac::Order> ordersToAnnounce;
+    /*!< The orders as loaded from the world file, restored on reset. */
+    std::vector<ariac::Order> initialOrdersToAnnounce;
     /*!< Current order being processed */
     ariac::Order currentOrder;
     //!< Collection of orders which have been announced but are not yet complete.
@@ -83,6 +86,9 @@ namespace gazebo
     AriacScorer ariacScorer;
     /*!< The current game score. */
     ariac::GameScore currentGameScore;
+    /*!< Scorer version and floor penalty currentGameScore was last checked against. */
+    uint64_t checkedScoreVersion = 0;
+    int checkedFloorPenalty = 0;
     /*!< ROS node handle. */
     std::unique_ptr<ros::NodeHandle> rosnode;
     /*!< Publishes an order. */
@@ -93,14 +99,8 @@ namespace gazebo
     ros::Subscriber assemblyShipmentContentSubscriber;
     /*!< Subscriber to retrieve the health status of both robots */
     ros::Subscriber robotHealthSubscriber;
-    /*!< Subscription to get the current station of AGV1*/
-    ros::Subscriber stationForAGV1Sub;
-    /*!< Subscription to get the current station of AGV2*/
-    ros::Subscriber stationForAGV2Sub;
-    /*!< Subscription to get the current station of AGV3*/
-    ros::Subscriber stationForAGV3Sub;
-    /*!< Subscription to get the current station of AGV4*/
-    ros::Subscriber stationForAGV4Sub;
+    /*!< Subscriptions to get the current station of each AGV, by AGV index */
+    std::map<int, ros::Subscriber> stationForAGVSubs;
     /*!< Publishes the Gazebo task state. */
     ros::Publisher drop_object_publisher;
     ros::Publisher taskStatePub;
@@ -108,20 +108,16 @@ namespace gazebo
     ros::Publisher taskScorePub;
     /*!< Publishes the health of the robots. */
     ros::Publisher robot_health_pub;
-    /*!< Publishes the current location of an AGV. */
-    ros::Publisher agv1CurrentStationPub;
-    /*!< Publishes the current location of an AGV. */
-    ros::Publisher agv2CurrentStationPub;
-    /*!< Publishes the current location of an AGV. */
-    ros::Publisher agv3CurrentStationPub;
-    /*!< Publishes the current location of an AGV. */
-    ros::Publisher agv4CurrentStationPub;
+    /*!< Publishes the current location of each AGV, by AGV index. */
+    std::map<int, ros::Publisher> agvCurrentStationPubs;
     /*!< Name of service that allows the user to start the competition. */
     std::string compStartServiceName;
     /*!< Service that allows the user to start the competition. */
     ros::ServiceServer compStartServiceServer;
     /*!< Service that allows the user to end the competition. */
     ros::ServiceServer compEndServiceServer;
+    /*!< Service that puts the world back in its initial state, for test sessions. */
+    ros::ServiceServer compResetServiceServer;
     /*!< Service that allows users to query the location of materials. */
     ros::ServiceServer getMaterialLocationsServiceServer;
     /*!< Service that allows a tray to be submitted for inspection. */
@@ -136,14 +132,8 @@ namespace gazebo
     std::map<int, ros::ServiceClient> agvGetContentClient;
     /*!< Map of assembly station id to client that can get its content. */
     std::map<int, ros::ServiceClient> stationGetContentClient;
-    /*!< Map of agv id to client that can ask AGV to move to as1 */
-    std::map<int, ros::ServiceClient> agvToAS1AnimateClient;
-    /*!< Map of agv id to client that can ask AGV to move to as2 */
-    std::map<int, ros::ServiceClient> agvToAS2AnimateClient;
-    /*!< Map of agv id to client that can ask AGV to move to as3 */
-    std::map<int, ros::ServiceClient> agvToAS3AnimateClient;
-    /*!< Map of agv id to client that can ask AGV to move to as4 */
-    std::map<int, ros::ServiceClient> agvToAS4AnimateClient;
+    /*!< Map of agv id to the clients that can ask the AGV to move, by assembly station. */
+    std::map<int, std::map<std::string, ros::ServiceClient>> agvToASAnimateClients;
     /*!< Client that turns on conveyor belt. */
     ros::ServiceClient conveyorControlClient;
     /*!< Transportation node. */
@@ -157,6 +147,8 @@ namespace gazebo
     double sensorBlackoutDuration;
     /*!< Product count at which to blackout sensors. */
     int sensorBlackoutProductCount = 0;
+    /*!< Product count at which to blackout sensors, restored on reset. */
+    int initialSensorBlackoutProductCount = 0;
     /*!< If sensor blackout is currently in progress. */
     bool isSensorBlackoutInProgress = false;
     /*!< flag to activate the belt. */
@@ -188,10 +180,10 @@ namespace gazebo
     int actualAGVUsedForKittingShipment;
     /*!< Name of the assembly shipment station. */
     std::string assemblyShipmentStation;
-    std::string agv1_current_station;
-    std::string agv2_current_station;
-    std::string agv3_current_station;
-    std::string agv4_current_station;
+    /*!< Station of each AGV when the world was loaded, restored on reset. */
+    std::map<int, std::string> agvStartLocations;
+    /*!< Current station of each AGV, by AGV index. */
+    std::map<int, std::string> agvCurrentStations;
     /*!< Controller manager service to switch controllers for the gantry. */
     ros::ServiceClient gantry_controller_manager_srv;
     /*!< Controller manager service to list controllers for the gantry. */
@@ -373,6 +365,10 @@ void ROSAriacTaskManagerPlugin::Load(physics::WorldPtr _world,
   if (_sdf->HasElement("end_competition_service_name"))
     compEndServiceName = _sdf->Get<std::string>("end_competition_service_name");
 
+  std::string compResetServiceName = "reset_competition";
+  if (_sdf->HasElement("reset_competition_service_name"))
+    compResetServiceName = _sdf->Get<std::string>("reset_competition_service_name");
+
   this->dataPtr->compStartServiceName = "start_competition";
   if (_sdf->HasElement("start_competition_service_name"))
     this->dataPtr->compStartServiceName = _sdf->Get<std::string>("start_competition_service_name");
@@ -429,14 +425,8 @@ void ROSAriacTaskManagerPlugin::Load(physics::WorldPtr _world,
 
   std::map<int, std::string> agvDeliverServiceName;
   std::map<int, std::string> agvAnimateServiceName;
-  // this will call /to_as1, defined in ROSAGVPlugin.cc
-  std::map<int, std::string> agvToAS1AnimateServiceName;
-  // this will call /to_as2, defined in ROSAGVPlugin.cc
-  std::map<int, std::string> agvToAS2AnimateServiceName;
-  // this will call /to_as3, defined in ROSAGVPlugin.cc
-  std::map<int, std::string> agvToAS3AnimateServiceName;
-  // this will call /to_as4, defined in ROSAGVPlugin.cc
-  std::map<int, std::string> agvToAS4AnimateServiceName;
+  // these will call /to_as1, /to_as2..., defined in ROSAGVPlugin.cc, by assembly station
+  std::map<int, std::map<std::string, std::string>> agvToASAnimateServiceNames;
   // get the content of the AGV
   std::map<int, std::string> agv_get_content_service_name;
   // get the content of a station
@@ -494,11 +484,6 @@ void ROSAriacTaskManagerPlugin::Load(physics::WorldPtr _world,
       int index = agvElem->Get<int>("index");
       agvDeliverServiceName[index] = "deliver";
 
-      agvToAS1AnimateServiceName[index] = "";
-      agvToAS2AnimateServiceName[index] = "";
-      agvToAS3AnimateServiceName[index] = "";
-      agvToAS4AnimateServiceName[index] = "";
-
       agv_get_content_service_name[index] = "get_content";
       agv_to_assembly_station_service_name[index] = "submit_shipment";
       agvLocationTopic[index] = "";
@@ -509,75 +494,22 @@ void ROSAriacTaskManagerPlugin::Load(physics::WorldPtr _world,
         agvLocationTopic[index] = agvElem->Get<std::string>("agv_location_topic");
         // publisher for setting the location (station) of AGVs in the environment
         gzdbg << index << ":" << agvLocationTopic[index] << "\n";
-        if (index == 1)
-        {
-          this->dataPtr->agv1CurrentStationPub =
-              this->dataPtr->rosnode->advertise<std_msgs::String>(agvLocationTopic[index], 1000, true);
-          this->dataPtr->stationForAGV1Sub =
-              this->dataPtr->rosnode->subscribe(agvLocationTopic[index],
-                                                1000,
-                                                &ROSAriacTaskManagerPlugin::OnAGV1Location,
-                                                this);
-        }
-        if (index == 2)
-        {
-          this->dataPtr->agv2CurrentStationPub =
-              this->dataPtr->rosnode->advertise<std_msgs::String>(agvLocationTopic[index], 1000, true);
-          this->dataPtr->stationForAGV2Sub =
-              this->dataPtr->rosnode->subscribe(agvLocationTopic[index],
-                                                1000,
-                                                &ROSAriacTaskManagerPlugin::OnAGV2Location,
-                                                this);
-        }
-        if (index == 3)
-        {
-          this->dataPtr->agv3CurrentStationPub =
-              this->dataPtr->rosnode->advertise<std_msgs::String>(agvLocationTopic[index],
-                                                                  1000,
-                                                                  true);
-
-          this->dataPtr->stationForAGV3Sub =
-              this->dataPtr->rosnode->subscribe(agvLocationTopic[index],
-                                                1000,
-                                                &ROSAriacTaskManagerPlugin::OnAGV3Location,
-                                                this);
-        }
-        if (index == 4)
-        {
-          this->dataPtr->agv4CurrentStationPub = this->dataPtr->rosnode->advertise<std_msgs::String>(agvLocationTopic[index], 1000, true);
-          this->dataPtr->stationForAGV4Sub =
-              this->dataPtr->rosnode->subscribe(agvLocationTopic[index], 1000, &ROSAriacTaskManagerPlugin::OnAGV4Location, this);
-        }
+        this->dataPtr->agvCurrentStationPubs[index] =
+            this->dataPtr->rosnode->advertise<std_msgs::String>(agvLocationTopic[index], 1000, true);
+        this->dataPtr->stationForAGVSubs[index] =
+            this->dataPtr->rosnode->subscribe<std_msgs::String>(
+                agvLocationTopic[index], 1000,
+                boost::bind(&ROSAriacTaskManagerPlugin::OnAGVLocation, this, _1, index));
       }
       if (agvElem->HasElement("agv_start_location_name"))
       {
         agvStartLocation[index] = agvElem->Get<std::string>("agv_start_location_name");
+        this->dataPtr->agvStartLocations[index] = agvStartLocation[index];
         std_msgs::String msg;
         msg.data = agvStartLocation[index];
 
-        if (index == 1)
-        {
-          this->dataPtr->agv1_current_station = agvStartLocation[index];
-          this->dataPtr->agv1CurrentStationPub.publish(msg);
-        }
-
-        if (index == 2)
-        {
-          this->dataPtr->agv2_current_station = agvStartLocation[index];
-          this->dataPtr->agv2CurrentStationPub.publish(msg);
-        }
-
-        if (index == 3)
-        {
-          this->dataPtr->agv3_current_station = agvStartLocation[index];
-          this->dataPtr->agv3CurrentStationPub.publish(msg);
-        }
-
-        if (index == 4)
-        {
-          this->dataPtr->agv4_current_station = agvStartLocation[index];
-          this->dataPtr->agv4CurrentStationPub.publish(msg);
-        }
+        this->dataPtr->agvCurrentStations[index] = agvStartLocation[index];
+        this->dataPtr->agvCurrentStationPubs[index].publish(msg);
       }
       if (agvElem->HasElement("agv_control_service_name"))
       {
@@ -591,21 +523,14 @@ void ROSAriacTaskManagerPlugin::Load(physics::WorldPtr _world,
       {
         agv_to_assembly_station_service_name[index] = agvElem->Get<std::string>("agv_to_as_service_name");
       }
-      if (agvElem->HasElement("to_as1_name"))
-      {
-        agvToAS1AnimateServiceName[index] = agvElem->Get<std::string>("to_as1_name");
-      }
-      if (agvElem->HasElement("to_as2_name"))
-      {
-        agvToAS2AnimateServiceName[index] = agvElem->Get<std::string>("to_as2_name");
-      }
-      if (agvElem->HasElement("to_as3_name"))
-      {
-        agvToAS3AnimateServiceName[index] = agvElem->Get<std::string>("to_as3_name");
-      }
-      if (agvElem->HasElement("to_as4_name"))
+      // <to_as1_name>, <to_as2_name>...
+      for (auto elem = agvElem->GetFirstElement(); elem; elem = elem->GetNextElement())
       {
-        agvToAS4AnimateServiceName[index] = agvElem->Get<std::string>("to_as4_name");
+        std::string station = ariac::AnimatedAssemblyStation(elem->GetName());
+        if (!station.empty())
+        {
+          agvToASAnimateServiceNames[index][station] = elem->Get<std::string>();
+        }
       }
 
       agvElem = agvElem->GetNextElement("agv");
@@ -952,6 +877,7 @@ void ROSAriacTaskManagerPlugin::Load(physics::WorldPtr _world,
 
   // Sort the orders by their start times.
   std::sort(this->dataPtr->ordersToAnnounce.begin(), this->dataPtr->ordersToAnnounce.end());
+  this->dataPtr->initialOrdersToAnnounce = this->dataPtr->ordersToAnnounce;
 
   // Debug output.
   // gzdbg << "Orders:" << std::endl;
@@ -1002,6 +928,7 @@ void ROSAriacTaskManagerPlugin::Load(physics::WorldPtr _world,
     auto sensorBlackoutElem = _sdf->GetElement("sensor_blackout");
     std::string sensorEnableTopic = sensorBlackoutElem->Get<std::string>("topic");
     this->dataPtr->sensorBlackoutProductCount = sensorBlackoutElem->Get<int>("product_count");
+    this->dataPtr->initialSensorBlackoutProductCount = this->dataPtr->sensorBlackoutProductCount;
     this->dataPtr->sensorBlackoutDuration = sensorBlackoutElem->Get<double>("duration");
     this->dataPtr->sensorBlackoutControlPub =
         this->dataPtr->node->Advertise<msgs::GzString>(sensorEnableTopic);
@@ -1036,6 +963,15 @@ void ROSAriacTaskManagerPlugin::Load(physics::WorldPtr _world,
       this->dataPtr->rosnode->advertiseService(compEndServiceName,
                                                &ROSAriacTaskManagerPlugin::HandleEndService, this);
 
+  // service for resetting the world between the cases of a test session.
+  // Not available in competition mode, where a trial must run exactly once.
+  if (!this->dataPtr->competitionMode)
+  {
+    this->dataPtr->compResetServiceServer =
+        this->dataPtr->rosnode->advertiseService(compResetServiceName,
+                                                 &ROSAriacTaskManagerPlugin::HandleResetService, this);
+  }
+
   // service for submitting AGV trays for inspection without moving the AGVs
   this->dataPtr->submitTrayServiceServer =
       this->dataPtr->rosnode->advertiseService(submitTrayServiceName,
@@ -1119,48 +1055,16 @@ void ROSAriacTaskManagerPlugin::Load(physics::WorldPtr _world,
         this->dataPtr->rosnode->serviceClient<nist_gear::DetectAssemblyShipment>(serviceName);
   }
 
-  for (auto &pair : agvToAS1AnimateServiceName)
+  for (auto &pair : agvToASAnimateServiceNames)
   {
     int index = pair.first;
-    std::string serviceName = pair.second;
-    if (!serviceName.empty())
+    for (auto &stationService : pair.second)
     {
-      this->dataPtr->agvToAS1AnimateClient[index] =
-          this->dataPtr->rosnode->serviceClient<std_srvs::Trigger>(serviceName);
-    }
-  }
-
-  for (auto &pair : agvToAS2AnimateServiceName)
-  {
-    int index = pair.first;
-    std::string serviceName = pair.second;
-    if (!serviceName.empty())
-    {
-      // ROS_WARN_STREAM("agvToAS2AnimateServiceName");
-      this->dataPtr->agvToAS2AnimateClient[index] =
-          this->dataPtr->rosnode->serviceClient<std_srvs::Trigger>(serviceName);
-    }
-  }
-
-  for (auto &pair : agvToAS3AnimateServiceName)
-  {
-    int index = pair.first;
-    std::string serviceName = pair.second;
-    if (!serviceName.empty())
-    {
-      this->dataPtr->agvToAS3AnimateClient[index] =
-          this->dataPtr->rosnode->serviceClient<std_srvs::Trigger>(serviceName);
-    }
-  }
-
-  for (auto &pair : agvToAS4AnimateServiceName)
-  {
-    int index = pair.first;
-    std::string serviceName = pair.second;
-    if (!serviceName.empty())
-    {
-      this->dataPtr->agvToAS4AnimateClient[index] =
-          this->dataPtr->rosnode->serviceClient<std_srvs::Trigger>(serviceName);
+      if (!stationService.second.empty())
+      {
+        this->dataPtr->agvToASAnimateClients[index][stationService.first] =
+            this->dataPtr->rosnode->serviceClient<std_srvs::Trigger>(stationService.second);
+      }
     }
   }
 
@@ -1221,29 +1125,12 @@ void ROSAriacTaskManagerPlugin::Load(physics::WorldPtr _world,
 
 }
 
-void ROSAriacTaskManagerPlugin::OnAGV1Location(std_msgs::String::ConstPtr _msg)
-{
-  std::lock_guard<std::mutex> lock(this->dataPtr->mutex);
-  this->dataPtr->agv1_current_station = _msg->data;
-}
-
-void ROSAriacTaskManagerPlugin::OnAGV2Location(std_msgs::String::ConstPtr _msg)
+void ROSAriacTaskManagerPlugin::OnAGVLocation(std_msgs::String::ConstPtr _msg, int _agvId)
 {
   std::lock_guard<std::mutex> lock(this->dataPtr->mutex);
-  this->dataPtr->agv2_current_station = _msg->data;
+  this->dataPtr->agvCurrentStations[_agvId] = _msg->data;
 }
 
-void ROSAriacTaskManagerPlugin::OnAGV3Location(std_msgs::String::ConstPtr _msg)
-{
-  std::lock_guard<std::mutex> lock(this->dataPtr->mutex);
-  this->dataPtr->agv3_current_station = _msg->data;
-}
-
-void ROSAriacTaskManagerPlugin::OnAGV4Location(std_msgs::String::ConstPtr _msg)
-{
-  std::lock_guard<std::mutex> lock(this->dataPtr->mutex);
-  this->dataPtr->agv4_current_station = _msg->data;
-}
 /////////////////////////////////////////////////
 void ROSAriacTaskManagerPlugin::OnUpdate()
 {
@@ -1295,17 +1182,23 @@ void ROSAriacTaskManagerPlugin::OnUpdate()
     // Update the sensors if appropriate.
     this->ProcessSensorBlackout();
 
-    // Update the score.
-    // TODO(sloretz) only publish this when an event that could change the score happens
-    auto gameScore = this->dataPtr->ariacScorer.GetGameScore(this->dataPtr->floorPenalty);
-
-    if (gameScore.total() != this->dataPtr->currentGameScore.total())
+    // Update the score, only when an event that could change it happened.
+    auto scoreVersion = this->dataPtr->ariacScorer.GetScoreVersion();
+    if (scoreVersion != this->dataPtr->checkedScoreVersion ||
+        this->dataPtr->floorPenalty != this->dataPtr->checkedFloorPenalty)
     {
-      std::ostringstream logMessage;
-      logMessage << "Current game score: " << gameScore.total();
-      ROS_DEBUG_STREAM(logMessage.str().c_str());
-      gzdbg << logMessage.str() << std::endl;
-      this->dataPtr->currentGameScore = gameScore;
+      this->dataPtr->checkedScoreVersion = scoreVersion;
+      this->dataPtr->checkedFloorPenalty = this->dataPtr->floorPenalty;
+      auto gameScore = this->dataPtr->ariacScorer.GetGameScore(this->dataPtr->floorPenalty);
+
+      if (gameScore.total() != this->dataPtr->currentGameScore.total())
+      {
+        std::ostringstream logMessage;
+        logMessage << "Current game score: " << gameScore.total();
+        ROS_DEBUG_STREAM(logMessage.str().c_str());
+        gzdbg << logMessage.str() << std::endl;
+        this->dataPtr->currentGameScore = gameScore;
+      }
     }
 
     if (!this->dataPtr->ordersInProgress.empty())
@@ -1489,11 +1382,10 @@ void ROSAriacTaskManagerPlugin::ProcessRobotStatus()
     // check how many parts we have in location
     // call the service /ariac/kit_tray_x/get_content
     std::string location_topic = "";
-    if (location == "agv1" || location == "agv2" || location == "agv3" || location == "agv4")
+    auto agv = ariac::AgvRegistry::Instance().Find(location);
+    if (agv && location == agv->name)
     {
-      location_topic = "/ariac/kit_tray_";
-      location_topic += +location.back();
-      location_topic += "/get_content";
+      location_topic = "/ariac/" + agv->kitTray + "/get_content";
       // gzdbg << "LOCATION TOPIC: " << location_topic<< "\n";
       ros::ServiceClient client =
           this->dataPtr->rosnode->serviceClient<nist_gear::DetectKittingShipment>(location_topic);
@@ -1899,6 +1791,75 @@ bool ROSAriacTaskManagerPlugin::HandleEndService(
   return true;
 }
 
+/////////////////////////////////////////////////
+bool ROSAriacTaskManagerPlugin::HandleResetService(
+    std_srvs::Trigger::Request &req,
+    std_srvs::Trigger::Response &res)
+{
+  gzdbg << "Handle reset service called\n";
+  (void)req;
+
+  // Put every model loaded with the world back at its initial pose. This also
+  // calls Reset() on the model plugins, which stops the AGVs and grippers.
+  // Models spawned afterwards are left alone; whoever spawned them removes them.
+  // This runs on a ROS thread, so the world is paused and the physics update
+  // lock is held while the models are reset.
+  {
+    const bool wasPaused = this->dataPtr->world->IsPaused();
+    this->dataPtr->world->SetPaused(true);
+    {
+      boost::recursive_mutex::scoped_lock physicsLock(
+          *this->dataPtr->world->Physics()->GetPhysicsUpdateMutex());
+      this->dataPtr->world->ResetEntities(physics::Base::MODEL);
+    }
+    this->dataPtr->world->SetPaused(wasPaused);
+  }
+
+  {
+    std::lock_guard<std::mutex> lock(this->dataPtr->mutex);
+    this->dataPtr->currentState = "init";
+    this->dataPtr->ariacScorer.Reset();
+    this->dataPtr->currentGameScore = ariac::GameScore();
+    this->dataPtr->ordersToAnnounce = this->dataPtr->initialOrdersToAnnounce;
+    this->dataPtr->ordersInProgress = std::stack<ariac::Order>();
+    this->dataPtr->currentOrder = ariac::Order();
+    this->dataPtr->kittingShipmentContents.clear();
+    this->dataPtr->assemblyShipmentContents.clear();
+    this->dataPtr->gameStartTime = common::Time();
+    this->dataPtr->timeSpentOnCurrentOrder = 0.0;
+    this->dataPtr->floorPenalty = 0;
+    // End a blackout in progress the way ProcessSensorBlackout does, and arm it again
+    if (this->dataPtr->isSensorBlackoutInProgress)
+    {
+      gzdbg << "Ending sensor blackout." << std::endl;
+      gazebo::msgs::GzString activateMsg;
+      activateMsg.set_data("activate");
+      this->dataPtr->sensorBlackoutControlPub->Publish(activateMsg);
+      this->dataPtr->isSensorBlackoutInProgress = false;
+    }
+    this->dataPtr->sensorBlackoutProductCount = this->dataPtr->initialSensorBlackoutProductCount;
+    this->dataPtr->actualStationForKittingShipment = "";
+    this->dataPtr->actualAGVUsedForKittingShipment = 0;
+  }
+
+  // Send the AGVs back to their start stations, as when the world was loaded
+  for (const auto &startLocation : this->dataPtr->agvStartLocations)
+  {
+    this->SetAGVLocation("agv" + std::to_string(startLocation.first), startLocation.second);
+  }
+
+  if (this->dataPtr->conveyorControlClient.exists())
+  {
+    nist_gear::ConveyorBeltControl stop;
+    stop.request.power = 0.0;
+    this->dataPtr->conveyorControlClient.call(stop);
+  }
+
+  res.success = true;
+  res.message = "competition reset successfully";
+  return true;
+}
+
 /////////////////////////////////////////////////
 bool ROSAriacTaskManagerPlugin::HandleSubmitKittingShipmentService(
     ros::ServiceEvent<nist_gear::SubmitShipment::Request, nist_gear::SubmitShipment::Response> &event)
@@ -1947,29 +1908,15 @@ bool ROSAriacTaskManagerPlugin::HandleSubmitKittingShipmentService(
 
   std::string current_station{};
 
-  if (1 == destination_id.size() && '1' == destination_id[0])
-  {
-    agv_id = 1;
-    current_station = this->dataPtr->agv1_current_station;
-    // this->dataPtr->rosnode->getParam("/ariac/agv1_station", current_station);
-  }
-  else if (1 == destination_id.size() && '2' == destination_id[0])
+  const ariac::AgvInfo *agv = nullptr;
+  if (1 == destination_id.size() && std::isdigit(destination_id[0]))
   {
-    agv_id = 2;
-    current_station = this->dataPtr->agv2_current_station;
-    // this->dataPtr->rosnode->getParam("/ariac/agv2_station", current_station);
+    agv = ariac::AgvRegistry::Instance().Find(destination_id[0] - '0');
   }
-  else if (1 == destination_id.size() && '3' == destination_id[0])
+  if (agv)
   {
-    agv_id = 3;
-    current_station = this->dataPtr->agv3_current_station;
-    // this->dataPtr->rosnode->getParam("/ariac/agv3_station", current_station);
-  }
-  else if (1 == destination_id.size() && '4' == destination_id[0])
-  {
-    agv_id = 4;
-    current_station = this->dataPtr->agv4_current_station;
-    // this->dataPtr->rosnode->getParam("/ariac/agv4_station", current_station);
+    agv_id = agv->id;
+    current_station = this->dataPtr->agvCurrentStations[agv_id];
   }
 
   if (0 == agv_id)
@@ -2126,49 +2073,29 @@ bool ROSAriacTaskManagerPlugin::HandleSendAgvToASService(
 
   gzdbg << "AGV go to station service called for agv" << agv_id << "\n";
 
-  if (agv_id == 1 || agv_id == 2)  // for AGV1 and AGV2
+  auto agv = ariac::AgvRegistry::Instance().Find(agv_id);
+  if (!agv)
   {
-    if (this->dataPtr->agvToAS1AnimateClient.end() == this->dataPtr->agvToAS1AnimateClient.find(agv_id))
-    {
-      ROS_ERROR_STREAM("[ARIAC TaskManager] NO \"to_as1\" animate client for agv " << agv_id);
-      return false;
-    }
-    if (this->dataPtr->agvToAS2AnimateClient.end() == this->dataPtr->agvToAS2AnimateClient.find(agv_id))
-    {
-      ROS_ERROR_STREAM("[ARIAC TaskManager] NO \"to_as2\" animate client for agv " << agv_id);
-      return false;
-    }
+    ROS_ERROR_STREAM("[ARIAC TaskManager] unknown agv " << agv_id);
+    return false;
   }
-  else if (agv_id == 3 || agv_id == 4)  // for AGV3 and AGV4
+
+  // Animate clients of the AGV, by assembly station
+  const auto &animateClients = this->dataPtr->agvToASAnimateClients[agv_id];
+  for (const auto &station : agv->assemblyStations)
   {
-    if (this->dataPtr->agvToAS3AnimateClient.end() == this->dataPtr->agvToAS3AnimateClient.find(agv_id))
-    {
-      ROS_ERROR_STREAM("[ARIAC TaskManager] NO \"to_as3\" animate client for agv " << agv_id);
-      return false;
-    }
-    if (this->dataPtr->agvToAS4AnimateClient.end() == this->dataPtr->agvToAS4AnimateClient.find(agv_id))
+    if (animateClients.find(station) == animateClients.end())
     {
-      ROS_ERROR_STREAM("[ARIAC TaskManager] NO \"to_as4\" animate client for agv " << agv_id);
+      ROS_ERROR_STREAM("[ARIAC TaskManager] NO \"to_" << station << "\" animate client for agv " << agv_id);
       return false;
     }
   }
 
   ros::ServiceClient agv_to_as_animate_client;
-  if (this->dataPtr->actualStationForKittingShipment == "as1")
-  {
-    agv_to_as_animate_client = this->dataPtr->agvToAS1AnimateClient.at(agv_id);
-  }
-  else if (this->dataPtr->actualStationForKittingShipment == "as2")
-  {
-    agv_to_as_animate_client = this->dataPtr->agvToAS2AnimateClient.at(agv_id);
-  }
-  else if (this->dataPtr->actualStationForKittingShipment == "as3")
+  auto client = animateClients.find(this->dataPtr->actualStationForKittingShipment);
+  if (client != animateClients.end())
   {
-    agv_to_as_animate_client = this->dataPtr->agvToAS3AnimateClient.at(agv_id);
-  }
-  else if (this->dataPtr->actualStationForKittingShipment == "as4")
-  {
-    agv_to_as_animate_client = this->dataPtr->agvToAS4AnimateClient.at(agv_id);
+    agv_to_as_animate_client = client->second;
   }
 
   if (!agv_to_as_animate_client.exists())
@@ -2226,26 +2153,19 @@ bool ROSAriacTaskManagerPlugin::HandleSendAgvToASService(
 
 void ROSAriacTaskManagerPlugin::SetAGVLocation(std::string agv_frame, std::string assembly_station)
 {
-  std::string agv = agv_frame.substr(0, 4);
-  std::string parameter = "/ariac/" + agv + "_station";
-  std_msgs::String msg;
-  msg.data = assembly_station;
-  if (agv == "agv1")
+  auto agv = ariac::AgvRegistry::Instance().Find(agv_frame.substr(0, agv_frame.find("::")));
+  if (!agv)
   {
-    this->dataPtr->agv1CurrentStationPub.publish(msg);
-  }
-  if (agv == "agv2")
-  {
-    this->dataPtr->agv2CurrentStationPub.publish(msg);
-  }
-  if (agv == "agv3")
-  {
-    this->dataPtr->agv3CurrentStationPub.publish(msg);
+    return;
   }
-  if (agv == "agv4")
+  auto pub = this->dataPtr->agvCurrentStationPubs.find(agv->id);
+  if (pub == this->dataPtr->agvCurrentStationPubs.end())
   {
-    this->dataPtr->agv4CurrentStationPub.publish(msg);
+    return;
   }
+  std_msgs::String msg;
+  msg.data = assembly_station;
+  pub->second.publish(msg);
 }
 
 /////////////////////////////////////////////////
@@ -2362,9 +2282,15 @@ void ROSAriacTaskManagerPlugin::OnContactsReceived(ConstContactsPtr &_msg)
     // Simplified arm-arm and arm-torso collision, as all arm and torso links are prefaced with 'gantry::'
     // e.g. gantry::left_forearm_link::left_forearm_link_collision and gantry::torso_main::torso_main_collision
     // Also - only check if competition has started, as arm is in collision when first spawned
+    // Contacts between the gantry and the kitting robot count as well
+    const bool col_1_is_gantry = contact.collision1().rfind("gantry::", 0) == 0;
+    const bool col_2_is_gantry = contact.collision2().rfind("gantry::", 0) == 0;
+    const bool col_1_is_kitting = contact.collision1().rfind("kitting::", 0) == 0;
+    const bool col_2_is_kitting = contact.collision2().rfind("kitting::", 0) == 0;
     if (this->dataPtr->currentState == "go" &&
-        contact.collision1().rfind("gantry", 0) == 0 &&
-        contact.collision2().rfind("gantry", 0) == 0)
+        ((col_1_is_gantry && col_2_is_gantry) ||
+         (col_1_is_gantry && col_2_is_kitting) ||
+         (col_1_is_kitting && col_2_is_gantry)))
     {
       ROS_ERROR_STREAM("arm/arm contact detected: " << contact.collision1() << " and " << contact.collision2());
       std::lock_guard<std::mutex> lock(this->dataPtr->mutex);
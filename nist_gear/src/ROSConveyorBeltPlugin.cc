@@ -32,6 +32,7 @@ ROSConveyorBeltPlugin::ROSConveyorBeltPlugin()
 /////////////////////////////////////////////////
 ROSConveyorBeltPlugin::~ROSConveyorBeltPlugin()
 {
+  this->statePublisher.Stop();
   this->rosnode_->shutdown();
 }
 
@@ -70,9 +71,8 @@ void ROSConveyorBeltPlugin::Load(physics::ModelPtr _parent, sdf::ElementPtr _sdf
   this->controlService_ = this->rosnode_->advertiseService(controlTopic,
     &ROSConveyorBeltPlugin::OnControlCommand, this);
 
-  // Message used for publishing the state of the conveyor.
-  this->statePub = this->rosnode_->advertise<
-    nist_gear::ConveyorBeltState>(stateTopic, 1000);
+  // The state of the conveyor is published from a separate thread.
+  this->statePublisher.Start(*this->rosnode_, stateTopic, _sdf);
 }
 
 /////////////////////////////////////////////////
@@ -81,7 +81,7 @@ void ROSConveyorBeltPlugin::Publish() const
   nist_gear::ConveyorBeltState stateMsg;
   stateMsg.enabled = this->IsEnabled();
   stateMsg.power = this->Power();
-  this->statePub.publish(stateMsg);
+  this->statePublisher.Update(stateMsg);
 }
 
 /////////////////////////////////////////////////
@@ -59,6 +59,10 @@ void ROSLogicalCameraPlugin::Load(physics::ModelPtr _parent, sdf::ElementPtr _sd
 
   this->world = _parent->GetWorld();
   this->name = _parent->GetName();
+  this->addEntityConnection = event::Events::ConnectAddEntity(
+    std::bind(&ROSLogicalCameraPlugin::ClearNestedModels, this, std::placeholders::_1));
+  this->deleteEntityConnection = event::Events::ConnectDeleteEntity(
+    std::bind(&ROSLogicalCameraPlugin::ClearNestedModels, this, std::placeholders::_1));
 
   // Make sure the ROS node for Gazebo has already been initialized
   if (!ros::isInitialized())
@@ -88,7 +92,7 @@ void ROSLogicalCameraPlugin::Load(physics::ModelPtr _parent, sdf::ElementPtr _sd
       std::string type = knownModelTypeElem->Get<std::string>();
 
       ROS_DEBUG_STREAM("New known model type: " << type);
-      this->knownModelTypes.push_back(type);
+      this->knownModelTypes.insert(type);
       knownModelTypeElem = knownModelTypeElem->GetNextElement("type");
     }
   }
@@ -107,12 +111,16 @@ void ROSLogicalCameraPlugin::Load(physics::ModelPtr _parent, sdf::ElementPtr _sd
         std::string knownModelName = knownModelNameElem->Get<std::string>();
 
         ROS_DEBUG_STREAM("New known model name: " << knownModelName);
-        this->knownModelNames.push_back(knownModelName);
+        this->knownModelNames.insert(knownModelName);
         knownModelNameElem = knownModelNameElem->GetNextElement("name");
       }
     }
   }
 
+  this->modelNameCache.reset(new ariac::ModelNameCache([this](ariac::ModelNameInfo &_info) {
+    _info.publish = this->ModelToPublish(_info);
+  }));
+
   this->anonymizeModels = false;
   if (_sdf->HasElement("anonymize_models"))
   {
@@ -230,21 +238,26 @@ void ROSLogicalCameraPlugin::OnImage(ConstLogicalCameraImagePtr &_msg)
   imageMsg.pose.orientation.z = cameraOrientation.Z();
   imageMsg.pose.orientation.w = cameraOrientation.W();
 
+  // Only describe the models when the description can be printed
+  bool logModels = DebugLoggingEnabled();
   std::ostringstream logStream;
   ignition::math::Pose3d modelPose;
   std::vector<geometry_msgs::TransformStamped> transforms;
   for (int i = 0; i < _msg->model_size(); ++i)
   {
     std::string modelName = _msg->model(i).name();
-    std::string modelType = ariac::DetermineModelType(modelName);
+    auto modelInfo = this->modelNameCache->Resolve(modelName);
+    std::string modelType = modelInfo->type;
 
-    if (!this->ModelToPublish(modelName, modelType))
+    if (!modelInfo->publish)
     {
-      logStream << "Not publishing model: " << modelName << " of type: " << modelType << std::endl;
+      if (logModels)
+        logStream << "Not publishing model: " << modelName << " of type: " << modelType << std::endl;
     }
     else
     {
-      logStream << "Publishing model: " << modelName << " of type: " << modelType << std::endl;
+      if (logModels)
+        logStream << "Publishing model: " << modelName << " of type: " << modelType << std::endl;
       ignition::math::Vector3d modelPosition =
         msgs::ConvertIgn(_msg->model(i).pose().position());
       ignition::math::Quaterniond modelOrientation =
@@ -255,39 +268,28 @@ void ROSLogicalCameraPlugin::OnImage(ConstLogicalCameraImagePtr &_msg)
       std::string modelTypeToUse;
       if (this->anonymizeModels)
       {
-        modelNameToUse = "model_" + ariac::DetermineModelId(modelName);
+        modelNameToUse = "model_" + modelInfo->id;
         modelTypeToUse = "model";
       }
       else
       {
-        modelNameToUse = ariac::TrimNamespace(modelName);
+        modelNameToUse = modelInfo->trimmedName;
         modelTypeToUse = modelType;
       }
       std::string modelFrameId = this->modelFramePrefix + modelNameToUse + "_frame";
 
-      bool isAgv = modelType == "agv1" || modelType == "agv2" || modelType == "agv3" || modelType == "agv4";
-      if (isAgv)
+      const ariac::AgvInfo *agv = nullptr;
+      if (modelType.compare(0, 3, "agv") == 0)
+      {
+        agv = ariac::AgvRegistry::Instance().Find(modelType);
+      }
+      if (agv)
       {
         // If AGVs are detected, also publish the pose to the respective kit tray.
         // Add noise to the kit tray pose, not the AGV base (it is too much noise by the time the tray pose is extrapolated)
         auto noisyKitTrayPose = ignition::math::Pose3d(this->kitTrayToAgv);
         this->AddNoise(noisyKitTrayPose);
-        if (modelType == "agv1")
-        {
-          transforms.push_back(this->ToTransformStamped(noisyKitTrayPose, modelFrameId, this->modelFramePrefix + "kit_tray_1_frame"));
-        }
-        else if (modelType == "agv2")
-        {
-          transforms.push_back(this->ToTransformStamped(noisyKitTrayPose, modelFrameId, this->modelFramePrefix + "kit_tray_2_frame"));
-        }
-        else if (modelType == "agv3")
-        {
-          transforms.push_back(this->ToTransformStamped(noisyKitTrayPose, modelFrameId, this->modelFramePrefix + "kit_tray_3_frame"));
-        }
-        else if (modelType == "agv4")
-        {
-          transforms.push_back(this->ToTransformStamped(noisyKitTrayPose, modelFrameId, this->modelFramePrefix + "kit_tray_4_frame"));
-        }
+        transforms.push_back(this->ToTransformStamped(noisyKitTrayPose, modelFrameId, this->modelFramePrefix + agv->kitTrayFrame));
       }
       else
       {
@@ -299,18 +301,19 @@ void ROSLogicalCameraPlugin::OnImage(ConstLogicalCameraImagePtr &_msg)
     }
 
     // Check any children models
-    auto modelPtr = this->world->ModelByName(modelName);
-    auto nestedModels = modelPtr->NestedModels();
-    for (auto nestedModel : nestedModels)
+    for (auto nestedModel : this->NestedModels(modelName))
     {
       modelName = nestedModel->GetName();
-      modelType = ariac::DetermineModelType(modelName);
-      if (!this->ModelToPublish(modelName, modelType))
+      auto nestedModelInfo = this->modelNameCache->Resolve(modelName);
+      modelType = nestedModelInfo->type;
+      if (!nestedModelInfo->publish)
       {
-        logStream << "Not publishing model: " << modelName << " of type: " << modelType << std::endl;
+        if (logModels)
+          logStream << "Not publishing model: " << modelName << " of type: " << modelType << std::endl;
         continue;
       }
-      logStream << "Publishing model: " << modelName << " of type: " << modelType  << std::endl;
+      if (logModels)
+        logStream << "Publishing model: " << modelName << " of type: " << modelType  << std::endl;
       // Convert the world pose of the model into the camera frame
       modelPose = nestedModel->WorldPose() - cameraPose;
       this->AddNoise(modelPose);
@@ -332,8 +335,56 @@ void ROSLogicalCameraPlugin::OnImage(ConstLogicalCameraImagePtr &_msg)
     transformBroadcaster->sendTransform(transforms);
 }
 
-bool ROSLogicalCameraPlugin::ModelToPublish(
-  const std::string & modelName, const std::string & modelType)
+physics::Model_V ROSLogicalCameraPlugin::NestedModels(const std::string & modelName)
+{
+  std::lock_guard<std::mutex> lock(this->nestedModelsMutex);
+  auto it = this->nestedModelsCache.find(modelName);
+  if (it != this->nestedModelsCache.end())
+  {
+    return it->second;
+  }
+  // Searching the world by name is slow, so only do it once per model
+  auto modelPtr = this->world->ModelByName(modelName);
+  if (!modelPtr)
+  {
+    // Deleted since the image was taken
+    return physics::Model_V();
+  }
+  auto nestedModels = modelPtr->NestedModels();
+  this->nestedModelsCache[modelName] = nestedModels;
+  return nestedModels;
+}
+
+/////////////////////////////////////////////////
+void ROSLogicalCameraPlugin::ClearNestedModels(const std::string & /*entityName*/)
+{
+  // A model can be added to or removed from any other model, so forget them all
+  std::lock_guard<std::mutex> lock(this->nestedModelsMutex);
+  this->nestedModelsCache.clear();
+}
+
+/////////////////////////////////////////////////
+bool ROSLogicalCameraPlugin::DebugLoggingEnabled()
+{
+  // rosconsole only asks a filter once the debug level is enabled, so a filter
+  // that never lets the message through tells whether debug messages are printed
+  class EnabledFilter : public ros::console::FilterBase
+  {
+    public: bool isEnabled() override
+    {
+      this->enabled = true;
+      return false;
+    }
+    public: bool enabled = false;
+  };
+
+  EnabledFilter filter;
+  ROS_DEBUG_STREAM_FILTER(&filter, "");
+  return filter.enabled;
+}
+
+/////////////////////////////////////////////////
+bool ROSLogicalCameraPlugin::ModelToPublish(const ariac::ModelNameInfo & modelInfo)
 {
   bool publishModel = true;
 
@@ -341,10 +392,8 @@ bool ROSLogicalCameraPlugin::ModelToPublish(
   if (this->onlyPublishKnownModels)
   {
     // Only publish the model if its type is known
-    auto it = std::find(this->knownModelTypes.begin(), this->knownModelTypes.end(), modelType);
-    bool knownModel = it != this->knownModelTypes.end();
-    it = std::find(this->knownModelNames.begin(), this->knownModelNames.end(), ariac::TrimNamespace(modelName));
-    knownModel |= it != this->knownModelNames.end();
+    bool knownModel = this->knownModelTypes.count(modelInfo.type) > 0;
+    knownModel |= this->knownModelNames.count(modelInfo.trimmedName) > 0;
     publishModel = knownModel;
   }
   return publishModel;
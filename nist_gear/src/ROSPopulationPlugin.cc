@@ -25,6 +25,7 @@
 #include "nist_gear/ROSPopulationPlugin.hh"
 #include "nist_gear/PopulationControl.h"
 #include "nist_gear/PopulationState.h"
+#include "nist_gear/SnapshotPublisher.hh"
 
 namespace gazebo
 {
@@ -36,7 +37,7 @@ namespace gazebo
     public: std::unique_ptr<ros::NodeHandle> rosnode;
 
     /// \brief Publishes the state of the plugin.
-    public: ros::Publisher statePub;
+    public: ariac::SnapshotPublisher<nist_gear::PopulationState> statePublisher;
 
     /// \brief Receives service calls to control the plugin.
     public: ros::ServiceServer controlService;
@@ -57,6 +58,7 @@ ROSPopulationPlugin::ROSPopulationPlugin()
 /////////////////////////////////////////////////
 ROSPopulationPlugin::~ROSPopulationPlugin()
 {
+  this->dataPtr->statePublisher.Stop();
   this->dataPtr->rosnode->shutdown();
 }
 
@@ -103,9 +105,8 @@ void ROSPopulationPlugin::Load(physics::WorldPtr _world, sdf::ElementPtr _sdf)
         &ROSPopulationPlugin::OnPopulationControl, this);
   }
 
-  // Message used for publishing the state of the gripper.
-  this->dataPtr->statePub = this->dataPtr->rosnode->advertise<
-    nist_gear::PopulationState>(stateTopic, 1000);
+  // The state is published from a separate thread.
+  this->dataPtr->statePublisher.Start(*this->dataPtr->rosnode, stateTopic, _sdf);
 }
 
 /////////////////////////////////////////////////
@@ -142,5 +143,5 @@ void ROSPopulationPlugin::Publish() const
 {
   nist_gear::PopulationState msg;
   msg.enabled = this->Enabled();
-  this->dataPtr->statePub.publish(msg);
+  this->dataPtr->statePublisher.Update(msg);
 }
@@ -22,6 +22,7 @@
 #include "nist_gear/ROSVacuumGripperPlugin.hh"
 #include "nist_gear/VacuumGripperControl.h"
 #include "nist_gear/VacuumGripperState.h"
+#include "nist_gear/SnapshotPublisher.hh"
 
 namespace gazebo
 {
@@ -33,7 +34,7 @@ namespace gazebo
     public: std::unique_ptr<ros::NodeHandle> rosnode;
 
     /// \brief Publishes the state of the gripper.
-    public: ros::Publisher statePub;
+    public: ariac::SnapshotPublisher<nist_gear::VacuumGripperState> statePublisher;
 
     /// \brief Receives service calls to control the gripper.
     public: ros::ServiceServer controlService;
@@ -54,6 +55,7 @@ ROSVacuumGripperPlugin::ROSVacuumGripperPlugin()
 /////////////////////////////////////////////////
 ROSVacuumGripperPlugin::~ROSVacuumGripperPlugin()
 {
+  this->dataPtr->statePublisher.Stop();
   this->dataPtr->rosnode->shutdown();
 }
 
@@ -95,9 +97,8 @@ void ROSVacuumGripperPlugin::Load(physics::ModelPtr _parent,
     this->dataPtr->rosnode->advertiseService(controlTopic,
       &ROSVacuumGripperPlugin::OnGripperControl, this);
 
-  // Message used for publishing the state of the gripper.
-  this->dataPtr->statePub = this->dataPtr->rosnode->advertise<
-    nist_gear::VacuumGripperState>(stateTopic, 1000);
+  // The state is published from a separate thread.
+  this->dataPtr->statePublisher.Start(*this->dataPtr->rosnode, stateTopic, _sdf);
 }
 
 /////////////////////////////////////////////////
@@ -126,5 +127,5 @@ void ROSVacuumGripperPlugin::Publish() const
   nist_gear::VacuumGripperState msg;
   msg.attached = this->Attached();
   msg.enabled = this->Enabled();
-  this->dataPtr->statePub.publish(msg);
+  this->dataPtr->statePublisher.Update(msg);
 }
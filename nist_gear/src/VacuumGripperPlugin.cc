@@ -143,9 +143,38 @@ namespace gazebo
   public:
     std::map<std::string, physics::CollisionPtr> collisions;
 
-    /// \brief The current contacts.
+    /// \brief A contact reported by the contact filter of the suction cup.
   public:
-    std::vector<msgs::Contact> contacts;
+    struct Contact
+    {
+      /// \brief Scoped name of the collision touching the suction cup, or empty
+      /// if the suction cup touches itself.
+      std::string modelCollision;
+
+      /// \brief Normal of the contact, oriented like modelContactNormal.
+      ignition::math::Vector3d modelNormal;
+    };
+
+    /// \brief The current contacts. Only the first contactCount elements are
+    /// valid; the others are kept to be reused by the next contacts message.
+  public:
+    std::vector<Contact> contacts;
+
+    /// \brief Number of valid elements in contacts.
+  public:
+    size_t contactCount = 0;
+
+    /// \brief Collisions found in the world by name, so that each collision
+    /// in contact is only searched for once. Cleared when entities are added
+    /// or deleted.
+  public:
+    std::map<std::string, physics::CollisionPtr> collisionCache;
+
+    /// \brief Connections to the entity insertion and deletion events.
+  public:
+    event::ConnectionPtr addEntityConnection;
+  public:
+    event::ConnectionPtr deleteEntityConnection;
 
     /// \brief Mutex used to protect reading/writing the sonar message.
   public:
@@ -483,6 +512,16 @@ void VacuumGripperPlugin::Load(physics::ModelPtr _model, sdf::ElementPtr _sdf)
     }
   }
 
+  auto clearCollisionCache = [this](const std::string &)
+  {
+    std::lock_guard<std::mutex> lock(this->dataPtr->mutex);
+    this->dataPtr->collisionCache.clear();
+  };
+  this->dataPtr->addEntityConnection =
+      event::Events::ConnectAddEntity(clearCollisionCache);
+  this->dataPtr->deleteEntityConnection =
+      event::Events::ConnectDeleteEntity(clearCollisionCache);
+
   this->Reset();
 
   this->dataPtr->connection = event::Events::ConnectWorldUpdateEnd(
@@ -708,20 +747,55 @@ void VacuumGripperPlugin::OnUpdate()
 void VacuumGripperPlugin::OnContacts(ConstContactsPtr &_msg)
 {
   std::lock_guard<std::mutex> lock(this->dataPtr->mutex);
-  this->dataPtr->contacts.clear();
+  size_t count = 0;
   for (int i = 0; i < _msg->contact_size(); ++i)
   {
-    CollisionPtr collision1 = boost::dynamic_pointer_cast<Collision>(
-        this->dataPtr->world->EntityByName(_msg->contact(i).collision1()));
-    CollisionPtr collision2 = boost::dynamic_pointer_cast<Collision>(
-        this->dataPtr->world->EntityByName(_msg->contact(i).collision2()));
+    const auto &name1 = _msg->contact(i).collision1();
+    const auto &name2 = _msg->contact(i).collision2();
+    auto collision1 = this->FindCollision(name1);
+    auto collision2 = this->FindCollision(name2);
+    if (!collision1 || collision1->IsStatic() ||
+        !collision2 || collision2->IsStatic())
+    {
+      continue;
+    }
 
-    if ((collision1 && !collision1->IsStatic()) &&
-        (collision2 && !collision2->IsStatic()))
+    // Keep only what GetContactNormal() needs instead of the whole message
+    if (count == this->dataPtr->contacts.size())
+      this->dataPtr->contacts.emplace_back();
+    auto &contact = this->dataPtr->contacts[count++];
+    if (this->dataPtr->collisions.find(name1) == this->dataPtr->collisions.end())
+    {
+      // Model in contact is the first name
+      contact.modelCollision = name1;
+      contact.modelNormal = -1 * msgs::ConvertIgn(_msg->contact(i).normal(0));
+    }
+    else if (this->dataPtr->collisions.find(name2) == this->dataPtr->collisions.end())
+    {
+      // Model in contact is the second name -- frames are reversed
+      contact.modelCollision = name2;
+      contact.modelNormal = msgs::ConvertIgn(_msg->contact(i).normal(0));
+    }
+    else
     {
-      this->dataPtr->contacts.push_back(_msg->contact(i));
+      contact.modelCollision.clear();
     }
   }
+  this->dataPtr->contactCount = count;
+}
+
+/////////////////////////////////////////////////
+physics::CollisionPtr VacuumGripperPlugin::FindCollision(const std::string &_name)
+{
+  auto iter = this->dataPtr->collisionCache.find(_name);
+  if (iter != this->dataPtr->collisionCache.end())
+    return iter->second;
+
+  auto collision = boost::dynamic_pointer_cast<Collision>(
+      this->dataPtr->world->EntityByName(_name));
+  if (collision)
+    this->dataPtr->collisionCache[_name] = collision;
+  return collision;
 }
 
 /////////////////////////////////////////////////
@@ -732,33 +806,20 @@ bool VacuumGripperPlugin::GetContactNormal()
 
   // Get the pointer to the collision that's not the gripper's.
   // This function is only called from the OnUpdate function so
-  // the call to contacts.clear() is not going to happen in
+  // OnContacts() is not going to rewrite the contacts in
   // parallel with the reads in the following code, no mutex needed.
-  for (unsigned int i = 0; i < this->dataPtr->contacts.size(); ++i)
+  for (size_t i = 0; i < this->dataPtr->contactCount; ++i)
   {
-    std::string name1 = this->dataPtr->contacts[i].collision1();
-    std::string name2 = this->dataPtr->contacts[i].collision2();
-    gzdbg << "Collision between '" << name1 << "' and '" << name2 << "'\n";
-
-    if (this->dataPtr->collisions.find(name1) ==
-        this->dataPtr->collisions.end())
-    {
-      // Model in contact is the second name
-      this->dataPtr->modelCollision = boost::dynamic_pointer_cast<Collision>(
-          this->dataPtr->world->EntityByName(name1));
-      this->dataPtr->modelContactNormal = -1 * msgs::ConvertIgn(this->dataPtr->contacts[i].normal(0));
-      return true;
-    }
+    const auto &contact = this->dataPtr->contacts[i];
+    if (contact.modelCollision.empty())
+      continue;
 
-    if (this->dataPtr->collisions.find(name2) ==
-        this->dataPtr->collisions.end())
-    {
-      // Model in contact is the first name -- frames are reversed
-      this->dataPtr->modelCollision = boost::dynamic_pointer_cast<Collision>(
-          this->dataPtr->world->EntityByName(name2));
-      this->dataPtr->modelContactNormal = msgs::ConvertIgn(this->dataPtr->contacts[i].normal(0));
-      return true;
-    }
+    gzdbg << "Collision with '" << contact.modelCollision << "'\n";
+    this->dataPtr->modelCollision = this->FindCollision(contact.modelCollision);
+    if (!this->dataPtr->modelCollision)
+      continue;
+    this->dataPtr->modelContactNormal = contact.modelNormal;
+    return true;
   }
 
   if (!collisionPtr)
@@ -842,11 +903,11 @@ void VacuumGripperPlugin::HandleDetach()
 bool VacuumGripperPlugin::CheckModelContact()
 {
   bool modelInContact = false;
-  if (this->dataPtr->contacts.size() > 0)
+  if (this->dataPtr->contactCount > 0)
   {
-    gzdbg << "Number of collisions with gripper: " << this->dataPtr->contacts.size() << std::endl;
+    gzdbg << "Number of collisions with gripper: " << this->dataPtr->contactCount << std::endl;
   }
-  if (this->dataPtr->contacts.size() >= this->dataPtr->minContactCount)
+  if (this->dataPtr->contactCount >= this->dataPtr->minContactCount)
   {
     gzdbg << "More collisions than the minContactCount: " << this->dataPtr->minContactCount << std::endl;
     this->dataPtr->posCount++;
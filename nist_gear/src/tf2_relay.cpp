@@ -15,19 +15,66 @@
  *
 */
 
-#include <algorithm>
 #include <functional>
+#include <map>
 #include <string>
+#include <unordered_map>
+#include <unordered_set>
+#include <utility>
 #include <vector>
 
 #include <ros/ros.h>
 #include <tf2_msgs/TFMessage.h>
 
 
+/// \brief Renames frames by adding a prefix, remembering the renamed frames
+class FrameRenamer
+{
+public:
+  FrameRenamer(const std::string & prefix, const std::vector<std::string> & frame_list)
+  : prefix_(prefix), frames_(frame_list.cbegin(), frame_list.cend())
+  {
+  }
+
+  /// \brief The relayed name of a frame, prefixed if it is in the frame list
+  const std::string &
+  operator()(const std::string & frame)
+  {
+    auto iter = renamed_.find(frame);
+    if (iter == renamed_.end()) {
+      const bool rename = frames_.empty() || frames_.count(frame);
+      iter = renamed_.emplace(frame, rename ? prefix_ + frame : frame).first;
+    }
+    return iter->second;
+  }
+
+  /// \brief A copy of a transform with its frames renamed
+  geometry_msgs::TransformStamped
+  rename(const geometry_msgs::TransformStamped & transform)
+  {
+    geometry_msgs::TransformStamped output_tf = transform;
+    output_tf.header.frame_id = (*this)(transform.header.frame_id);
+    output_tf.child_frame_id = (*this)(transform.child_frame_id);
+    return output_tf;
+  }
+
+private:
+  const std::string prefix_;
+  const std::unordered_set<std::string> frames_;
+  std::unordered_map<std::string, std::string> renamed_;
+};
+
+
 bool
-string_in(const std::string & needle, const std::vector<std::string> & haystack)
+same_transform(const geometry_msgs::TransformStamped & a, const geometry_msgs::TransformStamped & b)
 {
-  return haystack.cend() != std::find(haystack.cbegin(), haystack.cend(), needle);
+  const auto & ta = a.transform;
+  const auto & tb = b.transform;
+  return a.header.stamp == b.header.stamp &&
+         ta.translation.x == tb.translation.x && ta.translation.y == tb.translation.y &&
+         ta.translation.z == tb.translation.z && ta.rotation.x == tb.rotation.x &&
+         ta.rotation.y == tb.rotation.y && ta.rotation.z == tb.rotation.z &&
+         ta.rotation.w == tb.rotation.w;
 }
 
 
@@ -48,70 +95,56 @@ int main(int argc, char ** argv)
     ROS_WARN("'frames' param is empty, rewriting all frames");
   }
 
+  // Both callbacks run in the ros::spin() thread, so they can share it
+  FrameRenamer renamer(prefix, frame_list);
+
   ros::Subscriber sub = nh.subscribe<tf2_msgs::TFMessage>("in/tf", 100,
-    [prefix, &pub, frame_list](const boost::shared_ptr<const tf2_msgs::TFMessage> message)
+    [&renamer, &pub](const boost::shared_ptr<const tf2_msgs::TFMessage> message)
   {
     tf2_msgs::TFMessage output_msg;
+    output_msg.transforms.reserve(message->transforms.size());
     for (const auto & transform : message->transforms) {
       // Append prefix to frame names
-      geometry_msgs::TransformStamped output_tf = transform;
-      if (frame_list.empty() || string_in(transform.header.frame_id, frame_list)) {
-        output_tf.header.frame_id = prefix + transform.header.frame_id;
-      } else {
-        output_tf.header.frame_id = transform.header.frame_id;
-      }
-      if (frame_list.empty() || string_in(transform.child_frame_id, frame_list)) {
-        output_tf.child_frame_id = prefix + transform.child_frame_id;
-      } else {
-        output_tf.child_frame_id = transform.child_frame_id;
-      }
-
-      output_msg.transforms.push_back(output_tf);
+      output_msg.transforms.push_back(renamer.rename(transform));
     }
     pub.publish(output_msg);
   });
 
 
+  // The aggregate of all static transforms received so far. The latched
+  // publisher only keeps the last message, so it has to contain all of them.
+  tf2_msgs::TFMessage static_tf_msg;
+  // Index in static_tf_msg of the transform between (parent, child)
+  std::map<std::pair<std::string, std::string>, size_t> static_tf_index;
+
   ros::Subscriber sub_static = nh.subscribe<tf2_msgs::TFMessage>("in/tf_static", 100,
-    [prefix, &pub_static, frame_list](const boost::shared_ptr<const tf2_msgs::TFMessage> message)
+    [&renamer, &pub_static, &static_tf_msg, &static_tf_index](
+      const boost::shared_ptr<const tf2_msgs::TFMessage> message)
   {
-    static tf2_msgs::TFMessage static_tf_msg;
-
+    bool changed = false;
     for (const auto & transform : message->transforms) {
       // Append prefix to frame names
-      geometry_msgs::TransformStamped output_tf = transform;
-      if (frame_list.empty() || string_in(transform.header.frame_id, frame_list)) {
-        output_tf.header.frame_id = prefix + transform.header.frame_id;
-      } else {
-        output_tf.header.frame_id = transform.header.frame_id;
-      }
-      if (frame_list.empty() || string_in(transform.child_frame_id, frame_list)) {
-        output_tf.child_frame_id = prefix + transform.child_frame_id;
-      } else {
-        output_tf.child_frame_id = transform.child_frame_id;
-      }
+      geometry_msgs::TransformStamped output_tf = renamer.rename(transform);
 
-      // Did the transform already exist in the message?
-      auto iter = static_tf_msg.transforms.begin();
-      for (; iter != static_tf_msg.transforms.end(); ++iter) {
-        if (iter->header.frame_id == output_tf.header.frame_id
-            && iter->child_frame_id == output_tf.child_frame_id)
-        {
-          // This transform already exists
-          break;
-        }
-      }
-      if (iter == static_tf_msg.transforms.end()) {
+      auto inserted = static_tf_index.emplace(
+        std::make_pair(output_tf.header.frame_id, output_tf.child_frame_id),
+        static_tf_msg.transforms.size());
+      if (inserted.second) {
         // Insert new transform since one didn't already exist
         static_tf_msg.transforms.push_back(output_tf);
+        changed = true;
       } else {
         // Replace existing transform with same frame names
-        iter = static_tf_msg.transforms.insert(iter, output_tf);
-        ++iter;
-        static_tf_msg.transforms.erase(iter);
+        auto & existing = static_tf_msg.transforms[inserted.first->second];
+        if (!same_transform(existing, output_tf)) {
+          existing = output_tf;
+          changed = true;
+        }
       }
     }
-    pub_static.publish(static_tf_msg);
+    if (changed) {
+      pub_static.publish(static_tf_msg);
+    }
   });
 
   ros::spin();
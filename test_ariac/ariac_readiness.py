@@ -0,0 +1,124 @@
+"""Wait for the simulation to be ready instead of sleeping for a fixed time.
+
+The test scripts used to poll /clock and then sleep 10-20 s "to allow plugins
+to be loaded".  The helpers here block on the concrete signals a test needs
+(services advertised, topics publishing, controllers running), each with its
+own timeout, and fail with a message naming the signal that never came.
+"""
+
+from __future__ import print_function
+
+import time
+
+import rospy
+
+from std_msgs.msg import String
+
+try:
+    from controller_manager_msgs.srv import ListControllers
+except ImportError:
+    ListControllers = None
+
+# Signals every test needs before it can start the competition.
+DEFAULT_SERVICES = [
+    '/ariac/start_competition',
+    '/ariac/end_competition',
+]
+DEFAULT_TOPICS = {
+    '/ariac/competition_state': String,
+}
+DEFAULT_CONTROLLER_MANAGERS = [
+    '/ariac/kitting/controller_manager',
+    '/ariac/gantry/controller_manager',
+]
+
+
+class ReadinessError(AssertionError):
+    pass
+
+
+def wait_for(condition, timeout, description, period=0.05):
+    """ Poll condition() until it returns something truthy
+
+    Time is measured on the wall clock, so this works before /clock starts
+    and also when the simulation runs faster or slower than real time.
+
+    Returns:
+    the value returned by condition()
+    """
+    deadline = time.time() + timeout
+    while True:
+        value = condition()
+        if value:
+            return value
+        if time.time() > deadline:
+            raise ReadinessError('Timed out after %.1f s waiting for %s' % (timeout, description))
+        if rospy.is_shutdown():
+            raise ReadinessError('ROS shut down while waiting for %s' % description)
+        time.sleep(period)
+
+
+def wait_for_clock(timeout=300.0):
+    """ Wait until /clock is being published
+
+    This can take an unpredictable amount of time when models are downloaded.
+    """
+    print('Waiting for Gazebo to start...')
+    wait_for(lambda: rospy.Time.now().to_sec() > 0.0, timeout, '/clock', period=0.5)
+
+
+def wait_for_services(services, timeout=60.0):
+    for service in services:
+        try:
+            rospy.wait_for_service(service, timeout)
+        except rospy.ROSException:
+            raise ReadinessError('Service %s not advertised after %.1f s' % (service, timeout))
+
+
+def wait_for_topics(topics, timeout=30.0):
+    """ Wait for one message on every topic
+
+    Args:
+    topics (dict): topic name -> message class
+    """
+    for topic, msg_class in topics.items():
+        try:
+            rospy.wait_for_message(topic, msg_class, timeout)
+        except rospy.ROSException:
+            raise ReadinessError('No message on %s after %.1f s' % (topic, timeout))
+
+
+def wait_for_controllers(controller_managers, timeout=60.0):
+    """ Wait until every controller loaded by each controller manager is running """
+    if ListControllers is None:
+        rospy.logwarn('controller_manager_msgs not available, not waiting for controllers')
+        return
+
+    def all_running(manager):
+        try:
+            controllers = rospy.ServiceProxy(manager + '/list_controllers', ListControllers)().controller
+        except rospy.ServiceException:
+            return False
+        return controllers and all(c.state == 'running' for c in controllers)
+
+    for manager in controller_managers:
+        wait_for_services([manager + '/list_controllers'], timeout)
+        wait_for(lambda: all_running(manager), timeout, 'controllers of ' + manager)
+
+
+def wait_until_ready(services=None, topics=None, controller_managers=None,
+                     clock_timeout=300.0, service_timeout=60.0, topic_timeout=30.0,
+                     controller_timeout=60.0):
+    """ Block until the simulation is ready for a test to start
+
+    Any argument left as None uses the defaults above; pass an empty list or
+    dict to skip a kind of signal.
+    """
+    start = time.time()
+    wait_for_clock(clock_timeout)
+    wait_for_services(DEFAULT_SERVICES if services is None else services, service_timeout)
+    wait_for_topics(DEFAULT_TOPICS if topics is None else topics, topic_timeout)
+    wait_for_controllers(
+        DEFAULT_CONTROLLER_MANAGERS if controller_managers is None else controller_managers,
+        controller_timeout)
+    print('Simulation ready after %.1f s' % (time.time() - start))
@@ -0,0 +1,567 @@
+"""Offline reimplementation of the AriacScorer in nist_gear.
+
+The scorer mirrors nist_gear/src/AriacScorer.cpp rule for rule, including its
+quirks, and works on recorded or synthetic nist_gear/Order,
+DetectedKittingShipment and DetectedAssemblyShipment messages.  Scoring rules
+can therefore be regression-tested without starting Gazebo, and any change to
+AriacScorer.cpp has to be made here as well: ScoringTester checks that both
+scorers agree at the end of every scoring test.
+
+Sim times are plain floats in seconds.
+"""
+
+from __future__ import print_function
+
+import itertools
+import math
+import pickle
+from io import BytesIO
+
+import rospy
+
+KITTING_TRANSLATION_TARGET = 0.03  # 3 cm
+ASSEMBLY_TRANSLATION_TARGET = 0.02  # 2 cm
+ORIENTATION_TARGET = 0.1  # 0.1 rad
+QUATERNION_DIFF_THRESH = 0.05
+
+KIT_TRAYS = {
+    'agv1': 'agv1::kit_tray_1::kit_tray_1::tray',
+    'agv2': 'agv2::kit_tray_2::kit_tray_2::tray',
+    'agv3': 'agv3::kit_tray_3::kit_tray_3::tray',
+    'agv4': 'agv4::kit_tray_4::kit_tray_4::tray',
+}
+ASSEMBLY_STATIONS = ('as1', 'as2', 'as3', 'as4')
+
+
+class KittingShipmentScore(object):
+
+    def __init__(self, shipment_type=None):
+        self.kittingShipmentType = shipment_type
+        self.productOnlyTypePresence = 0.0
+        self.productTypeAndColorPresence = 0.0
+        self.allProductsBonus = 0.0
+        self.productPose = 0.0
+        self.is_kitting_shipment_complete = False
+        self.is_kitting_shipment_submitted = False
+        self.is_kitting_correct_agv = False
+        self.is_kitting_correct_destination = False
+        self.submit_time = 0.0
+
+    def total(self):
+        if not self.is_kitting_correct_agv or not self.is_kitting_correct_destination:
+            return 0.0
+        return (self.productOnlyTypePresence + self.productTypeAndColorPresence +
+                self.allProductsBonus + self.productPose)
+
+
+class BriefcaseProduct(object):
+
+    def __init__(self):
+        self.isProductCorrectPose = False
+        self.isProductCorrectType = False
+        self.isProductCorrectColor = False
+        self.productSuccess = 0
+        self.productName = ''
+        self.productType = ''
+
+
+class AssemblyShipmentScore(object):
+
+    def __init__(self, shipment_type=None):
+        self.assemblyShipmentType = shipment_type
+        self.briefcaseProducts = {}
+        self.assemblyStation = ''
+        self.allProductsBonus = 0
+        self.numberOfProductsWithCorrectColor = 0
+        self.numberOfProductsInShipment = 0
+        self.numberOfProductsWithCorrectType = 0
+        self.numberOfProductsWithCorrectPose = 0
+        self.hasFaultyProduct = False
+        self.hasMissingProduct = False
+        self.hasUnwantedProduct = False
+        self.isShipmentComplete = False
+        self.isShipmentSubmitted = False
+        self.isCorrectStation = False
+        self.submit_time = 0.0
+
+    def total(self):
+        if not self.isCorrectStation:
+            return 0.0
+        return float(2 * self.computeNbCorrectPoseAndType() + self.computeNbCorrectColor() +
+                     self.allProductsBonus)
+
+    def computeNbCorrectPoseAndType(self):
+        return sum(1 for p in self.briefcaseProducts.values()
+                   if p.isProductCorrectPose and p.isProductCorrectType)
+
+    def computeNbCorrectColor(self):
+        return sum(1 for p in self.briefcaseProducts.values()
+                   if p.isProductCorrectPose and p.isProductCorrectType and p.isProductCorrectColor)
+
+
+class OrderScore(object):
+
+    def __init__(self, order_id, priority=1):
+        self.order_id = order_id
+        self.priority = priority
+        self.time_taken = 0.0
+        self.kitting_shipment_scores = {}
+        self.assembly_shipment_scores = {}
+
+    def isKittingComplete(self):
+        scores = self.kitting_shipment_scores.values()
+        return bool(scores) and all(s.is_kitting_shipment_submitted for s in scores)
+
+    def isAssemblyComplete(self):
+        scores = self.assembly_shipment_scores.values()
+        return bool(scores) and all(s.isShipmentSubmitted for s in scores)
+
+    def computeKittingCompletionScore(self):
+        return sum(s.total() for s in self.kitting_shipment_scores.values())
+
+    def computeAssemblyCompletionScore(self):
+        return sum(s.total() for s in self.assembly_shipment_scores.values())
+
+    def computeKittingTotal(self):
+        return self.computeKittingCompletionScore() * self.priority
+
+    def computeAssemblyTotal(self):
+        return self.computeAssemblyCompletionScore() * self.priority
+
+
+class GameScore(object):
+
+    def __init__(self, penalty=0):
+        self.penalty = penalty
+        self.was_arm_arm_collision = False
+        self.order_scores_map = {}
+
+    def total(self):
+        if self.was_arm_arm_collision:
+            return 0.0
+        total = 0.0
+        for order_score in self.order_scores_map.values():
+            total += order_score.computeKittingTotal()
+            total += order_score.computeAssemblyTotal()
+        if total >= 0:
+            total -= self.penalty
+        return total
+
+
+def _yaw(q):
+    """ Yaw of a geometry_msgs/Quaternion as computed by ignition::math::Quaterniond::Yaw() """
+    w, x, y, z = q.w, q.x, q.y, q.z
+    norm = math.sqrt(w * w + x * x + y * y + z * z)
+    if abs(norm) <= 1e-6:
+        w, x, y, z = 1.0, 0.0, 0.0, 0.0
+    else:
+        w, x, y, z = w / norm, x / norm, y / norm, z / norm
+    sarg = -2 * (x * z - w * y)
+    if abs(sarg - 1) < 1e-15 or abs(sarg + 1) < 1e-15:
+        # Gimbal lock: ignition puts the whole rotation into the roll
+        return 0.0
+    return math.atan2(2 * (x * y + w * z), w * w + x * x - y * y - z * z)
+
+
+def _pose_matches(desired, actual, translation_target):
+    """ Whether a product is close enough to its desired pose to earn the pose point """
+    dx = desired.position.x - actual.position.x
+    dy = desired.position.y - actual.position.y
+    if math.sqrt(dx * dx + dy * dy) > translation_target:
+        return False
+    qd = desired.orientation
+    qa = actual.orientation
+    # If the quaternions represent the same orientation, q1 = +-q2 => q1.dot(q2) = +-1
+    dot = qa.w * qd.w + qa.x * qd.x + qa.y * qd.y + qa.z * qd.z
+    if abs(dot) < 1.0 - QUATERNION_DIFF_THRESH:
+        return False
+    angle_diff = _yaw(qa) - _yaw(qd)
+    return (abs(angle_diff) < ORIENTATION_TARGET or
+            abs(abs(angle_diff) - 2 * math.pi) <= ORIENTATION_TARGET)
+
+
+def _trim_namespace(name):
+    """ 'agv2::tray_2::assembly_battery_blue' -> 'assembly_battery_blue' """
+    return name[name.rfind(':') + 1:]
+
+
+def _without_color(name):
+    """ 'assembly_battery_blue' -> 'assembly_battery' """
+    index = name.rfind('_')
+    return name if index < 0 else name[:index]
+
+
+def _permutation_scores(num_desired, num_actual, matches):
+    """ Pose score of every assignment of actual to desired products
+
+    Yields the scores in the order std::next_permutation visits them, so the
+    callers can reproduce side effects that depend on that order.
+
+    Args:
+    matches (list): matches[d][a] is True if actual product a is in the pose
+        of desired product d
+    """
+    for permutation in itertools.permutations(range(max(num_desired, num_actual))):
+        score = 0.0
+        last_actual = None
+        for d in range(num_desired):
+            a = permutation[d]
+            if a >= num_actual:
+                # There were fewer actual products than the order called for
+                continue
+            last_actual = a
+            if matches[d][a]:
+                score += 1.0
+        yield score, last_actual
+
+
+class AriacScorer(object):
+    """ Python counterpart of the AriacScorer class of nist_gear """
+
+    def __init__(self):
+        # order_id -> (start_time, priority, order)
+        self.orders = {}
+        # (original_order_id, update_time, order)
+        self.order_updates = []
+        # (submit_time, shipment_type, shipment, station)
+        self.received_kitting_shipments = []
+        self.received_assembly_shipments = []
+        self.arm_arm_collision = False
+
+    def notify_order_started(self, time, order, priority=1):
+        if order.order_id in self.orders:
+            rospy.logerr("[ARIAC ERROR] Order with duplicate ID '%s'; overwriting" % order.order_id)
+        self.orders[order.order_id] = (time, priority, order)
+
+    def notify_order_updated(self, time, old_order_id, order):
+        if order.order_id in self.orders:
+            rospy.logerr("[ARIAC ERROR] Asked to update nonexistant order '%s'; ignoring" % order.order_id)
+            return
+        self.order_updates.append((old_order_id, time, order))
+
+    def notify_kitting_shipment_received(self, time, shipment_type, shipment, station):
+        self.received_kitting_shipments.append((time, shipment_type, shipment, station))
+
+    def notify_assembly_shipment_received(self, time, shipment_type, shipment, station):
+        self.received_assembly_shipments.append((time, shipment_type, shipment, station))
+
+    def notify_arm_arm_collision(self, time=None):
+        self.arm_arm_collision = True
+
+    def reset(self):
+        self.__init__()
+
+    def get_game_score(self, penalty=0):
+        game_score = GameScore(penalty)
+        game_score.was_arm_arm_collision = self.arm_arm_collision
+
+        for order_id in sorted(self.orders):
+            start_time, priority, order = self.orders[order_id]
+            # If order was updated, score based on the latest version of it
+            for original_order_id, update_time, updated_order in self.order_updates:
+                if original_order_id == order_id:
+                    order = updated_order
+                    start_time = update_time
+
+            order_score = OrderScore(order_id, priority)
+            claimed_shipments = set()
+
+            if self.received_kitting_shipments:
+                for expected in order.kitting_shipments:
+                    order_score.kitting_shipment_scores[expected.shipment_type] = \
+                        KittingShipmentScore(expected.shipment_type)
+                for desired in order.kitting_shipments:
+                    for submit_time, shipment_type, shipment, station in self.received_kitting_shipments:
+                        if shipment_type != desired.shipment_type:
+                            continue
+                        # Shipments submitted before an update are for the old order,
+                        # and only the first submission of a shipment counts
+                        if submit_time < start_time or shipment_type in claimed_shipments:
+                            continue
+                        claimed_shipments.add(shipment_type)
+                        order_score.kitting_shipment_scores[shipment_type] = \
+                            self.get_kitting_shipment_score(submit_time, desired, shipment, station)
+                if order_score.isKittingComplete():
+                    end = max([start_time] + [s.submit_time for s in
+                                              order_score.kitting_shipment_scores.values()])
+                    order_score.time_taken = end - start_time
+
+            if self.received_assembly_shipments:
+                for expected in order.assembly_shipments:
+                    order_score.assembly_shipment_scores[expected.shipment_type] = \
+                        AssemblyShipmentScore(expected.shipment_type)
+                for desired in order.assembly_shipments:
+                    for submit_time, shipment_type, shipment, station in self.received_assembly_shipments:
+                        if shipment_type != desired.shipment_type:
+                            continue
+                        if submit_time < start_time or shipment_type in claimed_shipments:
+                            continue
+                        claimed_shipments.add(shipment_type)
+                        order_score.assembly_shipment_scores[shipment_type] = \
+                            self.get_assembly_shipment_score(submit_time, desired, shipment, station)
+                if order_score.isAssemblyComplete():
+                    end = max([start_time] + [s.submit_time for s in
+                                              order_score.assembly_shipment_scores.values()])
+                    order_score.time_taken = end - start_time
+
+            game_score.order_scores_map[order_id] = order_score
+        return game_score
+
+    def get_kitting_shipment_score(self, submit_time, desired_shipment, actual_shipment, station):
+        """ Score one kitting shipment (AriacScorer::GetKittingShipmentScore)
+
+        Args:
+        submit_time (float): Sim time the shipment was submitted
+        desired_shipment (nist_gear/KittingShipment): Shipment from the order
+        actual_shipment (nist_gear/DetectedKittingShipment): Content of the tray
+        station (str): Assembly station the AGV was sent to
+
+        Returns:
+        KittingShipmentScore
+        """
+        score = KittingShipmentScore(desired_shipment.shipment_type)
+        score.is_kitting_shipment_submitted = True
+        score.submit_time = submit_time
+        desired_products = desired_shipment.products
+
+        if desired_shipment.agv_id == 'any':
+            score.is_kitting_correct_agv = True
+        elif desired_shipment.agv_id in KIT_TRAYS:
+            score.is_kitting_correct_agv = \
+                KIT_TRAYS[desired_shipment.agv_id] == actual_shipment.destination_id
+        else:
+            rospy.logerr("[ARIAC ERROR] desired shipment agv invalid: %s" % desired_shipment.agv_id)
+
+        if desired_shipment.station_id in ASSEMBLY_STATIONS:
+            score.is_kitting_correct_destination = desired_shipment.station_id == station
+        else:
+            rospy.logerr("[ARIAC ERROR] desired shipment station invalid: %s" % desired_shipment.station_id)
+
+        has_faulty_product = False
+        has_unwanted_product = False
+        is_missing_products = False
+        # (type without namespace, pose) of the non-faulty products
+        non_faulty = []
+        for product in actual_shipment.products:
+            if product.is_faulty:
+                has_faulty_product = True
+            else:
+                non_faulty.append((_trim_namespace(product.type), product.pose))
+
+        # 1 pt per desired product whose type is present, even in the wrong color
+        remaining = [_without_color(name) for name, _ in non_faulty]
+        for desired in desired_products:
+            desired_type = _without_color(desired.type)
+            if desired_type in remaining:
+                remaining.remove(desired_type)
+                score.productOnlyTypePresence += 1
+
+        # Product name -> (indexes in the desired products, indexes in non_faulty)
+        product_type_map = {}
+        for d, desired in enumerate(desired_products):
+            product_type_map.setdefault(desired.type, ([], []))[0].append(d)
+        wrong_color_products = []
+        for a, (name, pose) in enumerate(non_faulty):
+            if name not in product_type_map:
+                has_unwanted_product = True
+                wrong_color_products.append((name, pose))
+                continue
+            product_type_map[name][1].append(a)
+
+        for desired_indexes, actual_indexes in product_type_map.values():
+            if len(desired_indexes) > len(actual_indexes):
+                is_missing_products = True
+            elif len(desired_indexes) < len(actual_indexes):
+                has_unwanted_product = True
+            if not actual_indexes:
+                continue
+
+            score.productTypeAndColorPresence += min(len(desired_indexes), len(actual_indexes))
+
+            matches = [[_pose_matches(desired_products[d].pose, non_faulty[a][1],
+                                      KITTING_TRANSLATION_TARGET)
+                        for a in actual_indexes] for d in desired_indexes]
+            score.productPose += max(
+                [0.0] + [s for s, _ in _permutation_scores(
+                    len(desired_indexes), len(actual_indexes), matches)])
+
+            # AriacScorer.cpp also gives pose points to products of the right
+            # type in the wrong color, once for every product name delivered
+            for desired in desired_products:
+                desired_type = _without_color(desired.type)
+                for name, pose in wrong_color_products:
+                    if (_without_color(name) == desired_type and
+                            _pose_matches(desired.pose, pose, KITTING_TRANSLATION_TARGET)):
+                        score.productPose += 1
+
+        score.is_kitting_shipment_complete = not is_missing_products
+        num_desired = len(desired_products)
+        if (not has_faulty_product and not has_unwanted_product and not is_missing_products and
+                score.productPose == num_desired and
+                score.productTypeAndColorPresence == num_desired and
+                score.productOnlyTypePresence == num_desired):
+            score.allProductsBonus = num_desired
+        return score
+
+    def get_assembly_shipment_score(self, submit_time, desired_shipment, actual_shipment, station):
+        """ Score one assembly shipment (AriacScorer::GetAssemblyShipmentScore)
+
+        Args:
+        submit_time (float): Sim time the shipment was submitted
+        desired_shipment (nist_gear/AssemblyShipment): Shipment from the order
+        actual_shipment (nist_gear/DetectedAssemblyShipment): Content of the briefcase
+        station (str): Assembly station the shipment was submitted from
+
+        Returns:
+        AssemblyShipmentScore
+        """
+        score = AssemblyShipmentScore(desired_shipment.shipment_type)
+        score.assemblyStation = station
+        score.submit_time = submit_time
+        score.isShipmentSubmitted = True
+        score.numberOfProductsInShipment = len(actual_shipment.products)
+        desired_products = desired_shipment.products
+        briefcase = score.briefcaseProducts
+
+        if desired_shipment.station_id in ASSEMBLY_STATIONS:
+            score.isCorrectStation = desired_shipment.station_id == station
+        else:
+            rospy.logerr("[ARIAC ERROR] desired shipment station invalid: %s" % desired_shipment.station_id)
+
+        non_faulty = []
+        for product in actual_shipment.products:
+            if product.is_faulty:
+                score.hasFaultyProduct = True
+            else:
+                non_faulty.append(product)
+
+        remaining = list(non_faulty)
+        for desired in desired_products:
+            desired_type = _without_color(desired.type)
+            found = desired.type.rfind('_')
+            desired_color = desired.type[found + 1:]
+            for a, actual in enumerate(remaining):
+                actual_name = _trim_namespace(actual.type)
+                # AriacScorer.cpp cuts the color of the actual product at the
+                # position of the last '_' in the desired product name
+                actual_color = actual_name[found + 1:]
+                actual_type = _without_color(actual_name)
+                product = BriefcaseProduct()
+                product.productName = actual_type
+                product.productType = actual_type
+                if desired_color == actual_color:
+                    product.isProductCorrectColor = True
+                    score.numberOfProductsWithCorrectColor += 1
+                if desired_type == actual_type:
+                    product.isProductCorrectType = True
+                    score.numberOfProductsWithCorrectType += 1
+                    briefcase.setdefault(actual.type, product)
+                    del remaining[a]
+                    break
+
+        product_type_map = {}
+        for d, desired in enumerate(desired_products):
+            product_type_map.setdefault(desired.type, ([], []))[0].append(d)
+        for a, actual in enumerate(non_faulty):
+            if actual.type not in product_type_map:
+                score.hasUnwantedProduct = True
+                continue
+            product_type_map[actual.type][1].append(a)
+
+        for name in sorted(product_type_map):
+            desired_indexes, actual_indexes = product_type_map[name]
+            if len(desired_indexes) > len(actual_indexes):
+                score.hasMissingProduct = True
+            elif len(desired_indexes) < len(actual_indexes):
+                score.hasUnwantedProduct = True
+            if not actual_indexes:
+                continue
+
+            matches = [[_pose_matches(desired_products[d].pose, non_faulty[a].pose,
+                                      ASSEMBLY_TRANSLATION_TARGET)
+                        for a in actual_indexes] for d in desired_indexes]
+            contributing_pose_score = 0.0
+            last_actual = None
+            for permutation_score, permutation_last in _permutation_scores(
+                    len(desired_indexes), len(actual_indexes), matches):
+                if permutation_last is not None:
+                    last_actual = permutation_last
+                if permutation_score > contributing_pose_score:
+                    contributing_pose_score = permutation_score
+                    # Only the product evaluated last is credited with the pose
+                    product = briefcase.get(non_faulty[actual_indexes[last_actual]].type)
+                    if product is not None:
+                        product.isProductCorrectPose = True
+                        score.numberOfProductsWithCorrectPose += 1
+
+            for product in briefcase.values():
+                if product.isProductCorrectPose:
+                    product.productSuccess = 3 if product.isProductCorrectColor else 2
+            successful = sum(1 for p in briefcase.values() if p.productSuccess == 3)
+            if successful == len(desired_products):
+                score.allProductsBonus = 4 * successful
+
+        score.isShipmentComplete = not score.hasMissingProduct
+        return score
+
+    def score_kitting_shipments(self, cases):
+        """ Score many kitting shipments at once
+
+        Args:
+        cases (iterable): (submit_time, desired_shipment, actual_shipment, station) tuples
+
+        Returns:
+        list: one KittingShipmentScore per case
+        """
+        return [self.get_kitting_shipment_score(*case) for case in cases]
+
+    def score_assembly_shipments(self, cases):
+        """ Score many assembly shipments at once, see score_kitting_shipments() """
+        return [self.get_assembly_shipment_score(*case) for case in cases]
+
+    def save(self, path):
+        """ Write every notification received so far to a file
+
+        The messages are stored serialized, so replaying the file with load()
+        only needs the nist_gear message definitions.
+        """
+        def serialize(msg):
+            buff = BytesIO()
+            msg.serialize(buff)
+            return buff.getvalue()
+
+        events = {
+            'orders': [(order_id, t, p, serialize(o)) for order_id, (t, p, o) in self.orders.items()],
+            'order_updates': [(i, t, serialize(o)) for i, t, o in self.order_updates],
+            'kitting': [(t, s, serialize(m), st) for t, s, m, st in self.received_kitting_shipments],
+            'assembly': [(t, s, serialize(m), st) for t, s, m, st in self.received_assembly_shipments],
+            'arm_arm_collision': self.arm_arm_collision,
+        }
+        with open(path, 'wb') as f:
+            pickle.dump(events, f, protocol=2)
+
+    @classmethod
+    def load(cls, path):
+        """ Create a scorer from a file written by save() """
+        from nist_gear.msg import DetectedAssemblyShipment, DetectedKittingShipment, Order
+
+        def deserialize(msg_class, data):
+            msg = msg_class()
+            msg.deserialize(data)
+            return msg
+
+        with open(path, 'rb') as f:
+            events = pickle.load(f)
+        scorer = cls()
+        for order_id, t, priority, data in events['orders']:
+            scorer.orders[order_id] = (t, priority, deserialize(Order, data))
+        for original_order_id, t, data in events['order_updates']:
+            scorer.order_updates.append((original_order_id, t, deserialize(Order, data)))
+        for t, shipment_type, data, station in events['kitting']:
+            scorer.received_kitting_shipments.append(
+                (t, shipment_type, deserialize(DetectedKittingShipment, data), station))
+        for t, shipment_type, data, station in events['assembly']:
+            scorer.received_assembly_shipments.append(
+                (t, shipment_type, deserialize(DetectedAssemblyShipment, data), station))
+        scorer.arm_arm_collision = events['arm_arm_collision']
+        return scorer
@@ -0,0 +1,591 @@
+#!/usr/bin/env python
+
+"""Stand-in for the ARIAC simulation that runs without Gazebo.
+
+FakeAriac reads a trial configuration through gear.py, exactly like the real
+simulation, and serves the competition side of the ROS API: the competition
+services, AGV and assembly station shipment services, tray and briefcase
+contents, gripper control, material locations and the conveyor, together with
+/ariac/orders, the logical camera and quality control sensors, gripper and AGV
+states, /ariac/competition_state and /ariac/current_score.  Shipments are
+scored with the offline scorer in ariac_scorer.py.
+
+There is no physics: the arms do not move, and products only get on a tray or
+into a briefcase when the configuration puts them there or when a test calls
+place_product().  Sim time is published on /clock at --speed times real time
+(0 for as fast as possible), so competitor logic that only talks to these
+services and topics runs in seconds.  Set /use_sim_time before starting it.
+
+Usage:
+    fake_ariac.py [--speed SPEED] -f TRIAL_CONFIG [...]
+
+It can also be created in-process by a test with FakeAriac(template_data, gear) and
+driven with step() instead of spin().
+"""
+
+from __future__ import print_function
+
+import argparse
+import math
+import sys
+import threading
+import time
+
+import roslib.packages
+import rospy
+
+from ariac_scorer import KIT_TRAYS, AriacScorer
+from geometry_msgs.msg import Pose
+from nist_gear.msg import (AssemblyShipment, DetectedAssemblyShipment,
+                           DetectedKittingShipment, DetectedProduct,
+                           KittingShipment, LogicalCameraImage, Model, Order,
+                           Product, StorageUnit, VacuumGripperState)
+from nist_gear.srv import (AGVToAssemblyStation, AGVToAssemblyStationResponse,
+                           AssemblyStationSubmitShipment,
+                           AssemblyStationSubmitShipmentResponse,
+                           ConveyorBeltControl, ConveyorBeltControlResponse,
+                           DetectAssemblyShipment,
+                           DetectAssemblyShipmentResponse,
+                           DetectKittingShipment, DetectKittingShipmentResponse,
+                           GetMaterialLocations, GetMaterialLocationsResponse,
+                           SubmitShipment, SubmitShipmentResponse,
+                           VacuumGripperControl, VacuumGripperControlResponse)
+from rosgraph_msgs.msg import Clock
+from std_msgs.msg import Float32, String
+from std_srvs.srv import Trigger, TriggerResponse
+from tf.transformations import (quaternion_conjugate, quaternion_from_euler,
+                                quaternion_inverse, quaternion_multiply)
+
+try:
+    from controller_manager_msgs.msg import ControllerState
+    from controller_manager_msgs.srv import ListControllers, ListControllersResponse
+except ImportError:
+    ListControllers = None
+
+# Sim time advanced by one step
+STEP_SIZE = 0.01
+# Period of the task manager status and of the sensors, as in the world file
+STATUS_PERIOD = 0.1
+SENSOR_PERIOD = 0.1
+# Frustum of the logical cameras and quality control sensors
+CAMERA_NEAR = 0.2
+CAMERA_FAR = 1.1
+CAMERA_HFOV = 1.5
+CAMERA_ASPECT_RATIO = 1.2
+
+# Delay before an AGV leaves and the duration of its animation (ROSAGVPlugin)
+AGV_DEPARTURE_DELAY = 0.75
+AGV_TRAVEL_TIMES = {'as1': 3.0, 'as3': 3.0, 'as2': 4.8, 'as4': 4.8}
+AGVS = ('agv1', 'agv2', 'agv3', 'agv4')
+ASSEMBLY_STATIONS = ('as1', 'as2', 'as3', 'as4')
+
+# Both the robot names of the simulation and the ones ariac_example uses
+GRIPPERS = ('kitting/arm', 'gantry/arm', 'arm1', 'arm2')
+CONTROLLER_MANAGERS = {
+    '/ariac/kitting/controller_manager': 'kitting_arm_controller',
+    '/ariac/gantry/controller_manager': 'gantry_controller',
+}
+
+
+def load_gear():
+    """ Import nist_gear's gear.py, which is a script and not a module """
+    paths = roslib.packages.find_resource('nist_gear', 'gear.py')
+    if not paths:
+        raise RuntimeError('gear.py not found in package nist_gear')
+    try:
+        from importlib.machinery import SourceFileLoader
+        return SourceFileLoader('gear', paths[0]).load_module()
+    except ImportError:
+        import imp
+        return imp.load_source('gear', paths[0])
+
+
+def _rotate(q, v):
+    return tuple(quaternion_multiply(quaternion_multiply(q, tuple(v) + (0.0,)), quaternion_conjugate(q))[:3])
+
+
+def _compose(frame, pose):
+    """ Pose given in frame, expressed in the parent frame of frame """
+    xyz = _rotate(frame[1], pose[0])
+    return (tuple(f + p for f, p in zip(frame[0], xyz)), tuple(quaternion_multiply(frame[1], pose[1])))
+
+
+def _relative(frame, pose):
+    """ Pose given in the parent frame of frame, expressed in frame """
+    inverse = quaternion_inverse(frame[1])
+    offset = [p - f for p, f in zip(pose[0], frame[0])]
+    return (_rotate(inverse, offset), tuple(quaternion_multiply(inverse, pose[1])))
+
+
+def from_pose_info(pose_info):
+    """ (xyz, quaternion) of a gear.py PoseInfo """
+    xyz = tuple(float(v) for v in pose_info.xyz)
+    return (xyz, tuple(quaternion_from_euler(*[float(v) for v in pose_info.rpy])))
+
+
+def to_pose_msg(pose):
+    msg = Pose()
+    msg.position.x, msg.position.y, msg.position.z = pose[0]
+    msg.orientation.x, msg.orientation.y, msg.orientation.z, msg.orientation.w = pose[1]
+    return msg
+
+
+class FakeProduct(object):
+    """ A product in the world, on a tray or in a briefcase """
+
+    def __init__(self, product_type, pose, is_faulty=False):
+        self.type = product_type
+        # (xyz, quaternion) in the frame of the bin, tray or briefcase holding it
+        self.pose = pose
+        self.is_faulty = is_faulty
+
+    def detected(self):
+        return DetectedProduct(type=self.type, is_faulty=self.is_faulty, pose=to_pose_msg(self.pose))
+
+
+class FakeAriac(object):
+
+    def __init__(self, template_data, gear):
+        """
+        Args:
+        template_data (dict): Output of gear.prepare_template_data()
+        gear (module): The gear.py module, for the station and briefcase origins
+        """
+        self.gear = gear
+        self._lock = threading.RLock()
+        self.sim_time = 0.0
+        self.state = 'init'
+        self.game_start_time = None
+        self.time_limit = template_data['time_limit']
+        self.scorer = AriacScorer()
+        self.score = 0.0
+        self.conveyor_power = 0.0
+        self.material_locations = template_data['material_locations']
+        self.gripper_enabled = dict((g, False) for g in GRIPPERS)
+        self.gripper_attached = dict((g, False) for g in GRIPPERS)
+
+        self.sensors = dict((name, (info.type, from_pose_info(info.pose)))
+                            for name, info in template_data['sensors'].items()
+                            if info.type in ('logical_camera', 'quality_control'))
+
+        faulty = set(template_data['faulty_products'])
+        self.agv_stations = dict((agv, 'ks' + agv[3:]) for agv in AGVS)
+        for agv_id, agv_info in template_data['agv_infos'].items():
+            self.agv_stations['agv' + agv_id] = agv_info['location']
+        self.agv_states = dict((agv, 'ready_to_deliver') for agv in AGVS)
+        # agv -> (time of departure, destination)
+        self.agv_trips = {}
+        self.last_agv_sent = None
+        self.trays = dict((agv, []) for agv in AGVS)
+        self.briefcases = dict((station, []) for station in ASSEMBLY_STATIONS)
+        self.bin_products = []
+        for name, model in template_data['models_to_insert'].items():
+            is_faulty = name.split('|')[-1] in faulty
+            if hasattr(model, 'agv'):
+                self.trays[model.agv].append(
+                    FakeProduct(model.type, from_pose_info(model.tray_pose), is_faulty))
+            elif hasattr(model, 'station'):
+                pose = _relative(self.briefcase_frame(model.station), from_pose_info(model.pose))
+                self.briefcases[model.station].append(FakeProduct(model.type, pose, is_faulty))
+            else:
+                self.bin_products.append(FakeProduct(model.type, from_pose_info(model.pose), is_faulty))
+        for name, model in template_data['models_to_spawn'].items():
+            agv = model.reference_frame.split('::')[0]
+            if agv in self.trays and 'kit_tray' in model.reference_frame:
+                is_faulty = name.split('|')[-1] in faulty
+                self.trays[agv].append(FakeProduct(model.type, from_pose_info(model.pose), is_faulty))
+
+        # Orders are announced in order of start time, like the task manager does
+        orders = []
+        for order_id, order_info in template_data['orders'].items():
+            condition = order_info['announcement_condition']
+            value = order_info['announcement_condition_value']
+            start_time = float(value) if condition == 'time' else float('inf')
+            orders.append((start_time, order_id, condition, value, order_info['priority'],
+                           self.order_msg(order_id, order_info)))
+        self.orders_to_announce = sorted(orders, key=lambda o: o[0])
+        # order_id -> shipment types not submitted yet
+        self.orders_in_progress = {}
+
+        self._publishers = {}
+        self._services = []
+        self._last_status = -STATUS_PERIOD
+        self._last_sensors = -SENSOR_PERIOD
+
+    # Configuration
+
+    @staticmethod
+    def order_msg(order_id, order_info):
+        """ Build the nist_gear/Order the task manager announces for an order of the config """
+        name = order_id.split('_update')[0]
+
+        def products(models):
+            return [Product(type=m.type, pose=to_pose_msg(from_pose_info(m.pose))) for m in models]
+
+        msg = Order(order_id=order_id)
+        if order_info['kitting_flag']:
+            for i in range(order_info['kitting_shipment_count']):
+                msg.kitting_shipments.append(KittingShipment(
+                    shipment_type='%s_kitting_shipment_%d' % (name, i),
+                    agv_id=order_info['kitting_agvs'][i],
+                    station_id=order_info['kitting_agv_stations'][i],
+                    products=products(order_info['kitting_products'])))
+        if order_info['assembly_flag']:
+            for i in range(order_info['assembly_shipment_count']):
+                msg.assembly_shipments.append(AssemblyShipment(
+                    shipment_type='%s_assembly_shipment_%d' % (name, i),
+                    station_id=order_info['assembly_stations'][i],
+                    products=products(order_info['assembly_products'])))
+        return msg
+
+    def tray_frame(self, agv):
+        """ World pose of the kit tray of an AGV at its current station, as placed by gear.py """
+        station_xyz = self.gear.stations[agv][self.agv_stations[agv]]['pose']['xyz']
+        return ((station_xyz[0] + 0.15, station_xyz[1], 0.85), tuple(quaternion_from_euler(0, 0, -1.571)))
+
+    def briefcase_frame(self, station):
+        xyz = self.gear.default_briefcase_origins['briefcase' + station[2:]]
+        return (tuple(xyz), (0.0, 0.0, 0.0, 1.0))
+
+    # In-process API for tests
+
+    def place_product(self, destination, product_type, pose, is_faulty=False):
+        """ Put a product on the tray of an AGV ('agvN') or in a briefcase ('asN')
+
+        Args:
+        pose (geometry_msgs/Pose): Pose in the frame of the tray or briefcase
+        """
+        p, o = pose.position, pose.orientation
+        product = FakeProduct(product_type, ((p.x, p.y, p.z), (o.x, o.y, o.z, o.w)), is_faulty)
+        with self._lock:
+            (self.trays if destination in self.trays else self.briefcases)[destination].append(product)
+        return product
+
+    def clear(self, destination):
+        with self._lock:
+            del (self.trays if destination in self.trays else self.briefcases)[destination][:]
+
+    def set_gripper_attached(self, gripper, attached):
+        with self._lock:
+            self.gripper_attached[gripper] = attached
+
+    # ROS interface
+
+    def advertise(self):
+        pub = self._publish_to
+        pub('/clock', Clock)
+        pub('/ariac/orders', Order, latch=True)
+        pub('/ariac/competition_state', String)
+        pub('/ariac/current_score', Float32)
+        for name in self.sensors:
+            pub('/ariac/' + name, LogicalCameraImage)
+        for gripper in GRIPPERS:
+            pub('/ariac/%s/gripper/state' % gripper, VacuumGripperState)
+        for agv in AGVS:
+            pub('/ariac/%s/state' % agv, String)
+            pub('/ariac/%s/station' % agv, String, latch=True)
+
+        serve = self._serve
+        serve('/ariac/start_competition', Trigger, self.handle_start)
+        serve('/ariac/end_competition', Trigger, self.handle_end)
+        serve('/ariac/submit_shipment', SubmitShipment, self.handle_submit_shipment)
+        serve('/ariac/material_locations', GetMaterialLocations, self.handle_material_locations)
+        serve('/ariac/conveyor/control', ConveyorBeltControl, self.handle_conveyor)
+        for index, agv in enumerate(AGVS, 1):
+            serve('/ariac/%s/submit_shipment' % agv, AGVToAssemblyStation,
+                  lambda req, agv=agv: self.handle_agv_to_station(req, agv))
+            serve('/ariac/kit_tray_%d/get_content' % index, DetectKittingShipment,
+                  lambda req, agv=agv: DetectKittingShipmentResponse(self.tray_content(agv)))
+        for index, station in enumerate(ASSEMBLY_STATIONS, 1):
+            serve('/ariac/%s/submit_shipment' % station, AssemblyStationSubmitShipment,
+                  lambda req, station=station: self.handle_assembly_submit(req, station))
+            serve('/ariac/briefcase_%d/get_content' % index, DetectAssemblyShipment,
+                  lambda req, station=station: DetectAssemblyShipmentResponse(self.briefcase_content(station)))
+        for gripper in GRIPPERS:
+            serve('/ariac/%s/gripper/control' % gripper, VacuumGripperControl,
+                  lambda req, gripper=gripper: self.handle_gripper(req, gripper))
+        if ListControllers is not None:
+            # So that ariac_readiness sees the controllers as running
+            for manager, controller in CONTROLLER_MANAGERS.items():
+                response = ListControllersResponse(
+                    controller=[ControllerState(name=controller, state='running')])
+                serve(manager + '/list_controllers', ListControllers, lambda req, r=response: r)
+        for agv in AGVS:
+            self._publishers['/ariac/%s/station' % agv].publish(String(self.agv_stations[agv]))
+
+    def _publish_to(self, topic, msg_class, latch=False):
+        self._publishers[topic] = rospy.Publisher(topic, msg_class, queue_size=10, latch=latch)
+
+    def _serve(self, name, service_class, handler):
+        self._services.append(rospy.Service(name, service_class, handler))
+
+    def shutdown(self):
+        for service in self._services:
+            service.shutdown()
+        for publisher in self._publishers.values():
+            publisher.unregister()
+
+    def handle_start(self, req):
+        with self._lock:
+            if self.state == 'init':
+                self.state = 'ready'
+                return TriggerResponse(True, 'competition started successfully! GOOD LUCK!')
+        return TriggerResponse(False, "cannot start if not in 'init' state")
+
+    def handle_end(self, req):
+        with self._lock:
+            self.state = 'end_game'
+        return TriggerResponse(True, 'competition ended successfully!')
+
+    def handle_material_locations(self, req):
+        locations = self.material_locations.get(req.material_type, [])
+        return GetMaterialLocationsResponse([StorageUnit(unit_id=u) for u in locations])
+
+    def handle_conveyor(self, req):
+        with self._lock:
+            if self.state != 'go':
+                return ConveyorBeltControlResponse(False)
+            self.conveyor_power = req.power
+        return ConveyorBeltControlResponse(True)
+
+    def handle_gripper(self, req, gripper):
+        with self._lock:
+            self.gripper_enabled[gripper] = req.enable
+            if not req.enable:
+                self.gripper_attached[gripper] = False
+        return VacuumGripperControlResponse(True)
+
+    def handle_submit_shipment(self, req):
+        destination_id = req.destination_id
+        if 'kit_tray_' in destination_id:
+            destination_id = destination_id[destination_id.find('kit_tray_') + len('kit_tray_'):][:1]
+        agv = 'agv' + destination_id
+        with self._lock:
+            if self.state != 'go':
+                raise rospy.ServiceException('Competition is not running so shipments cannot be submitted.')
+            if agv not in self.trays:
+                rospy.logerr('[ARIAC TaskManager] Could not determine AGV from: %s' % req.destination_id)
+                return SubmitShipmentResponse(False, 0)
+            self.scorer.notify_kitting_shipment_received(
+                self.sim_time, req.shipment_type, self.tray_content(agv), req.station_id)
+            return SubmitShipmentResponse(True, self.shipment_submitted(req.shipment_type, 'kitting'))
+
+    def handle_agv_to_station(self, req, agv):
+        station = req.assembly_station_name
+        with self._lock:
+            self.last_agv_sent = (agv, station)
+            if station not in AGV_TRAVEL_TIMES or station not in self.gear.stations[agv]:
+                return AGVToAssemblyStationResponse(False, '[%s] cannot go to %s' % (agv, station))
+            if self.agv_states[agv] != 'ready_to_deliver' or self.agv_stations[agv] == station:
+                return AGVToAssemblyStationResponse(
+                    False, '[%s-> %s] FAILURE: AGV not successfully triggered.' % (agv, station))
+            self.agv_states[agv] = 'go_to_assembly_station'
+            self.agv_trips[agv] = (self.sim_time, station)
+            self.scorer.notify_kitting_shipment_received(
+                self.sim_time, req.shipment_type, self.tray_content(agv), station)
+            self.shipment_submitted(req.shipment_type, 'kitting')
+        return AGVToAssemblyStationResponse(True, '[%s-> %s] SUCCESS: AGV successfully triggered.' % (agv, station))
+
+    def handle_assembly_submit(self, req, station):
+        with self._lock:
+            if self.state != 'go':
+                raise rospy.ServiceException('Competition is not running so shipments cannot be submitted.')
+            self.scorer.notify_assembly_shipment_received(
+                self.sim_time, req.shipment_type, self.briefcase_content(station), station)
+            return AssemblyStationSubmitShipmentResponse(True, self.shipment_submitted(req.shipment_type, 'assembly'))
+
+    def shipment_submitted(self, shipment_type, kind):
+        """ Update the orders in progress and return the score of the shipment """
+        for remaining in self.orders_in_progress.values():
+            remaining.discard(shipment_type)
+        for order_id in [o for o, remaining in self.orders_in_progress.items() if not remaining]:
+            del self.orders_in_progress[order_id]
+        game_score = self.scorer.get_game_score()
+        self.score = game_score.total()
+        for order_score in game_score.order_scores_map.values():
+            scores = order_score.kitting_shipment_scores if kind == 'kitting' else \
+                order_score.assembly_shipment_scores
+            if shipment_type in scores:
+                return scores[shipment_type].total()
+        return 0.0
+
+    def tray_content(self, agv):
+        with self._lock:
+            return DetectedKittingShipment(destination_id=KIT_TRAYS[agv], station_id=self.agv_stations[agv],
+                                           products=[p.detected() for p in self.trays[agv]])
+
+    def briefcase_content(self, station):
+        with self._lock:
+            return DetectedAssemblyShipment(briefcase_id='briefcase_' + station[2:],
+                                            products=[p.detected() for p in self.briefcases[station]])
+
+    # Simulation
+
+    def step(self):
+        """ Advance sim time by STEP_SIZE and publish what is due """
+        with self._lock:
+            self.sim_time += STEP_SIZE
+            if self.state == 'ready':
+                self.state = 'go'
+                self.game_start_time = self.sim_time
+            elif self.state == 'go':
+                elapsed = self.sim_time - self.game_start_time
+                if self.time_limit >= 0 and elapsed > self.time_limit:
+                    self.state = 'end_game'
+                else:
+                    self.process_orders_to_announce(elapsed)
+                    if not self.orders_in_progress and not self.orders_to_announce:
+                        self.state = 'end_game'
+            elif self.state == 'end_game':
+                game_score = self.scorer.get_game_score()
+                self.score = game_score.total()
+                rospy.loginfo('End of trial. Final score: %s' % self.score)
+                self.state = 'done'
+            self.process_agvs()
+            self.publish()
+
+    def process_orders_to_announce(self, elapsed):
+        """ Announce the next order if its condition holds (ProcessOrdersToAnnounce) """
+        if not self.orders_to_announce:
+            return
+        start_time, order_id, condition, value, priority, msg = self.orders_to_announce[0]
+        announce = elapsed >= start_time
+        if condition in ('wanted_products', 'unwanted_products'):
+            announce |= not self.orders_in_progress
+            announce |= self.count_products(msg, condition) >= int(value)
+        elif condition == 'agv_station_reached' and self.last_agv_sent is not None:
+            agv, station = self.last_agv_sent
+            announce |= value[:4] == agv and value[-3:] == station
+        if not announce:
+            return
+        del self.orders_to_announce[0]
+        rospy.loginfo('Announcing order: %s' % order_id)
+        self._publishers['/ariac/orders'].publish(msg)
+        shipment_types = set(s.shipment_type for s in msg.kitting_shipments + msg.assembly_shipments)
+        if '_update' in order_id:
+            original_order_id = order_id.split('_update')[0]
+            self.scorer.notify_order_updated(self.sim_time, original_order_id, msg)
+            if original_order_id in self.orders_in_progress:
+                self.orders_in_progress[original_order_id] = shipment_types
+        else:
+            self.scorer.notify_order_started(self.sim_time, msg, priority)
+            self.orders_in_progress[order_id] = shipment_types
+
+    def count_products(self, order, condition):
+        """ Most wanted or unwanted non-faulty products for order in one tray or briefcase """
+        if order.kitting_shipments and not order.assembly_shipments:
+            shipments, containers = order.kitting_shipments, self.trays.values()
+        elif order.assembly_shipments and not order.kitting_shipments:
+            shipments, containers = order.assembly_shipments, self.briefcases.values()
+        else:
+            return 0
+        best = 0
+        for products in containers:
+            wanted_types = [p.type for s in shipments for p in s.products]
+            wanted = unwanted = 0
+            for product in products:
+                if product.is_faulty:
+                    continue
+                if product.type in wanted_types:
+                    wanted_types.remove(product.type)
+                    wanted += 1
+                else:
+                    unwanted += 1
+            best = max(best, wanted if condition == 'wanted_products' else unwanted)
+        return best
+
+    def process_agvs(self):
+        for agv, (departure, station) in list(self.agv_trips.items()):
+            travelled = self.sim_time - departure - AGV_DEPARTURE_DELAY
+            if travelled < 0:
+                continue
+            if travelled < AGV_TRAVEL_TIMES[station]:
+                self.agv_states[agv] = 'KS_AS1AS3' if station in ('as1', 'as3') else 'KS_AS2AS4'
+                continue
+            del self.agv_trips[agv]
+            self.agv_states[agv] = 'ready_to_deliver'
+            self.agv_stations[agv] = station
+            self._publishers['/ariac/%s/station' % agv].publish(String(station))
+
+    def visible_products(self):
+        """ (product, world pose) of every product the sensors can see """
+        result = [(p, p.pose) for p in self.bin_products]
+        for agv, products in self.trays.items():
+            frame = self.tray_frame(agv)
+            result.extend((p, _compose(frame, p.pose)) for p in products)
+        for station, products in self.briefcases.items():
+            frame = self.briefcase_frame(station)
+            result.extend((p, _compose(frame, p.pose)) for p in products)
+        return result
+
+    @staticmethod
+    def in_frustum(xyz):
+        x, y, z = xyz
+        if not CAMERA_NEAR <= x <= CAMERA_FAR:
+            return False
+        half_width = x * math.tan(CAMERA_HFOV / 2)
+        return abs(y) <= half_width and abs(z) <= half_width / CAMERA_ASPECT_RATIO
+
+    def publish(self):
+        pubs = self._publishers
+        if not pubs:
+            return
+        stamp = rospy.Time.from_sec(self.sim_time)
+        pubs['/clock'].publish(Clock(clock=stamp))
+        for gripper in GRIPPERS:
+            pubs['/ariac/%s/gripper/state' % gripper].publish(
+                VacuumGripperState(self.gripper_enabled[gripper], self.gripper_attached[gripper]))
+        for agv in AGVS:
+            pubs['/ariac/%s/state' % agv].publish(String(self.agv_states[agv]))
+
+        if self.sim_time - self._last_status >= STATUS_PERIOD:
+            self._last_status = self.sim_time
+            pubs['/ariac/competition_state'].publish(String(self.state))
+            pubs['/ariac/current_score'].publish(Float32(self.score))
+
+        if self.sim_time - self._last_sensors >= SENSOR_PERIOD:
+            self._last_sensors = self.sim_time
+            products = self.visible_products()
+            for name, (sensor_type, frame) in self.sensors.items():
+                msg = LogicalCameraImage(pose=to_pose_msg(frame))
+                for product, pose in products:
+                    if sensor_type == 'quality_control' and not product.is_faulty:
+                        continue
+                    relative = _relative(frame, pose)
+                    if self.in_frustum(relative[0]):
+                        model_type = 'model' if sensor_type == 'quality_control' else product.type
+                        msg.models.append(Model(type=model_type, pose=to_pose_msg(relative)))
+                pubs['/ariac/' + name].publish(msg)
+
+    def spin(self, speed):
+        """ Step until shutdown, at speed times real time (0 for as fast as possible) """
+        start_wall, start_sim = time.time(), self.sim_time
+        while not rospy.is_shutdown():
+            self.step()
+            if speed > 0:
+                ahead = (self.sim_time - start_sim) / speed - (time.time() - start_wall)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+
+def main(sysargv=None):
+    gear = load_gear()
+    parser = argparse.ArgumentParser(
+        description='Serve the ARIAC competition topics and services for a trial config without Gazebo.')
+    gear.prepare_arguments(parser)
+    parser.add_argument('--speed', type=float, default=10.0,
+                        help='sim time published per second of real time (default 10, 0 for no limit)')
+    args = parser.parse_args(sysargv)
+    template_data = gear.prepare_template_data(gear.load_config(args), args)
+
+    rospy.init_node('fake_ariac')
+    if not rospy.get_param('/use_sim_time', False):
+        rospy.logwarn('/use_sim_time is not set; clients will not follow the fake sim time')
+    fake = FakeAriac(template_data, gear)
+    fake.advertise()
+    fake.spin(args.speed)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(rospy.myargv(sys.argv)[1:]))
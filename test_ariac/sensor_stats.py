@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+"""Measure the publish rate, latency and jitter of sensor topics.
+
+SensorStats records the header stamp and the receive time of every message of
+one sensor, both in sim time, and summarizes them as:
+
+- rate: messages per sim second, and its ratio to the update_rate configured
+  for the sensor in the world file gear.py generated
+- latency: receive time minus header stamp, mean and max
+- jitter: standard deviation of the time between two messages
+
+SensorsTester writes these summaries to the YAML report named by its ~report
+parameter.  Run as a script, this module compares reports of worlds with
+different numbers of sensors and flags the sensors whose rate drops as sensors
+are added.
+
+Usage:
+    sensor_stats.py [--tolerance TOLERANCE] REPORT [REPORT ...]
+"""
+
+from __future__ import print_function
+
+import argparse
+import math
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+import yaml
+
+
+class SensorStats(object):
+    """ Statistics of the messages received from one sensor
+
+    Args:
+    name (str): sensor (model) name
+    expected_rate (float): configured update_rate in Hz, or None if unknown
+    """
+
+    def __init__(self, name, expected_rate=None):
+        self.name = name
+        self.expected_rate = expected_rate
+        self.stamps = []
+        self.receive_times = []
+
+    def record(self, stamp, receive_time):
+        """ Add one message, stamped and received at the given sim times in seconds """
+        self.stamps.append(stamp)
+        self.receive_times.append(receive_time)
+
+    def reset(self):
+        del self.stamps[:]
+        del self.receive_times[:]
+
+    def summary(self):
+        """ The statistics as a dict of plain values, suitable for a report """
+        count = len(self.receive_times)
+        summary = {'count': count, 'expected_rate': self.expected_rate}
+        intervals = [b - a for a, b in zip(self.receive_times, self.receive_times[1:])]
+        duration = sum(intervals)
+        summary['rate'] = len(intervals) / duration if duration > 0 else 0.0
+        if self.expected_rate:
+            summary['rate_ratio'] = summary['rate'] / self.expected_rate
+        if intervals:
+            mean = duration / len(intervals)
+            summary['jitter'] = math.sqrt(sum((i - mean) ** 2 for i in intervals) / len(intervals))
+        # Sensors without a header stamp are recorded with a stamp of 0
+        latencies = [r - s for s, r in zip(self.stamps, self.receive_times) if s > 0]
+        if latencies:
+            summary['latency_mean'] = sum(latencies) / len(latencies)
+            summary['latency_max'] = max(latencies)
+        return summary
+
+
+def configured_update_rates(world_file):
+    """ update_rate of each sensor model in a world file generated by gear.py
+
+    The rate is taken from the first update_rate element of the model, which
+    is the one of its sensor, or of the ROS plugin for sensors that have none.
+
+    Returns:
+    dict: model name -> rate in Hz
+    """
+    rates = {}
+    if not os.path.isfile(world_file):
+        return rates
+    for model in ET.parse(world_file).getroot().iter('model'):
+        update_rate = model.find('.//update_rate')
+        if update_rate is not None and model.find('.//sensor') is not None:
+            rates[model.get('name')] = float(update_rate.text)
+    return rates
+
+
+def default_world_file():
+    return os.path.join(os.environ.get('ARIAC_OUTPUT_DIR', '/tmp/ariac/'), 'ariac.world')
+
+
+def slow_sensors(summaries, min_ratio):
+    """ Sensors publishing slower than min_ratio of their update_rate
+
+    Returns:
+    list of str: one line per slow sensor
+    """
+    slow = []
+    for name, summary in sorted(summaries.items()):
+        if summary.get('rate_ratio') is not None and summary['rate_ratio'] < min_ratio:
+            slow.append('%s: %.1f Hz, configured %.1f Hz' % (
+                name, summary['rate'], summary['expected_rate']))
+    return slow
+
+
+def degradation(reports, tolerance):
+    """ Sensors whose rate ratio drops in reports of worlds with more sensors
+
+    Each report is compared with the report that has the fewest sensors.
+
+    Args:
+    reports (list): dicts with 'sensor_count' and 'sensors' (name -> summary)
+    tolerance (float): allowed relative drop of the rate ratio
+
+    Returns:
+    list of str: one line per degraded sensor
+    """
+    reports = sorted(reports, key=lambda r: r['sensor_count'])
+    if not reports:
+        return []
+    base = reports[0]
+    degraded = []
+    for report in reports[1:]:
+        for name, old in sorted(base['sensors'].items()):
+            new = report['sensors'].get(name)
+            if new is None or not old.get('rate_ratio'):
+                continue
+            drop = (old['rate_ratio'] - new.get('rate_ratio', 0.0)) / old['rate_ratio']
+            if drop > tolerance:
+                degraded.append('%s: %.0f%% of update_rate with %d sensors, %.0f%% with %d' % (
+                    name, 100 * old['rate_ratio'], base['sensor_count'],
+                    100 * new.get('rate_ratio', 0.0), report['sensor_count']))
+    return degraded
+
+
+def print_table(report):
+    print('%d sensors' % report['sensor_count'])
+    print('%-32s %6s %9s %9s %12s %12s %10s' % (
+        'sensor', 'count', 'rate Hz', 'config Hz', 'latency ms', 'max lat. ms', 'jitter ms'))
+    for name, s in sorted(report['sensors'].items()):
+        print('%-32s %6d %9.1f %9s %12.1f %12.1f %10.1f' % (
+            name, s['count'], s['rate'],
+            '%.1f' % s['expected_rate'] if s['expected_rate'] else '-',
+            1000 * s.get('latency_mean', 0.0), 1000 * s.get('latency_max', 0.0),
+            1000 * s.get('jitter', 0.0)))
+
+
+def main(sysargv=None):
+    parser = argparse.ArgumentParser(
+        description='Compare sensor rate reports of worlds with different numbers of sensors.')
+    parser.add_argument('reports', nargs='+', help='reports written by test_sensors.py')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='allowed relative drop of a rate (default: 0.1)')
+    args = parser.parse_args(sysargv)
+
+    reports = []
+    for path in args.reports:
+        with open(path) as f:
+            reports.append(yaml.safe_load(f))
+    for report in sorted(reports, key=lambda r: r['sensor_count']):
+        print_table(report)
+        print('')
+    degraded = degradation(reports, args.tolerance)
+    for line in degraded:
+        print('DEGRADED ' + line)
+    return 1 if degraded else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
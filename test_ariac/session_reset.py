@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+"""Prepare a running simulation for the next case of a test session.
+
+run_tests_parallel --session boots one simulation for all test cases that use
+the same world and calls this script before each case.  It resets the world
+and the task manager through /ariac/reset_competition, deletes the models that
+were spawned after the world was loaded (by the previous case or by the belt),
+and spawns the models_to_spawn of the case's configuration, with the same
+names and poses gear.py would have given them.
+
+Usage:
+    session_reset.py CONFIG_FILE [...]
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+
+import ariac_readiness
+import rospkg
+import rospy
+
+from fake_ariac import from_pose_info, to_pose_msg, load_gear
+from gazebo_msgs.srv import DeleteModel, GetWorldProperties, SpawnModel
+from std_srvs.srv import Trigger
+
+# Models present when the world finished loading, recorded by the first case
+INITIAL_MODELS_PARAM = '/ariac/session/initial_models'
+
+
+def models_to_spawn(config_files):
+    """ gear.py's models_to_spawn for config_files, keyed by model name """
+    gear = load_gear()
+    parser = argparse.ArgumentParser()
+    gear.prepare_arguments(parser)
+    args = parser.parse_args(['-f'] + config_files)
+    template_data = gear.prepare_template_data(gear.load_config(args), args)
+    return template_data['models_to_spawn']
+
+
+def main(sysargv=None):
+    parser = argparse.ArgumentParser(description='Reset the simulation for the next case of a test session.')
+    parser.add_argument('config_files', nargs='+', help='trial configuration of the next case')
+    args = parser.parse_args(sysargv)
+
+    rospy.init_node('session_reset', anonymous=True)
+    gazebo_services = ['/gazebo/get_world_properties', '/gazebo/delete_model', '/gazebo/spawn_sdf_model']
+    ariac_readiness.wait_until_ready(
+        services=ariac_readiness.DEFAULT_SERVICES + ['/ariac/reset_competition'] + gazebo_services)
+
+    world_models = rospy.ServiceProxy('/gazebo/get_world_properties', GetWorldProperties)().model_names
+    if not rospy.has_param(INITIAL_MODELS_PARAM):
+        rospy.set_param(INITIAL_MODELS_PARAM, world_models)
+    initial_models = set(rospy.get_param(INITIAL_MODELS_PARAM))
+
+    result = rospy.ServiceProxy('/ariac/reset_competition', Trigger)()
+    if not result.success:
+        print('Error: could not reset the competition: ' + result.message, file=sys.stderr)
+        return 1
+
+    delete_model = rospy.ServiceProxy('/gazebo/delete_model', DeleteModel)
+    for name in world_models:
+        if name not in initial_models:
+            delete_model(name)
+
+    models_dir = os.path.join(rospkg.RosPack().get_path('nist_gear'), 'models')
+    spawn_model = rospy.ServiceProxy('/gazebo/spawn_sdf_model', SpawnModel)
+    for name, model in sorted(models_to_spawn(args.config_files).items()):
+        with open(os.path.join(models_dir, model.type + '_ariac', 'model.sdf')) as f:
+            model_xml = f.read()
+        response = spawn_model(name, model_xml, '', to_pose_msg(from_pose_info(model.pose)),
+                               model.reference_frame)
+        if not response.success:
+            print('Error: could not spawn %s: %s' % (name, response.status_message), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(rospy.myargv(sys.argv)[1:]))
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+
+"""Score the test_scoring scenarios with the offline scorer, without Gazebo.
+
+Each scenario rebuilds the events the task manager would record from the
+trial and tray configurations in test_scoring/: the order of the trial
+configuration as one kitting shipment for agv1 to deliver at as1, and the
+products spawned on kit_tray_1 as the submitted tray content.  The scorer is
+saved and loaded again before it is scored, so the totals are those of a saved
+scorer state.
+
+The totals follow the 2021 scoring rules of AriacScorer.cpp, which ariac_scorer
+mirrors: 1 pt per product type, 1 pt per product type and color, 1 pt per
+product pose and a bonus of 1 pt per product when the shipment is perfect.
+Scenarios with faulty products are left out, since which spawned product is
+faulty depends on the model names the simulation assigns.
+"""
+
+from __future__ import print_function
+
+import math
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import rosunit
+import yaml
+from ariac_scorer import KIT_TRAYS, AriacScorer
+from geometry_msgs.msg import Pose
+from nist_gear.msg import DetectedKittingShipment, DetectedProduct, KittingShipment, Order, Product
+from tf.transformations import quaternion_from_euler
+
+SCENARIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_scoring')
+SHIPMENT_TYPE = 'order_0_shipment_0'
+AGV = 'agv1'
+STATION = 'as1'
+SUBMIT_TIME = 10.0
+
+
+def load_config(name):
+    with open(os.path.join(SCENARIO_DIR, name), 'r') as f:
+        return yaml.safe_load(f) or {}
+
+
+def _angle(value):
+    """ Angles may be given as 'pi' or '-pi' in the configurations """
+    if isinstance(value, str):
+        return -math.pi if value.startswith('-') else math.pi
+    return float(value)
+
+
+def to_pose(pose_config):
+    pose = Pose()
+    pose.position.x, pose.position.y, pose.position.z = [float(v) for v in pose_config['xyz']]
+    q = quaternion_from_euler(*[_angle(v) for v in pose_config['rpy']])
+    pose.orientation.x, pose.orientation.y, pose.orientation.z, pose.orientation.w = q
+    return pose
+
+
+def _products(models, aliases, product_class):
+    return [product_class(type=aliases.get(model['type'], model['type']), pose=to_pose(model['pose']))
+            for _, model in sorted(models.items())]
+
+
+def order_from_config(config):
+    """ order_0 of a trial configuration as a single kitting shipment """
+    aliases = config['options']['model_type_aliases']
+    products = _products(config['orders']['order_0']['products'], aliases, Product)
+    order = Order(order_id='order_0')
+    order.kitting_shipments.append(KittingShipment(
+        shipment_type=SHIPMENT_TYPE, agv_id=AGV, station_id=STATION, products=products))
+    return order
+
+
+def tray_from_config(config, aliases):
+    """ Content of kit_tray_1 once the products of a configuration are spawned on it """
+    models = config['models_to_spawn']['agv1::kit_tray_1']['models']
+    return DetectedKittingShipment(
+        destination_id=KIT_TRAYS[AGV], station_id=STATION,
+        products=_products(models, aliases, DetectedProduct))
+
+
+class AriacScorerTester(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _score(self, order_config, tray_config, station=STATION, arm_arm_collision=False):
+        """ Score a saved and reloaded scorer, checking it against the original one """
+        order_config = load_config(order_config)
+        order = order_from_config(order_config)
+        tray = tray_from_config(load_config(tray_config), order_config['options']['model_type_aliases'])
+
+        scorer = AriacScorer()
+        scorer.notify_order_started(0.0, order)
+        scorer.notify_kitting_shipment_received(SUBMIT_TIME, SHIPMENT_TYPE, tray, station)
+        if arm_arm_collision:
+            scorer.notify_arm_arm_collision(SUBMIT_TIME)
+
+        path = os.path.join(self.tmp_dir, 'scorer.pkl')
+        scorer.save(path)
+        loaded = AriacScorer.load(path)
+        total = loaded.get_game_score().total()
+        self.assertEqual(total, scorer.get_game_score().total(),
+                         'The loaded scorer does not score like the saved one')
+        return total
+
+    def test_perfect_shipment(self):
+        self.assertEqual(self._score('scoring_base_order.yaml', 'scoring_perfect_shipment.yaml'), 20.0)
+
+    def test_perfect_shipment_flipped(self):
+        self.assertEqual(
+            self._score('scoring_base_order_flipped.yaml', 'scoring_perfect_shipment_flipped.yaml'), 20.0)
+
+    def test_correct_parts_incorrect_poses(self):
+        self.assertEqual(
+            self._score('scoring_base_order.yaml', 'scoring_correct_parts_incorrect_poses.yaml'), 10.0)
+
+    def test_correct_parts_not_flipped(self):
+        self.assertEqual(
+            self._score('scoring_base_order_flipped.yaml', 'scoring_correct_parts_not_flipped.yaml'), 10.0)
+
+    def test_correct_parts_plus_unwanted(self):
+        self.assertEqual(
+            self._score('scoring_base_order.yaml', 'scoring_correct_parts_plus_unwanted.yaml'), 15.0)
+
+    def test_missing_parts(self):
+        self.assertEqual(self._score('scoring_base_order.yaml', 'scoring_missing_parts.yaml'), 12.0)
+
+    def test_wrong_station(self):
+        self.assertEqual(
+            self._score('scoring_base_order.yaml', 'scoring_perfect_shipment.yaml', station='as2'), 0.0)
+
+    def test_arm_collision(self):
+        self.assertEqual(self._score('scoring_base_order.yaml', 'scoring_perfect_shipment.yaml',
+                                     arm_arm_collision=True), 0.0)
+
+
+if __name__ == '__main__':
+    rosunit.unitrun('test_ariac', 'test_ariac_scorer', AriacScorerTester, sys.argv)
@@ -3,12 +3,12 @@
 from __future__ import print_function
 
 import sys
-import time
 import unittest
 
 from ariac_example import ariac_example
 from nist_gear.srv import SubmitTray
 from std_msgs.msg import Float32
+import ariac_readiness
 import rospy
 import rostest
 
@@ -19,7 +19,7 @@ class ExampleNodeTester(unittest.TestCase):
         self.current_comp_score = msg.data
 
     def prepare_tester(self):
-        self.comp_class = ariac_example.MyCompetitionClass()
+        self.comp_class = ariac_example.CompetitionClient(ariac_example.load_client_config())
         ariac_example.connect_callbacks(self.comp_class)
 
         self.current_comp_score = None
@@ -38,14 +38,12 @@ class ExampleNodeTester(unittest.TestCase):
         # Starting the competition will cause products from the order to be spawned on the tray
         print("starting the competition")
         self._test_start_comp()
-        time.sleep(5.0)
         print("checking that an order is received")
         self._test_order_reception()
 
         # Submit the trays
         print("asking agv to deliver a tray")
         self._test_agv1_control()
-        time.sleep(5.0)
 
         # Check the score
         print("checking competition state")
@@ -54,48 +52,94 @@ class ExampleNodeTester(unittest.TestCase):
     def _test_start_comp(self):
         success = ariac_example.start_competition()
         self.assertTrue(success, 'Failed to start the competition')
-        time.sleep(1.5)
+        self._wait_for(lambda: self.comp_class.current_comp_state == 'go', 5.0, '"go" state')
         self.assertTrue(
             self.comp_class.current_comp_state == 'go', 'Competition not in "go" state')
 
     def _test_order_reception(self):
+        self._wait_for(lambda: self.comp_class.received_orders, 10.0, 'an order')
         self.assertEqual(len(self.comp_class.received_orders), 1)
         num_products_in_order = len(self.comp_class.received_orders[0].shipments[0].products)
         self.assertGreater(num_products_in_order, 0, 'No products in received order')
 
     def _send_arms_to_initial_pose(self):
-        self.comp_class.send_arm1_to_state([0] * len(self.comp_class.arm_joint_names))
-        self.comp_class.send_arm2_to_state([0] * len(self.comp_class.arm_joint_names))
-        time.sleep(1.0)
+        self._send_arms_to_zero(timeout=10.0)
+
+    def _send_arms_to_zero(self, timeout):
+        for name, robot in self.comp_class.robots.items():
+            self.comp_class.send_to_state(name, [0] * len(robot.joint_names))
+        self._wait_for_arms_at(0.0, timeout)
+
+    def _joint_error(self, robot, positions):
+        """ Summed distance of the commanded joints of robot from positions,
+        or None before its first joint state """
+        slot = self.comp_class.robots[robot]
+        if slot.joint_state is None:
+            return None
+        current = dict(zip(slot.joint_state.name, slot.joint_state.position))
+        return sum(abs(current.get(joint, 0.0) - position)
+                   for joint, position in zip(slot.joint_names, positions))
+
+    def _arm_errors(self, target):
+        errors = []
+        for name, robot in self.comp_class.robots.items():
+            error = self._joint_error(name, [target] * len(robot.joint_names))
+            if error is None:
+                return None
+            errors.append(error)
+        return errors
+
+    def _wait_for_arms_at(self, target, timeout, tol=0.5):
+        """ Wait until every robot is within tol of target """
+        self._wait_for(
+            lambda: all(e < tol for e in (self._arm_errors(target) or [tol])),
+            timeout, 'arms to reach their target')
+
+    def _send_robot_to_state(self, robot, positions, duration=1.0, timeout=10.0, tol=0.05):
+        """ Command robot to positions and wait until it gets there, or until
+        it has come to rest short of them (e.g. against a product) """
+        start = rospy.get_time()
+        self.comp_class.send_to_state(robot, positions, duration)
+
+        def settled():
+            error = self._joint_error(robot, positions)
+            if error is None:
+                return False
+            if error < tol:
+                return True
+            state = self.comp_class.robots[robot].joint_state
+            return (rospy.get_time() - start > duration and
+                    all(abs(v) < 0.01 for v in state.velocity))
+        self._wait_for(settled, timeout, '%s to reach its target' % robot)
+
+    def _wait_for(self, condition, timeout, description):
+        """ Wait for condition, failing the test on timeout """
+        try:
+            return ariac_readiness.wait_for(condition, timeout, description)
+        except ariac_readiness.ReadinessError as e:
+            self.fail(str(e))
 
     def _test_send_arm_to_zero_state(self):
-        self.comp_class.send_arm1_to_state([0] * len(self.comp_class.arm_joint_names))
-        self.comp_class.send_arm2_to_state([0] * len(self.comp_class.arm_joint_names))
         # This can be slow if there are a lot of models in the environment
-        time.sleep(5.0)
-        error = 0
-        for position in self.comp_class.arm_1_current_joint_state.position:
-            error += abs(position - 0.0)
-        self.assertTrue(error < 0.5, 'Arm was not properly sent to zero state')
-        error = 0
-        for position in self.comp_class.arm_2_current_joint_state.position:
-            error += abs(position - 0.0)
-        self.assertTrue(error < 0.5, 'Arm was not properly sent to zero state')
+        self._send_arms_to_zero(timeout=10.0)
+        for error in self._arm_errors(0.0):
+            self.assertTrue(error < 0.5, 'Arm was not properly sent to zero state')
 
     def _test_agv1_control(self, shipment_id='order_0_shipment_0'):
-        success = ariac_example.control_agv(shipment_id, agv_num=1)
+        success = self.comp_class.control_agv('agv1', shipment_id)
         self.assertTrue(success, 'Failed to control agv1')
 
     def _test_submit_shipment(self, shipment_type, agv_num):
-        success = ariac_example.submit_shipment(shipment_type, agv_num)
+        success = self.comp_class.submit_shipment('agv%d' % agv_num, shipment_type)
         self.assertTrue(success, 'failed to submit shipment')
 
     def _test_comp_end(self):
         num_received_orders = len(self.comp_class.received_orders)
         num_shipments = len(self.comp_class.received_orders[0].shipments)
         if num_received_orders == 1 and num_shipments == 1:
-            self.assertTrue(
-                self.comp_class.current_comp_state == 'done', 'Competition not in "done" state')
+            # The shipment is scored once the AGV has been delivered
+            self._wait_for(
+                lambda: self.comp_class.current_comp_state == 'done', 10.0, '"done" state')
         else:
             # If there were more shipments expected, the order won't be done
             self.assertTrue(
@@ -105,13 +149,7 @@ class ExampleNodeTester(unittest.TestCase):
 if __name__ == '__main__':
     rospy.init_node('test_example_node', anonymous=True)
 
-    # Wait until /clock is being published; this can take an unpredictable
-    # amount of time when we're downloading models.
-    while rospy.Time.now().to_sec() == 0.0:
-        print('Waiting for Gazebo to start...')
-        time.sleep(1.0)
-    # Take an extra nap, to allow plugins to be loaded
-    time.sleep(20.0)
+    ariac_readiness.wait_until_ready()
     print('OK, starting test.')
 
     rostest.run('nist_gear', 'test_example_node', ExampleNodeTester, sys.argv)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+
+import sys
+import unittest
+
+from ariac_example import ariac_example
+from nist_gear.msg import LogicalCameraImage, Order
+from nist_gear.srv import DetectKittingShipment, GetMaterialLocations
+from std_msgs.msg import Float32, String
+from std_srvs.srv import Trigger
+import ariac_readiness
+import rospy
+import rostest
+
+
+class FakeAriacTester(unittest.TestCase):
+    """ Run the competition of sample_kitting.yaml against fake_ariac.py, with
+    the products of its order already on the tray (fake_ariac_filled_tray.yaml) """
+
+    def setUp(self):
+        self.orders = []
+        self.comp_state = None
+        self.agv2_station = None
+        self.score = None
+        self.subs = [
+            rospy.Subscriber('/ariac/orders', Order, self.orders.append),
+            rospy.Subscriber('/ariac/competition_state', String, self._state_callback),
+            rospy.Subscriber('/ariac/agv2/station', String, self._station_callback),
+            rospy.Subscriber('/ariac/current_score', Float32, self._score_callback),
+        ]
+
+    def _state_callback(self, msg):
+        self.comp_state = msg.data
+
+    def _station_callback(self, msg):
+        self.agv2_station = msg.data
+
+    def _score_callback(self, msg):
+        self.score = msg.data
+
+    def _wait_for(self, condition, timeout, description):
+        return ariac_readiness.wait_for(condition, timeout, description)
+
+    def test(self):
+        start = rospy.ServiceProxy('/ariac/start_competition', Trigger)()
+        self.assertTrue(start.success, start.message)
+        self._wait_for(lambda: self.comp_state == 'go', 5.0, '"go" state')
+
+        self._wait_for(lambda: self.orders, 5.0, 'an order')
+        order = self.orders[0]
+        self.assertEqual(order.order_id, 'order_0')
+        self.assertEqual(len(order.kitting_shipments), 1)
+        self.assertEqual(order.kitting_shipments[0].agv_id, 'agv2')
+        self.assertEqual(len(order.kitting_shipments[0].products), 3)
+
+        locations = rospy.ServiceProxy('/ariac/material_locations', GetMaterialLocations)(
+            'assembly_regulator_red').storage_units
+        self.assertEqual([u.unit_id for u in locations], ['bin1'])
+
+        content = rospy.ServiceProxy('/ariac/kit_tray_2/get_content', DetectKittingShipment)()
+        wanted_types = sorted(p.type for p in order.kitting_shipments[0].products)
+        self.assertEqual(sorted(p.type for p in content.shipment.products), wanted_types)
+
+        # The camera over ks2 sees the products on the tray, and the quality
+        # control sensor over it finds none of them faulty
+        image = rospy.wait_for_message('/ariac/logical_camera_agv2', LogicalCameraImage, 5.0)
+        self.assertEqual(sorted(m.type for m in image.models), wanted_types)
+        for model in image.models:
+            self.assertGreater(model.pose.position.x, 0.0, 'Product behind the camera')
+        image = rospy.wait_for_message('/ariac/quality_control_sensor_2', LogicalCameraImage, 5.0)
+        self.assertEqual(image.models, [])
+
+        # Ship it the way competitors do, through the ariac_example client
+        client = ariac_example.CompetitionClient(ariac_example.load_client_config())
+        client.connect()
+        self.assertTrue(client.submit_kitting_shipment(
+            'agv2', 'as1', order.kitting_shipments[0].shipment_type), 'Failed to submit the shipment')
+        self._wait_for(lambda: self.agv2_station == 'as1', 5.0, 'agv2 to reach as1')
+        self.assertEqual(client.agvs['agv2'].station, 'as1')
+
+        # The only order has been shipped, so the competition ends on its own
+        self._wait_for(lambda: self.comp_state == 'done', 5.0, '"done" state')
+        # 1 pt each for type, color and pose of the 3 products, plus the bonus
+        self._wait_for(lambda: self.score is not None, 5.0, 'a score')
+        self.assertEqual(self.score, 12.0)
+
+
+if __name__ == '__main__':
+    rospy.init_node('test_fake_ariac', anonymous=True)
+    ariac_readiness.wait_until_ready(clock_timeout=30.0)
+    rostest.run('test_ariac', 'test_fake_ariac', FakeAriacTester, sys.argv)
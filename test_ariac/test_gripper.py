@@ -3,10 +3,10 @@
 from __future__ import print_function
 
 import sys
-import time
 
 from test_example_node import ExampleNodeTester
 from ariac_example import ariac_example
+import ariac_readiness
 import rospy
 import rostest
 
@@ -16,7 +16,7 @@ class GripperTester(ExampleNodeTester):
     def test(self):
         self.comp_class = ariac_example.MyCompetitionClass()
         ariac_example.connect_callbacks(self.comp_class)
-        time.sleep(1.0)
+        self._wait_for_gripper_states()
 
         # Pre-defined initial pose because sometimes the arms start "droopy"
         self._send_arms_to_initial_pose()
@@ -41,19 +41,17 @@ class GripperTester(ExampleNodeTester):
         self.assertFalse(self.comp_class.arm_2_current_gripper_state.attached)
 
         self.assertTrue(self._enable_gripper(arm=1))
-        time.sleep(2.0)
+        self._wait_for_gripper(arm=1, enabled=True)
         self.assertTrue(self.comp_class.arm_1_current_gripper_state.enabled)
         self.assertTrue(self.comp_class.arm_1_current_gripper_state.attached)
 
         self.assertTrue(self._enable_gripper(arm=2))
-        time.sleep(2.0)
+        self._wait_for_gripper(arm=2, enabled=True)
         self.assertTrue(self.comp_class.arm_2_current_gripper_state.enabled)
         self.assertTrue(self.comp_class.arm_2_current_gripper_state.attached)
 
     def _enable_gripper(self, arm):
-        success = ariac_example.control_gripper(True, arm=arm)
-        time.sleep(0.5)
-        return success
+        return self.comp_class.control_gripper('arm%d' % arm, True)
 
     def _test_disable_gripper(self):
         self.assertTrue(self.comp_class.arm_1_current_gripper_state.enabled)
@@ -62,19 +60,35 @@ class GripperTester(ExampleNodeTester):
         self.assertTrue(self.comp_class.arm_2_current_gripper_state.attached)
 
         self.assertTrue(self._disable_gripper(arm=1))
-        time.sleep(2.0)
+        self._wait_for_gripper(arm=1, enabled=False)
         self.assertFalse(self.comp_class.arm_1_current_gripper_state.enabled)
         self.assertFalse(self.comp_class.arm_1_current_gripper_state.attached)
 
         self.assertTrue(self._disable_gripper(arm=2))
-        time.sleep(2.0)
+        self._wait_for_gripper(arm=2, enabled=False)
         self.assertFalse(self.comp_class.arm_2_current_gripper_state.enabled)
         self.assertFalse(self.comp_class.arm_2_current_gripper_state.attached)
 
     def _disable_gripper(self, arm):
-        success = ariac_example.control_gripper(False, arm=arm)
-        time.sleep(0.5)
-        return success
+        return self.comp_class.control_gripper('arm%d' % arm, False)
+
+    def _gripper_state(self, arm):
+        if arm == 1:
+            return self.comp_class.arm_1_current_gripper_state
+        return self.comp_class.arm_2_current_gripper_state
+
+    def _wait_for_gripper_states(self, timeout=5.0):
+        self._wait_for(
+            lambda: self._gripper_state(1) is not None and self._gripper_state(2) is not None,
+            timeout, 'gripper states')
+
+    def _wait_for_gripper(self, arm, enabled, timeout=2.0):
+        """ Wait until the gripper reports the requested suction (and the
+        matching attachment) """
+        def reached():
+            state = self._gripper_state(arm)
+            return state.enabled == enabled and state.attached == enabled
+        self._wait_for(reached, timeout, 'gripper %d state' % arm)
 
     def _send_arm1_to_product(self):
         trajectory = [
@@ -83,8 +97,7 @@ class GripperTester(ExampleNodeTester):
             [3.6, -0.538, 2.14, 3.24, -1.59, 0.126, 0.0]
         ]
         for positions in trajectory:
-            self.comp_class.send_arm1_to_state(positions)
-            time.sleep(1.5)
+            self._send_robot_to_state('arm1', positions)
 
     def _send_arm2_to_product(self):
         trajectory = [
@@ -94,8 +107,7 @@ class GripperTester(ExampleNodeTester):
             [2.76, -0.46, 1.88, 3.27, -1.51, 0.0, 0.24],
         ]
         for positions in trajectory:
-            self.comp_class.send_arm2_to_state(positions)
-            time.sleep(1.5)
+            self._send_robot_to_state('arm2', positions)
 
     def _send_arm1_to_tray(self):
         trajectory = [
@@ -105,8 +117,7 @@ class GripperTester(ExampleNodeTester):
             [1.507, 0.38, -0.38, 1.55, 1.75, 0.127, 1.18]
         ]
         for positions in trajectory:
-            self.comp_class.send_arm1_to_state(positions)
-            time.sleep(1.0)
+            self._send_robot_to_state('arm1', positions)
 
     def _send_arm2_to_tray(self):
         trajectory = [
@@ -116,20 +127,13 @@ class GripperTester(ExampleNodeTester):
             [4.52, -0.50, 1.51, 3.64, -1.51, 0.0, -1.04],
         ]
         for positions in trajectory:
-            self.comp_class.send_arm2_to_state(positions)
-            time.sleep(1.0)
+            self._send_robot_to_state('arm2', positions)
 
 
 if __name__ == '__main__':
     rospy.init_node('test_gripper', anonymous=True)
 
-    # Wait until /clock is being published; this can take an unpredictable
-    # amount of time when we're downloading models.
-    while rospy.Time.now().to_sec() == 0.0:
-        print('Waiting for Gazebo to start...')
-        time.sleep(1.0)
-    # Take an extra nap, to allow plugins to be loaded
-    time.sleep(12.0)
+    ariac_readiness.wait_until_ready()
     print('OK, starting test.')
 
     rostest.run('test_ariac', 'test_gripper', GripperTester, sys.argv)
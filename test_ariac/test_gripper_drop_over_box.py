@@ -3,11 +3,11 @@
 from __future__ import print_function
 
 import sys
-import time
 
 from test_gripper import GripperTester
 from test_tf_frames import TfTester
 from ariac_example import ariac_example
+import ariac_readiness
 import rospy
 import rostest
 
@@ -23,7 +23,7 @@ class GripperBoxDropTester(GripperTester, TfTester):
     def test(self):
         self.comp_class = ariac_example.MyCompetitionClass()
         ariac_example.connect_callbacks(self.comp_class)
-        time.sleep(1.0)
+        self._wait_for_gripper_states()
         self.prepare_tf()
 
         self._send_arms_to_initial_pose()
@@ -31,7 +31,7 @@ class GripperBoxDropTester(GripperTester, TfTester):
         self._send_arm1_to_product()
 
         self._enable_gripper(arm=1)
-        time.sleep(2.0)
+        self._wait_for_gripper(arm=1, enabled=True)
         self.assertTrue(self.comp_class.arm_1_current_gripper_state.enabled)
         self.assertTrue(self.comp_class.arm_1_current_gripper_state.attached)
 
@@ -41,8 +41,6 @@ class GripperBoxDropTester(GripperTester, TfTester):
 
         self._test_dropped_product_pose()
 
-        time.sleep(1.0)
-
     def _test_dropped_product_pose(self):
         self._test_pose(
             [0.15, 0.15, 0.0],
@@ -55,13 +53,7 @@ class GripperBoxDropTester(GripperTester, TfTester):
 if __name__ == '__main__':
     rospy.init_node('test_gripper_box_drop', anonymous=True)
 
-    # Wait until /clock is being published; this can take an unpredictable
-    # amount of time when we're downloading models.
-    while rospy.Time.now().to_sec() == 0.0:
-        print('Waiting for Gazebo to start...')
-        time.sleep(1.0)
-    # Take an extra nap, to allow plugins to be loaded
-    time.sleep(12.0)
+    ariac_readiness.wait_until_ready()
     print('OK, starting test.')
 
     rostest.run('test_ariac', 'test_gripper_box_drop', GripperBoxDropTester, sys.argv)
@@ -3,10 +3,10 @@
 from __future__ import print_function
 
 import sys
-import time
 
 from test_gripper import GripperTester
 from ariac_example import ariac_example
+import ariac_readiness
 import rospy
 import rostest
 
@@ -16,7 +16,7 @@ class UnthrottledGripperTester(GripperTester):
     def test(self):
         self.comp_class = ariac_example.MyCompetitionClass()
         ariac_example.connect_callbacks(self.comp_class)
-        time.sleep(1.0)
+        self._wait_for_gripper_states()
 
         # Pre-defined initial pose because sometimes the arm starts "droopy"
         self._send_arm_to_initial_pose()
@@ -44,19 +44,11 @@ class UnthrottledGripperTester(GripperTester):
         # Disable the gripper so that it drops the product.
         self._test_disable_gripper()
 
-        time.sleep(1.0)
-
 
 if __name__ == '__main__':
     rospy.init_node('test_gripper_unthrottled', anonymous=True)
 
-    # Wait until /clock is being published; this can take an unpredictable
-    # amount of time when we're downloading models.
-    while rospy.Time.now().to_sec() == 0.0:
-        print('Waiting for Gazebo to start...')
-        time.sleep(1.0)
-    # Take an extra nap, to allow plugins to be loaded
-    time.sleep(12.0)
+    ariac_readiness.wait_until_ready()
     print('OK, starting test.')
 
     rostest.run('test_ariac', 'test_gripper_unthrottled', UnthrottledGripperTester, sys.argv)
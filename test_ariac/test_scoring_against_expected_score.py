@@ -1,63 +1,251 @@
 #!/usr/bin/env python
 
+"""Run a scoring scenario and compare the final score with the expected one.
+
+Arguments: the expected score, then one command per argument:
+
+    config:<file>                       trial configuration with the orders, read
+                                        for their priorities; can be repeated
+    wait:<seconds>                      sleep for that long in sim time
+    wait_until:<condition>[@<timeout>]  wait (at most timeout wall seconds,
+                                        default 30) until the condition holds
+    order_update:<order_id>             wait until the update of an order is announced
+    submit_agv<N>:<shipment>            submit the kit on agvN (legacy service)
+    submit_agv<N>:<shipment>,<station>  send agvN to an assembly station
+    submit_as<N>:<shipment>             submit the briefcase at assembly station N
+    collide_arms:                       drive the gantry into the kitting robot and
+                                        wait for the collision to be reported
+
+Conditions compare a value with '=', '!=', '>=' or '<=':
+
+    score       the published score              e.g. score>=15
+    state       the competition state            e.g. state=done
+    order       an announced order id            e.g. order=order_1
+    agv<N>      the station of an AGV            e.g. agv2=as1
+    agv<N>_state the state of an AGV             e.g. agv1_state=ready_to_deliver
+
+Scenarios end with wait_until:state=done rather than waiting for the expected
+score, so that a wrong score fails the final comparison with both values
+instead of timing out.
+"""
+
 from __future__ import print_function
 
+import argparse
+import operator
+import re
 import sys
-import time
 
+import ariac_readiness
 import rospy
 import rostest
+from ariac_example import ariac_example
+from ariac_scorer import AriacScorer
+from fake_ariac import load_gear
+from nist_gear.msg import Order
+from nist_gear.srv import AssemblyStationSubmitShipment
+from nist_gear.srv import DetectAssemblyShipment
+from nist_gear.srv import DetectKittingShipment
+from rosgraph_msgs.msg import Log
 from test_example_node import ExampleNodeTester
+from trajectory_msgs.msg import JointTrajectory
+from trajectory_msgs.msg import JointTrajectoryPoint
+
+# Kitting arm standing upright at the middle of its rail
+KITTING_COLLISION_POSE = [0, 0, -1.57, 0, 0, 0, 0]
+# Gantry torso moved over the kitting robot, which stands at x=-1.3 in the world
+GANTRY_TORSO_COMMAND_TOPIC = '/ariac/gantry/gantry_controller/command'
+GANTRY_TORSO_JOINT_NAMES = ['small_long_joint', 'torso_rail_joint', 'torso_base_main_joint']
+GANTRY_TORSO_COLLISION_POSE = [0.7, 0, 0]
+# Logged by the task manager when it scores an arm/arm collision
+ARM_COLLISION_LOG = 'arm/arm contact detected'
+ARM_COLLISION_TIMEOUT = 30.0
+DEFAULT_WAIT_UNTIL_TIMEOUT = 30.0
+
+DEFAULT_PRIORITY = 1
+
+OPERATORS = [('>=', operator.ge), ('<=', operator.le), ('!=', operator.ne), ('=', operator.eq)]
+
+
+def load_order_priorities(config_files):
+    """ Priority of every order of a trial configuration, keyed by order id """
+    if not config_files:
+        return {}
+    gear = load_gear()
+    parser = argparse.ArgumentParser()
+    gear.prepare_arguments(parser)
+    config = gear.load_config(parser.parse_args(['-f'] + config_files))
+    return dict((order_id, order.get('priority', DEFAULT_PRIORITY))
+                for order_id, order in (config.get('orders') or {}).items())
 
 
 class ScoringTester(ExampleNodeTester):
 
+    order_priorities = {}
+
+    def prepare_tester(self):
+        super(ScoringTester, self).prepare_tester()
+        # Scores the same events as the task manager, to check that the
+        # offline scorer agrees with the C++ one
+        self.offline_scorer = AriacScorer()
+        self.order_sub = rospy.Subscriber('/ariac/orders', Order, self._offline_order_callback)
+        self.arm_collision_reported = False
+        self.log_sub = rospy.Subscriber('/rosout_agg', Log, self._log_callback)
+        self.gantry_torso_pub = rospy.Publisher(GANTRY_TORSO_COMMAND_TOPIC, JointTrajectory, queue_size=1)
+
+    def _log_callback(self, msg):
+        # The simulation reports collisions only in its log
+        if msg.level == Log.ERROR and ARM_COLLISION_LOG in msg.msg and not self.arm_collision_reported:
+            self.arm_collision_reported = True
+            self.offline_scorer.notify_arm_arm_collision()
+
+    def _offline_order_callback(self, msg):
+        if '_update' in msg.order_id:
+            original_order_id = msg.order_id[:msg.order_id.find('_update')]
+            self.offline_scorer.notify_order_updated(rospy.get_time(), original_order_id, msg)
+        else:
+            self.offline_scorer.notify_order_started(
+                rospy.get_time(), msg, self.order_priorities.get(msg.order_id, DEFAULT_PRIORITY))
+
+    def _get_content(self, service, service_class):
+        rospy.wait_for_service(service)
+        return rospy.ServiceProxy(service, service_class)().shipment
+
+    def _test_submit_shipment(self, shipment_type, agv_num, station=None):
+        shipment = self._get_content('/ariac/kit_tray_%d/get_content' % agv_num, DetectKittingShipment)
+        if station is None:
+            super(ScoringTester, self)._test_submit_shipment(shipment_type, agv_num)
+            # submit_shipment() does not send a station
+            station = ''
+        else:
+            success = self.comp_class.submit_kitting_shipment('agv%d' % agv_num, station, shipment_type)
+            self.assertTrue(success, 'failed to send agv%d to %s' % (agv_num, station))
+        self.offline_scorer.notify_kitting_shipment_received(
+            rospy.get_time(), shipment_type, shipment, station)
+
+    def _test_submit_assembly_shipment(self, shipment_type, station_num):
+        shipment = self._get_content(
+            '/ariac/briefcase_%d/get_content' % station_num, DetectAssemblyShipment)
+        success = ariac_example.call_service(
+            '/ariac/as%d/submit_shipment' % station_num, AssemblyStationSubmitShipment,
+            'submit the assembly shipment', shipment_type)
+        self.assertTrue(success, 'failed to submit assembly shipment at as%d' % station_num)
+        self.offline_scorer.notify_assembly_shipment_received(
+            rospy.get_time(), shipment_type, shipment, 'as%d' % station_num)
+
+    def _sim_wait(self, seconds):
+        """ Sleep in sim time, failing if the simulation stops advancing """
+        target = rospy.get_time() + seconds
+        self._wait_for(lambda: rospy.get_time() >= target, max(30.0, 10 * seconds),
+                       '%s s of sim time' % seconds)
+
+    def _condition(self, spec):
+        """ Turn a condition such as 'score>=15' into a callable """
+        for symbol, compare in OPERATORS:
+            if symbol in spec:
+                name, expected = spec.split(symbol, 1)
+                break
+        else:
+            raise ValueError('no comparison in condition: ' + repr(spec))
+
+        if name == 'score':
+            expected = float(expected)
+            return lambda: self.current_comp_score is not None and compare(
+                self.current_comp_score, expected)
+        if name == 'state':
+            return lambda: compare(self.comp_class.current_comp_state, expected)
+        if name == 'order':
+            return lambda: compare(
+                expected in [o.order_id for o in self.comp_class.received_orders], True)
+        match = re.match(r'^(agv\d+)(_state)?$', name)
+        if match and match.group(1) in self.comp_class.agvs:
+            agv = self.comp_class.agvs[match.group(1)]
+            if match.group(2):
+                return lambda: compare(agv.state, expected)
+            return lambda: compare(agv.station, expected)
+        raise ValueError('unknown value in condition: ' + repr(spec))
+
+    def _wait_until(self, arg):
+        spec, _, timeout = arg.partition('@')
+        timeout = float(timeout) if timeout else DEFAULT_WAIT_UNTIL_TIMEOUT
+        try:
+            ariac_readiness.wait_for(self._condition(spec), timeout, spec)
+        except ariac_readiness.ReadinessError as e:
+            self.fail('%s (last score %s, state %s)' % (
+                e, self.current_comp_score, self.comp_class.current_comp_state))
+
+    def _collide_arms(self):
+        self.comp_class.send_to_state('kitting', KITTING_COLLISION_POSE)
+        msg = JointTrajectory()
+        msg.joint_names = GANTRY_TORSO_JOINT_NAMES
+        point = JointTrajectoryPoint()
+        point.positions = GANTRY_TORSO_COLLISION_POSE
+        point.time_from_start = rospy.Duration(2.0)
+        msg.points.append(point)
+        self.gantry_torso_pub.publish(msg)
+        self._wait_for(lambda: self.arm_collision_reported, ARM_COLLISION_TIMEOUT,
+                       'the arm/arm collision to be reported')
+
+    def run_command(self, command):
+        opcode, _, arg = command.partition(':')
+        agv = re.match(r'^submit_agv(\d+)$', opcode)
+        station = re.match(r'^submit_as(\d+)$', opcode)
+        if opcode == 'wait':
+            print('Waiting for %s s of sim time' % arg)
+            self._sim_wait(float(arg))
+        elif opcode == 'wait_until':
+            print('Waiting until ' + arg)
+            self._wait_until(arg)
+        elif opcode == 'order_update':
+            print('Waiting for the update of ' + arg)
+            self._wait_until('order=%s_update' % arg)
+        elif agv:
+            shipment_type, _, assembly_station = arg.partition(',')
+            print('Submitting agv%s shipment %s' % (agv.group(1), shipment_type))
+            self._test_submit_shipment(shipment_type, int(agv.group(1)), assembly_station or None)
+        elif station:
+            print('Submitting as%s shipment %s' % (station.group(1), arg))
+            self._test_submit_assembly_shipment(arg, int(station.group(1)))
+        elif opcode == 'collide_arms':
+            print('Commanding arms to collide')
+            self._collide_arms()
+        else:
+            raise ValueError("unknown command: " + repr(command))
+
     def test(self):
         expectedScore = float(sys.argv[1])
         rospy.loginfo('Using expected score of: ' + str(expectedScore))
         commands = []
+        config_files = []
         if len(sys.argv) > 2:
             for arg in sys.argv[2:]:
                 if arg.startswith('--'):
                     break
-                commands.append(arg)
+                if arg.startswith('config:'):
+                    config_files.append(arg.partition(':')[2])
+                else:
+                    commands.append(arg)
         self.assertNotEqual([], commands)
+        self.order_priorities = load_order_priorities(config_files)
         self.prepare_tester()
 
         # Starting the competition will cause products from the order to be spawned on shipping_box_0
         self._test_start_comp()
 
         for command in commands:
-            opcode, arg = command.split(":")
-            if "wait" == opcode:
-                print('Waiting for ' + arg + ' seconds')
-                time.sleep(float(arg))
-            elif "submit_agv1" == opcode:
-                print('Submitting agv1 shipment ' + arg)
-                self._test_submit_shipment(shipment_type=arg, agv_num=1)
-            elif "submit_agv2" == opcode:
-                print('Submitting agv2 shipment ' + arg)
-                self._test_submit_shipment(shipment_type=arg, agv_num=2)
-            elif "collide_arms" == opcode:
-                print('Commanding arms to collide')
-                self.comp_class.send_arm1_to_state([0, 0, 0, 0, 0, 0, -1.18])
-                self.comp_class.send_arm2_to_state([0, 0, 0, 0, 0, 0, 1.18])
-            else:
-                raise ValueError("unknown command: " + repr(command))
+            self.run_command(command)
 
         self.assertEqual(self.current_comp_score, expectedScore)
+        offline_score = self.offline_scorer.get_game_score().total()
+        self.assertAlmostEqual(
+            offline_score, self.current_comp_score, places=3,
+            msg='Offline scorer gave %s, the simulation %s' % (offline_score, self.current_comp_score))
 
 
 if __name__ == '__main__':
     rospy.init_node('test_scoring_against_expected_score', anonymous=True)
 
-    # Wait until /clock is being published; this can take an unpredictable
-    # amount of time when we're downloading models.
-    while rospy.Time.now().to_sec() == 0.0:
-        print('Waiting for Gazebo to start...')
-        time.sleep(1.0)
-    # Take an extra nap, to allow plugins to be loaded
-    time.sleep(20.0)
+    ariac_readiness.wait_until_ready()
     print('OK, starting test.')
 
     rostest.run('test_ariac', 'test_scoring_against_expected_score', ScoringTester, sys.argv)
@@ -3,19 +3,14 @@
 from __future__ import print_function
 
 import sys
-import time
 
-import geometry_msgs.msg
+import ariac_readiness
 import rospy
 import rostest
+import tf_assertions
 from test_sensors import SensorsTester
 from test_tf_frames import TfTester
 
-import tf
-import tf2_geometry_msgs  # noqa
-import tf2_py as tf2
-import tf2_ros
-
 class SensorBlackoutTester(TfTester, SensorsTester):
 
     def test(self):
@@ -48,20 +43,16 @@ class SensorBlackoutTester(TfTester, SensorsTester):
                 'Callback received from sensor: ' + sensor_name)
 
     def _test_no_tf_frames(self):
-        with self.assertRaises(tf2.LookupException):
-            self._test_faulty_products()
+        # None of the quality control sensor frames may be published.
+        tf_assertions.assert_frames(
+            self.tfBuffer,
+            [tf_assertions.missing(e.frame, e.parent) for e in self._faulty_product_expectations()])
 
 
 if __name__ == '__main__':
     rospy.init_node('test_sensor_blackout', anonymous=True)
 
-    # Wait until /clock is being published; this can take an unpredictable
-    # amount of time when we're downloading models.
-    while rospy.Time.now().to_sec() == 0.0:
-        print('Waiting for Gazebo to start...')
-        time.sleep(1.0)
-    # Take an extra nap, to allow plugins to be loaded
-    time.sleep(10.0)
+    ariac_readiness.wait_until_ready()
     print('OK, starting test.')
 
     rostest.run('test_ariac', 'test_sensor_blackout', SensorBlackoutTester, sys.argv)
@@ -3,10 +3,12 @@
 from __future__ import print_function
 
 import sys
-import time
 
+import ariac_readiness
 import rospy
 import rostest
+import sensor_stats
+import yaml
 from test_example_node import ExampleNodeTester
 
 from nist_gear.msg import LogicalCameraImage
@@ -16,6 +18,12 @@ from sensor_msgs.msg import LaserScan
 from sensor_msgs.msg import PointCloud
 
 
+# Sensors publishing slower than this fraction of their update_rate fail the test
+MIN_RATE_RATIO = 0.5
+# Sim seconds over which the rates are measured
+MEASUREMENT_DURATION = 5.0
+
+
 class SensorsTester(ExampleNodeTester):
 
     def test(self):
@@ -26,14 +34,16 @@ class SensorsTester(ExampleNodeTester):
 
         # Subscribe to sensors.
         self.subscribe_to_sensors()
-        start_time = rospy.Time.now()
-	while (rospy.Time.now() - start_time).to_sec() < 5:
-            rospy.sleep(0.1)
+        self._wait_for(lambda: set(self.sensors) <= self.callbacks_received, 5.0, 'all sensors')
         self._test_messages_received()
+        self._test_sensor_rates()
 
     def add_sensor_callback(self, sensor_name):
         def sensor_callback(msg):
             self.callbacks_received.add(sensor_name)
+            header = getattr(msg, 'header', None)
+            stamp = header.stamp.to_sec() if header is not None else 0.0
+            self.stats[sensor_name].record(stamp, rospy.get_rostime().to_sec())
 
         setattr(self, 'sensor_callback_' + sensor_name, sensor_callback)
         return sensor_callback
@@ -44,6 +54,25 @@ class SensorsTester(ExampleNodeTester):
                 sensor_name in self.callbacks_received,
                 'Callback not received from sensor: ' + sensor_name)
 
+    def _test_sensor_rates(self):
+        # Start counting now that every sensor is publishing
+        for stats in self.stats.values():
+            stats.reset()
+        rospy.sleep(MEASUREMENT_DURATION)
+        report = {
+            'sensor_count': len(self.configured_rates),
+            'sensors': dict((name, stats.summary()) for name, stats in self.stats.items()),
+        }
+        sensor_stats.print_table(report)
+        report_file = rospy.get_param('~report', '')
+        if report_file:
+            with open(report_file, 'w') as f:
+                yaml.safe_dump(report, f, default_flow_style=False)
+
+        slow = sensor_stats.slow_sensors(report['sensors'], MIN_RATE_RATIO)
+        self.assertFalse(slow, 'Sensors publishing below %d%% of their update_rate:\n' % (
+            100 * MIN_RATE_RATIO) + '\n'.join(slow))
+
     def subscribe_to_sensors(self):
         self.sensors = {
             'logical_camera_1': LogicalCameraImage,
@@ -53,7 +82,11 @@ class SensorsTester(ExampleNodeTester):
             'laser_profiler_1': LaserScan,
             'break_beam_1': Proximity,
         }
+        self.configured_rates = sensor_stats.configured_update_rates(sensor_stats.default_world_file())
         self.callbacks_received = set()
+        self.stats = dict(
+            (name, sensor_stats.SensorStats(name, self.configured_rates.get(name)))
+            for name in self.sensors)
         for sensor_name, message_type in self.sensors.items():
             topic_name = '/ariac/' + sensor_name
             sensor_callback = self.add_sensor_callback(sensor_name)
@@ -63,13 +96,7 @@ class SensorsTester(ExampleNodeTester):
 if __name__ == '__main__':
     rospy.init_node('test_sensors', anonymous=True)
 
-    # Wait until /clock is being published; this can take an unpredictable
-    # amount of time when we're downloading models.
-    while rospy.Time.now().to_sec() == 0.0:
-        print('Waiting for Gazebo to start...')
-        time.sleep(1.0)
-    # Take an extra nap, to allow plugins to be loaded
-    time.sleep(10.0)
+    ariac_readiness.wait_until_ready()
     print('OK, starting test.')
 
     rostest.run('test_ariac', 'test_sensors', SensorsTester, sys.argv)
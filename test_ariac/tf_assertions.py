@@ -0,0 +1,121 @@
+"""Check many TF frames against expected poses in one pass.
+
+Looking up and asserting one frame at a time makes a test wait up to its
+timeout for every frame, and every frame that must be absent costs the full
+timeout.  check_frames() waits once for all of them, then looks every
+expectation up in the same buffer state and compares all the poses at once.
+"""
+
+from __future__ import print_function
+
+import time
+
+import numpy
+import rospy
+import tf2_py as tf2
+
+
+class FrameExpectation(object):
+    """ The expected pose of frame in parent, or that frame must not exist
+
+    Args:
+    frame (str): child frame id
+    parent (str): frame the pose is expressed in
+    position (list): x, y, z, or None to only check that the frame exists
+    orientation (list): quaternion x, y, z, w, or None to not check it
+    tolerance (float): allowed difference on each position and quaternion component
+    exists (bool): False if the frame must not be published
+    """
+
+    def __init__(self, frame, parent='world', position=None, orientation=None, tolerance=0.05,
+                 exists=True):
+        self.frame = frame
+        self.parent = parent
+        self.position = position
+        self.orientation = orientation
+        self.tolerance = tolerance
+        self.exists = exists
+
+    def __repr__(self):
+        return '"%s" in "%s"' % (self.frame, self.parent)
+
+
+def missing(frame, parent='world'):
+    """ An expectation that frame cannot be looked up in parent """
+    return FrameExpectation(frame, parent, exists=False)
+
+
+def check_frames(tf_buffer, expectations, timeout=1.0):
+    """ Compare the TF buffer with the expectations
+
+    Waits up to timeout for the frames that should exist.  If some frames must
+    not exist, the whole timeout is waited (unless one of them shows up), so
+    they had the same chance to appear as the others.
+
+    Returns:
+    list of str: one message per expectation that is not met
+    """
+    present = [e for e in expectations if e.exists]
+    absent = [e for e in expectations if not e.exists]
+    deadline = time.time() + timeout
+    while not rospy.is_shutdown() and time.time() < deadline:
+        if any(tf_buffer.can_transform(e.parent, e.frame, rospy.Time()) for e in absent):
+            break
+        if not absent and all(tf_buffer.can_transform(e.parent, e.frame, rospy.Time()) for e in present):
+            break
+        time.sleep(0.05)
+
+    failures = []
+    found = []
+    transforms = []
+    for expectation in expectations:
+        try:
+            transform = tf_buffer.lookup_transform(expectation.parent, expectation.frame, rospy.Time())
+        except (tf2.LookupException, tf2.ConnectivityException, tf2.ExtrapolationException) as e:
+            if expectation.exists:
+                failures.append('%r not found: %s' % (expectation, e))
+            continue
+        if not expectation.exists:
+            failures.append('%r should not exist' % expectation)
+            continue
+        found.append(expectation)
+        transforms.append(transform.transform)
+
+    with_position = [i for i, e in enumerate(found) if e.position is not None]
+    if with_position:
+        actual = numpy.array([
+            [transforms[i].translation.x, transforms[i].translation.y, transforms[i].translation.z]
+            for i in with_position])
+        expected = numpy.array([found[i].position for i in with_position], dtype=float)
+        errors = numpy.abs(actual - expected).max(axis=1)
+        for row, i in enumerate(with_position):
+            if errors[row] > found[i].tolerance:
+                failures.append('%r: position %s, expected %s' % (
+                    found[i], actual[row].round(4).tolist(), list(found[i].position)))
+
+    with_orientation = [i for i, e in enumerate(found) if e.orientation is not None]
+    if with_orientation:
+        actual = numpy.array([
+            [transforms[i].rotation.x, transforms[i].rotation.y, transforms[i].rotation.z,
+             transforms[i].rotation.w]
+            for i in with_orientation])
+        # Published quaternions are not always normalized
+        actual /= numpy.linalg.norm(actual, axis=1)[:, numpy.newaxis]
+        expected = numpy.array([found[i].orientation for i in with_orientation], dtype=float)
+        # q and -q are the same rotation
+        errors = numpy.minimum(numpy.abs(actual - expected).max(axis=1),
+                               numpy.abs(actual + expected).max(axis=1))
+        for row, i in enumerate(with_orientation):
+            if errors[row] > found[i].tolerance:
+                failures.append('%r: orientation %s, expected %s' % (
+                    found[i], actual[row].round(4).tolist(), list(found[i].orientation)))
+
+    rospy.loginfo('Checked %d TF frames, %d failures' % (len(expectations), len(failures)))
+    return failures
+
+
+def assert_frames(tf_buffer, expectations, timeout=1.0):
+    """ Like check_frames(), but fail with all the unmet expectations at once """
+    failures = check_frames(tf_buffer, expectations, timeout)
+    if failures:
+        raise AssertionError('TF frames not as expected:\n  ' + '\n  '.join(failures))